@@ -2,22 +2,48 @@
 
 from flask import Flask
 from flask_cors import CORS
+from application.tracing import configure_tracing
 from infrastructure.api.routes import register_routes
-from infrastructure.db import init_db
+from infrastructure.api.hooks import register_tracing, register_unit_of_work
+from infrastructure.cli import register_commands
+from infrastructure.cache import LRUCache
+from infrastructure.db import engine, init_db
+from infrastructure.db.slow_queries import record_slow_queries
+from infrastructure.db.unit_of_work import SQLAlchemyUnitOfWork
+from infrastructure.memory.repository import MemoryStore
+from infrastructure.memory.unit_of_work import InMemoryUnitOfWork
+from infrastructure.metrics import register_metrics
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from config import Config
+from functools import partial
+from config import Config, is_memory_url
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object("config.Config")
+    # Registered first so that its hooks also see requests refused by the limiter
+    register_metrics(app, engine)
+    configure_tracing(app.config["TRACE_SAMPLE_RATE"], app.config["TRACE_FILE"])
+    register_tracing(app)
     limiter = Limiter(get_remote_address, app=app, default_limits=["60 per minute"])
     
     # Enable CORS for all routes
     CORS(app, origins=app.config["FRONTEND_URL"])
     
-    init_db()
+    if is_memory_url(app.config["SQLALCHEMY_DATABASE_URI"]):
+        # Process-local store, nothing is persisted
+        store = MemoryStore()
+        app.extensions["memory_store"] = store
+        register_unit_of_work(app, partial(InMemoryUnitOfWork, store))
+    else:
+        init_db()
+        record_slow_queries(engine, app.config["SLOW_QUERY_THRESHOLD_MS"], app.config["SLOW_QUERY_LOG"])
+        # Groups keyed by id and stamped with their version, shared by the requests of this worker
+        group_cache = LRUCache(app.config["GROUP_CACHE_SIZE"])
+        app.extensions["group_cache"] = group_cache
+        register_unit_of_work(app, partial(SQLAlchemyUnitOfWork, group_cache=group_cache))
     register_routes(app, limiter)
+    register_commands(app)
     return app
 
 app = create_app()
\ No newline at end of file
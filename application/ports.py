@@ -1,7 +1,8 @@
 # Repo Interfaces
 
 from abc import ABC, abstractmethod
-from domain.models import User, Group, Expense, Member, User, Member
+from typing import Iterator
+from domain.models import User, Group, GroupSummary, Expense, ExpenseColumns, Member, User, Member
 class UserRepository(ABC):
     @abstractmethod
     def get_by_id(self, user_id: int) -> User: pass
@@ -23,6 +24,9 @@ class GroupRepository(ABC):
     @abstractmethod
     def get_groups_by_owner_id(self, owner_id:str) -> list[Group]: pass
 
+    @abstractmethod
+    def get_group_summaries_by_owner_id(self, owner_id: str) -> list[GroupSummary]: pass
+
     @abstractmethod
     def add(self, group: Group) -> None: pass
 
@@ -32,9 +36,24 @@ class GroupRepository(ABC):
     @abstractmethod
     def update_member_name(self, group_id: str, old_name: str, new_name: str) -> None: pass
 
+    @abstractmethod
+    def get_version(self, group_id: str) -> int | None: pass
+
     @abstractmethod
     def get_members(self, group_id: str) -> list[Member]: pass
 
+    @abstractmethod
+    def get_member_by_username(self, group_id: str, username: str) -> Member | None: pass
+
+    @abstractmethod
+    def has_member_username(self, group_id: str, username: str) -> bool: pass
+
+    @abstractmethod
+    def exists(self, group_id: str) -> bool: pass
+
+    @abstractmethod
+    def get_balances(self, group_id: str) -> dict[Member, float]: pass
+
     @abstractmethod
     def remove_member(self, group_id: str, member: Member) -> None: pass
 
@@ -54,6 +73,9 @@ class ExpenseRepository(ABC):
     @abstractmethod
     def add(self, expense: Expense) -> None: pass
 
+    @abstractmethod
+    def add_many(self, expenses: list[Expense]) -> None: pass
+
     @abstractmethod
     def update(self, expense: Expense) -> None: pass
 
@@ -61,4 +83,16 @@ class ExpenseRepository(ABC):
     def remove(self, expense_id: str) -> None: pass
 
     @abstractmethod
-    def list_by_group(self, group_id: str) -> list[Expense]: pass
+    def list_by_group(self, group_id: str, limit: int | None = None, after_id: int | None = None) -> list[Expense]: pass
+
+    @abstractmethod
+    def iter_by_group(self, group_id: str, batch_size: int = 1000) -> Iterator[Expense]: pass
+
+    @abstractmethod
+    def aggregate_balances(self, group_id: str) -> dict[Member, float]: pass
+
+    @abstractmethod
+    def get_expense_columns(self, group_id: str) -> ExpenseColumns: pass
+
+    @abstractmethod
+    def member_has_expenses(self, member_id: int) -> bool: pass
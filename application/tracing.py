@@ -0,0 +1,184 @@
+# In-process tracing
+#
+# A trace is started at the edge of a request and sampled there. Spans opened below it,
+# through span() or the traced decorators, nest under the current span. Outside a sampled
+# trace they cost one context variable lookup. A finished trace is handed to the exporter
+# in one piece.
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start: float  # seconds since the epoch
+    attributes: dict = field(default_factory=dict)
+    duration_ms: float | None = None
+    error: str | None = None
+    _started: float = field(default=0.0, repr=False)
+    _parent: "Span | None" = field(default=None, repr=False)
+    _trace: list = field(default_factory=list, repr=False)  # every span of the trace, shared
+
+    def to_json(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class JsonLinesExporter:
+    """
+    Appends each finished trace to a file, one span per line.
+    A trace is written with a single call, so processes sharing the file do not interleave.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(span.to_json()) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def configure(self, sample_rate: float, exporter) -> None:
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def start_trace(self, name: str, **attributes) -> Span | None:
+        """
+        Opens the root span of a new trace, or returns None when the trace is not sampled.
+        """
+        if self.exporter is None or random.random() >= self.sample_rate:
+            return None
+        trace_id = os.urandom(16).hex()
+        return self._open(name, trace_id, None, attributes, [])
+
+    def start_span(self, name: str, **attributes) -> Span | None:
+        # A child of the current span, or None outside a sampled trace
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        return self._open(name, parent.trace_id, parent, attributes, parent._trace)
+
+    def _open(self, name: str, trace_id: str, parent: Span | None, attributes: dict, trace: list) -> Span:
+        span = Span(
+            trace_id=trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            name=name,
+            start=time.time(),
+            attributes=attributes,
+            _started=time.perf_counter(),
+            _parent=parent,
+            _trace=trace,
+        )
+        trace.append(span)
+        _current_span.set(span)
+        return span
+
+    def end_span(self, span: Span, error: BaseException | None = None) -> None:
+        span.duration_ms = round((time.perf_counter() - span._started) * 1000, 3)
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        _current_span.set(span._parent)
+        if span._parent is None:
+            try:
+                self.exporter.export(span._trace)
+            except OSError:
+                logger.exception("Could not export trace %s", span.trace_id)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span | None]:
+        span = self.start_span(name, **attributes)
+        if span is None:
+            yield None
+            return
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        self.end_span(span)
+
+
+tracer = Tracer()
+
+
+def configure_tracing(sample_rate: float, path: str | None) -> None:
+    tracer.configure(sample_rate, JsonLinesExporter(path) if path and sample_rate > 0 else None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def span(name: str, **attributes):
+    return tracer.span(name, **attributes)
+
+
+def traced(name: str | None = None) -> Callable:
+    """
+    Decorator opening a span around every call of the function, named after its module
+    and function by default. Generator functions are left as they are, their work happens
+    while the caller iterates.
+    """
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            return fn
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            span = tracer.start_span(span_name)
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                tracer.end_span(span, e)
+                raise
+            tracer.end_span(span)
+            return result
+
+        return wrapper
+    return decorate
+
+
+def traced_methods(cls):
+    """
+    Class decorator tracing every public method defined on the class, as ClassName.method.
+    """
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.isfunction(value):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
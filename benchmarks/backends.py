@@ -0,0 +1,104 @@
+# Domain services on the in-memory backend and on SQLite
+#
+# Usage: python -m benchmarks.backends [members] [expenses]
+#
+# The in-memory backend does no I/O, so its timings are the cost of the services
+# themselves. The difference to SQLite is what the database layer adds.
+
+import os
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+
+from sqlalchemy.orm import sessionmaker
+from domain.services import (
+    calculate_group_balance,
+    calculate_payments,
+    create_expense,
+    create_group,
+    create_member,
+    create_user,
+    get_expense_page,
+    get_group_balances,
+)
+from infrastructure.db.models import Base
+from infrastructure.db.profiles import create_profiled_engine
+from infrastructure.db.unit_of_work import SQLAlchemyUnitOfWork
+from infrastructure.memory.repository import MemoryStore
+from infrastructure.memory.unit_of_work import InMemoryUnitOfWork
+
+
+def memory_backend():
+    store = MemoryStore()
+    return lambda: InMemoryUnitOfWork(store)
+
+
+def sqlite_backend():
+    engine = create_profiled_engine(f"sqlite:///{_db_dir}/backends.db", "production-sqlite")
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    return lambda: SQLAlchemyUnitOfWork(session_factory)
+
+
+def timed(results, label, new_uow, action, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        uow = new_uow()
+        try:
+            value = action(uow)
+            uow.commit()
+        finally:
+            uow.close()
+    results[label] = (time.perf_counter() - start) / repeat
+    return value
+
+
+def run(new_uow, member_count: int, expense_count: int) -> dict:
+    results = {}
+    names = [f"member{i}" for i in range(member_count)]
+
+    def setup_group(uow):
+        owner = create_user(uow.users)
+        group = create_group(uow.groups, "Bench", owner)
+        for name in names:
+            create_member(uow.members, uow.groups, name, group.id)
+        return group.id
+
+    group_id = timed(results, f"create group + {member_count} members", new_uow, setup_group)
+
+    def add_expenses(uow):
+        for i in range(expense_count):
+            create_expense(
+                uow.expenses, uow.groups, group_id, f"Expense {i}", 60.0,
+                [{"name": names[i % member_count], "amount": 60.0}], names[:6],
+            )
+
+    timed(results, f"create_expense x{expense_count}", new_uow, add_expenses)
+    timed(results, "get_expense_page(100)", new_uow, lambda uow: get_expense_page(uow.expenses, group_id, 100), 20)
+    timed(results, "get_group_balances", new_uow, lambda uow: get_group_balances(uow.groups, group_id), 20)
+    timed(results, "calculate_group_balance", new_uow, lambda uow: calculate_group_balance(uow.expenses, uow.groups, group_id), 5)
+    timed(
+        results, "balances + calculate_payments", new_uow,
+        lambda uow: calculate_payments(get_group_balances(uow.groups, group_id)), 20,
+    )
+    return results
+
+
+def main(member_count: int, expense_count: int):
+    backends = [("memory", memory_backend()), ("sqlite", sqlite_backend())]
+    results = {name: run(new_uow, member_count, expense_count) for name, new_uow in backends}
+
+    print(f"{'operation':<32} {'memory ms':>10} {'sqlite ms':>10} {'ratio':>7}")
+    for label in results["memory"]:
+        memory_ms = results["memory"][label] * 1000
+        sqlite_ms = results["sqlite"][label] * 1000
+        print(f"{label:<32} {memory_ms:>10.2f} {sqlite_ms:>10.2f} {sqlite_ms / memory_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [50, 1000][len(args):]))
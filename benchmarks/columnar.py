@@ -0,0 +1,76 @@
+# Group balances: the Expense loop against the expense columns
+#
+# Usage: python -m benchmarks.columnar [members] [expenses ...]
+#
+# calculate_group_balance replays Expense objects keyed by Member, while
+# calculate_group_balance_columnar sums the expense columns built by the repository
+# with NumPy. "columns only" is column_balances on columns built beforehand, the
+# share of the columnar time that is not spent fetching and building them.
+
+import sys
+from functools import partial
+from benchmarks.backends import memory_backend, sqlite_backend
+from benchmarks.generators import random_expenses
+from benchmarks.scaling import time_call
+from domain.models import Group, Member, User
+from domain.services import calculate_group_balance, calculate_group_balance_columnar, column_balances
+
+DEFAULT_EXPENSE_COUNTS = [1_000, 10_000, 100_000]
+TOLERANCE = 1e-6
+
+
+def seed(new_uow, member_count: int, expense_count: int) -> str:
+    uow = new_uow()
+    try:
+        owner = User(id=0)
+        uow.users.add(owner)
+        group = Group(id="", name="Columnar")
+        uow.groups.add(group)
+        uow.groups.add_owner(group.id, owner)
+        members = []
+        for i in range(member_count):
+            member = Member(id=0, username=f"member{i}", group_id=group.id)
+            uow.groups.add_member(group.id, member)
+            members.append(member)
+        expenses = random_expenses(members, expense_count, max_creditors=2, max_debtors=6)
+        for start in range(0, expense_count, 5000):
+            uow.expenses.add_many(expenses[start:start + 5000])
+        uow.commit()
+        return group.id
+    finally:
+        uow.close()
+
+
+def compare(new_uow, group_id: str) -> tuple[float, float, float]:
+    uow = new_uow()
+    try:
+        loop = calculate_group_balance(uow.expenses, uow.groups, group_id)
+        columnar = calculate_group_balance_columnar(uow.expenses, group_id)
+        assert all(abs(loop[member] - balance) <= TOLERANCE for member, balance in columnar.items())
+
+        columns = uow.expenses.get_expense_columns(group_id)
+        return (
+            time_call(partial(calculate_group_balance, uow.expenses, uow.groups, group_id), repeat=3),
+            time_call(partial(calculate_group_balance_columnar, uow.expenses, group_id), repeat=3),
+            time_call(partial(column_balances, columns), repeat=3),
+        )
+    finally:
+        uow.close()
+
+
+def main(member_count: int, expense_counts: list[int]):
+    print(f"{'backend':<8} {'expenses':>9} {'loop ms':>10} {'columnar ms':>12} {'speedup':>8} {'columns only ms':>16}")
+    for name, backend in (("memory", memory_backend), ("sqlite", sqlite_backend)):
+        for expense_count in expense_counts:
+            new_uow = backend()
+            group_id = seed(new_uow, member_count, expense_count)
+            loop, columnar, columns_only = compare(new_uow, group_id)
+            print(
+                f"{name:<8} {expense_count:>9} {loop * 1000:>10.2f} {columnar * 1000:>12.2f}"
+                f" {loop / columnar:>7.1f}x {columns_only * 1000:>16.3f}"
+            )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 100, args[1:] or DEFAULT_EXPENSE_COUNTS)
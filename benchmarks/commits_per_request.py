@@ -0,0 +1,93 @@
+# Commits and latency per request for the write endpoints
+#
+# Usage: python -m benchmarks.commits_per_request
+#
+# Runs against a throwaway SQLite file so every commit pays a real fsync.
+
+import os
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+
+from sqlalchemy import event
+from infrastructure.db import engine
+
+MEMBERS = [f"member{i}" for i in range(10)]
+
+
+class CommitCounter:
+    def __init__(self):
+        self.commits = 0
+
+    def __call__(self, conn):
+        self.commits += 1
+
+
+def measure(client, counter, results, label, method, url, **kwargs):
+    counter.commits = 0
+    start = time.perf_counter()
+    response = getattr(client, method)(url, **kwargs)
+    elapsed = time.perf_counter() - start
+    assert response.status_code < 400, (label, response.status_code, response.get_json())
+    results.setdefault(label, []).append((counter.commits, elapsed))
+    return response
+
+
+def main():
+    from app import create_app
+
+    client = create_app().test_client()
+    counter = CommitCounter()
+    event.listen(engine, "commit", counter)
+    results = {}
+
+    user_id = measure(client, counter, results, "POST /users", "post", "/users", json={}).get_json()["id"]
+    group_id = measure(
+        client, counter, results, "POST /groups (10 members)", "post", "/groups",
+        json={"name": "Bench", "owner_id": user_id, "members": MEMBERS},
+    ).get_json()["id"]
+
+    expense_ids = []
+    for i in range(20):
+        response = measure(
+            client, counter, results, "POST /groups/<id>/expenses", "post", f"/groups/{group_id}/expenses",
+            json={
+                "description": f"Expense {i}",
+                "price": 60.0,
+                "creditors": [{"name": MEMBERS[i % len(MEMBERS)], "amount": 60.0}],
+                "debtors": MEMBERS[:6],
+            },
+        )
+        expense_ids.append(response.get_json()["id"])
+
+    for expense_id in expense_ids[:10]:
+        measure(
+            client, counter, results, "PUT /expenses/<id>", "put", f"/expenses/{expense_id}",
+            json={
+                "description": "Updated",
+                "price": 30.0,
+                "creditors": [{"name": MEMBERS[0], "amount": 30.0}],
+                "debtors": MEMBERS[:3],
+            },
+        )
+
+    for i in range(10):
+        measure(client, counter, results, "POST /groups/<id>/members", "post", f"/groups/{group_id}/members", json={"username": f"extra{i}"})
+        measure(client, counter, results, "DELETE /groups/<id>/members/<name>", "delete", f"/groups/{group_id}/members/extra{i}")
+
+    for _ in range(10):
+        measure(client, counter, results, "GET /groups/<id>/summary", "get", f"/groups/{group_id}/summary")
+
+    event.remove(engine, "commit", counter)
+
+    print(f"{'endpoint':<36} {'requests':>8} {'commits/req':>12} {'ms/req':>8}")
+    for label, samples in results.items():
+        commits = sum(c for c, _ in samples) / len(samples)
+        ms = sum(t for _, t in samples) / len(samples) * 1000
+        print(f"{label:<36} {len(samples):>8} {commits:>12.1f} {ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
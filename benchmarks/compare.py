@@ -0,0 +1,61 @@
+# Compare two endpoint benchmark runs
+#
+# Usage: python -m benchmarks.compare <base.json> <head.json> [--threshold 1.25] [--min-ms 1.0]
+#
+# Exits with status 1 when a route issues more queries than before, or its p95
+# latency grows by more than the threshold factor and by more than min-ms.
+
+import argparse
+import json
+import sys
+
+
+def compare(base: dict, head: dict, threshold: float, min_ms: float) -> list[str]:
+    regressions = []
+    print(f"{'size':<8} {'route':<48} {'p95 base':>9} {'p95 head':>9} {'ratio':>7} {'queries':>12}")
+    for size, head_size in head["sizes"].items():
+        base_routes = base["sizes"].get(size, {}).get("routes", {})
+        for name, new in head_size["routes"].items():
+            old = base_routes.get(name)
+            if old is None:
+                continue
+            ratio = new["p95_ms"] / old["p95_ms"] if old["p95_ms"] else float("inf")
+            slower = ratio > threshold and new["p95_ms"] - old["p95_ms"] > min_ms
+            more_queries = new["queries"] > old["queries"]
+            flag = " <-" if slower or more_queries else ""
+            print(
+                f"{size:<8} {name:<48} {old['p95_ms']:>9.2f} {new['p95_ms']:>9.2f} {ratio:>6.2f}x "
+                f"{old['queries']:>4} -> {new['queries']:<4}{flag}"
+            )
+            if slower:
+                regressions.append(f"{size} {name}: p95 {old['p95_ms']:.2f} ms -> {new['p95_ms']:.2f} ms")
+            if more_queries:
+                regressions.append(f"{size} {name}: {old['queries']} -> {new['queries']} queries")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two endpoint benchmark runs")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--min-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"{base['commit']} -> {head['commit']}")
+    regressions = compare(base, head, args.threshold, args.min_ms)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# Endpoint benchmark fixtures
+#
+# Usage: python -m pytest benchmarks [--bench-sizes small,medium,large] [--bench-iterations 20]
+#
+# Run apart from the tests, which point the app at another database.
+
+import os
+import tempfile
+
+# A file database with the production pragmas, set before config is imported.
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("DB_ENGINE_PROFILE", "production-sqlite")
+
+import json
+import platform
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+import pytest
+from benchmarks.generators import random_expenses
+from domain.models import Group, Member, User
+from infrastructure.db import engine
+from infrastructure.db.models import Base
+from infrastructure.db.unit_of_work import SQLAlchemyUnitOfWork
+
+# name -> (members, expenses)
+SIZES = {
+    "small": (10, 100),
+    "medium": (100, 10_000),
+    "large": (1_000, 100_000),
+}
+SEED_BATCH_SIZE = 5_000
+RESULTS_DIR = Path(__file__).parent / "results"
+
+results_key = pytest.StashKey[dict]()
+output_key = pytest.StashKey[Path]()
+
+
+@dataclass
+class SeededGroup:
+    client: object
+    app: object
+    size: str
+    group_id: str
+    owner_id: int
+    usernames: list[str]
+    expense_ids: list[int]
+    state: dict = field(default_factory=dict)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-sizes", default="small,medium", help=f"comma separated group sizes out of {', '.join(SIZES)}")
+    group.addoption("--bench-iterations", type=int, default=20, help="timed requests per route")
+    group.addoption("--bench-output", default=None, help="results file, benchmarks/results/<commit>.json by default")
+
+
+def pytest_configure(config):
+    config.stash[results_key] = {}
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        sizes = [size.strip() for size in metafunc.config.getoption("--bench-sizes").split(",")]
+        unknown = [size for size in sizes if size not in SIZES]
+        if unknown:
+            raise pytest.UsageError(f"Unknown benchmark sizes: {', '.join(unknown)}")
+        metafunc.parametrize("size", sizes, scope="module")
+
+
+def seed_group(member_count: int, expense_count: int, seed: int = 0) -> tuple[str, int, list[str], list[int]]:
+    """
+    Writes one group with its owner, members and random expenses straight through the repositories.
+    """
+    usernames = [f"member{i}" for i in range(member_count)]
+    uow = SQLAlchemyUnitOfWork()
+    try:
+        owner = User(id=0)
+        uow.users.add(owner)
+        group = Group(id="", name=f"Bench {member_count}")
+        uow.groups.add(group)
+        uow.groups.add_owner(group.id, owner)
+        members = []
+        for username in usernames:
+            member = Member(id=0, username=username, group_id=group.id)
+            uow.groups.add_member(group.id, member)
+            members.append(member)
+
+        expenses = random_expenses(members, expense_count, seed)
+        for start in range(0, expense_count, SEED_BATCH_SIZE):
+            uow.expenses.add_many(expenses[start:start + SEED_BATCH_SIZE])
+        uow.commit()
+        return group.id, owner.id, usernames, [expense.id for expense in expenses]
+    finally:
+        uow.close()
+
+
+@pytest.fixture(scope="module")
+def seeded(size):
+    Base.metadata.drop_all(engine)
+    from app import create_app
+    app = create_app()
+    member_count, expense_count = SIZES[size]
+    group_id, owner_id, usernames, expense_ids = seed_group(member_count, expense_count)
+    return SeededGroup(app.test_client(), app, size, group_id, owner_id, usernames, expense_ids)
+
+
+@pytest.fixture
+def bench_results(request):
+    return request.config.stash[results_key]
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _commit() -> str:
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    if _git("status", "--porcelain", "--untracked-files=no"):
+        commit += "-dirty"
+    return commit
+
+
+def pytest_sessionfinish(session):
+    results = session.config.stash.get(results_key, None)
+    if not results:
+        return
+    commit = _commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": "sqlite",
+        "iterations": session.config.getoption("--bench-iterations"),
+        "sizes": {
+            size: {"members": SIZES[size][0], "expenses": SIZES[size][1], "routes": routes}
+            for size, routes in results.items()
+        },
+    }
+    output = session.config.getoption("--bench-output")
+    path = Path(output) if output else RESULTS_DIR / f"{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    session.config.stash[output_key] = path
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash.get(results_key, {})
+    for size, routes in results.items():
+        terminalreporter.write_sep("-", f"{size}: {SIZES[size][0]} members, {SIZES[size][1]} expenses")
+        terminalreporter.write_line(f"{'route':<48} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KiB':>9}")
+        for name, stats in routes.items():
+            terminalreporter.write_line(
+                f"{name:<48} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                f"{stats['queries']:>8} {stats['peak_kib']:>9.1f}"
+            )
+    if output_key in config.stash:
+        terminalreporter.write_line(f"Results written to {config.stash[output_key]}")
@@ -0,0 +1,137 @@
+# Read and write throughput of each engine profile under concurrent workers
+#
+# Usage: python -m benchmarks.engine_profiles [--seconds N] [--readers N] [--writers N] [--postgres-url URL]
+#
+# Every worker is a separate process with its own engine, like gunicorn workers.
+# Readers load the group balances and the first page of expenses, writers add
+# one expense per transaction. Each SQLite profile gets a fresh database file.
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/default.db")
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from domain.models import Expense, Group, Member, User
+from infrastructure.db.models import Base
+from infrastructure.db.profiles import create_profiled_engine
+from infrastructure.db.unit_of_work import SQLAlchemyUnitOfWork
+
+MEMBERS = 20
+SEED_EXPENSES = 500
+
+
+def seed(url: str, profile: str) -> str:
+    engine = create_profiled_engine(url, profile)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    uow = SQLAlchemyUnitOfWork(sessionmaker(bind=engine))
+    try:
+        owner = User(id=0)
+        uow.users.add(owner)
+        group = Group(id="", name="Bench")
+        uow.groups.add(group)
+        uow.groups.add_owner(group.id, owner)
+        for i in range(MEMBERS):
+            uow.groups.add_member(group.id, Member(id=0, username=f"member{i}", group_id=group.id))
+        members = uow.groups.get_members(group.id)
+        uow.expenses.add_many([new_expense(group.id, members, i) for i in range(SEED_EXPENSES)])
+        uow.commit()
+    finally:
+        uow.close()
+        engine.dispose()
+    return group.id
+
+
+def new_expense(group_id: str, members: list[Member], i: int) -> Expense:
+    return Expense(
+        id=0,
+        description=f"Expense {i}",
+        total_amount=60.0,
+        group_id=group_id,
+        creditors=[(members[i % len(members)], 60.0)],
+        debtors=members[:6],
+    )
+
+
+def worker(url: str, profile: str, role: str, group_id: str, seconds: float, results) -> None:
+    engine = create_profiled_engine(url, profile)
+    session_factory = sessionmaker(bind=engine)
+    done = errors = 0
+    i = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        uow = SQLAlchemyUnitOfWork(session_factory)
+        try:
+            if role == "read":
+                uow.groups.get_balances(group_id)
+                uow.expenses.list_by_group(group_id, limit=50)
+                uow.rollback()
+            else:
+                members = uow.groups.get_members(group_id)
+                uow.expenses.add(new_expense(group_id, members, i))
+                uow.commit()
+            done += 1
+        except OperationalError:
+            # "database is locked" once busy_timeout runs out
+            uow.rollback()
+            errors += 1
+        finally:
+            uow.close()
+        i += 1
+    engine.dispose()
+    results.put((role, done, errors))
+
+
+def run_profile(url: str, profile: str, readers: int, writers: int, seconds: float) -> dict:
+    group_id = seed(url, profile)
+    results = multiprocessing.Queue()
+    roles = ["read"] * readers + ["write"] * writers
+    processes = [
+        multiprocessing.Process(target=worker, args=(url, profile, role, group_id, seconds, results))
+        for role in roles
+    ]
+    for process in processes:
+        process.start()
+    totals = {"read": [0, 0], "write": [0, 0]}
+    for _ in processes:
+        role, done, errors = results.get()
+        totals[role][0] += done
+        totals[role][1] += errors
+    for process in processes:
+        process.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--postgres-url", default=None)
+    args = parser.parse_args()
+
+    targets = [
+        ("dev", f"sqlite:///{_db_dir}/dev.db"),
+        ("production-sqlite", f"sqlite:///{_db_dir}/production-sqlite.db"),
+    ]
+    if args.postgres_url:
+        targets.append(("production-postgres", args.postgres_url))
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per profile")
+    print(f"{'profile':<22} {'reads/s':>9} {'writes/s':>9} {'read errors':>12} {'write errors':>13}")
+    for profile, url in targets:
+        totals = run_profile(url, profile, args.readers, args.writers, args.seconds)
+        print(
+            f"{profile:<22} {totals['read'][0] / args.seconds:>9.0f} {totals['write'][0] / args.seconds:>9.0f}"
+            f" {totals['read'][1]:>12} {totals['write'][1]:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Seeded random inputs for the benchmarks
+#
+# The same seed always gives the same data, so runs on different commits are comparable.
+
+import random
+from domain.models import Expense, Member
+
+
+def random_members(size: int, group_id: str = "bench") -> list[Member]:
+    return [Member(id=i + 1, username=f"member{i}", group_id=group_id) for i in range(size)]
+
+
+def random_balances(size: int, seed: int = 0, rounded: bool = False) -> dict[Member, float]:
+    """
+    Balances of a group that sum to zero. Uniform at cent precision by default, where
+    exact cancellations are rare, or in multiples of 5.00, closer to real bills.
+    """
+    rng = random.Random(seed)
+    members = random_members(size)
+    if rounded:
+        amounts = [rng.randint(-100, 100) * 5.0 for _ in range(size - 1)]
+    else:
+        amounts = [round(rng.uniform(-500, 500), 2) for _ in range(size - 1)]
+    amounts.append(-sum(amounts))
+    return dict(zip(members, amounts))
+
+
+def random_expenses(
+    members: list[Member],
+    count: int,
+    seed: int = 0,
+    max_creditors: int = 1,
+    max_debtors: int = 4,
+) -> list[Expense]:
+    """
+    Unsaved expenses between the given members. Each has up to max_creditors creditors
+    splitting its total and up to max_debtors debtors, all picked at random.
+    """
+    rng = random.Random(seed)
+    expenses = []
+    for i in range(count):
+        total_amount = round(rng.uniform(1, 200), 2)
+        creditors = rng.sample(members, rng.randint(1, min(max_creditors, len(members))))
+        shares = [round(total_amount / len(creditors), 2)] * len(creditors)
+        shares[-1] = round(total_amount - sum(shares[:-1]), 2)
+        expenses.append(Expense(
+            id=0, description=f"Expense {i}", total_amount=total_amount, group_id=members[0].group_id,
+            creditors=list(zip(creditors, shares)),
+            debtors=rng.sample(members, rng.randint(1, min(max_debtors, len(members)))),
+        ))
+    return expenses
+
+
+def random_expense_payload(members: list[Member], creditor_count: int, debtor_count: int, seed: int = 0) -> tuple[list[dict], list[str]]:
+    """
+    Creditors and debtor names of one expense, as they come in a request body.
+    """
+    rng = random.Random(seed)
+    creditors = [
+        {"name": member.username, "amount": round(rng.uniform(1, 200), 2)}
+        for member in rng.choices(members, k=creditor_count)
+    ]
+    debtors = [member.username for member in rng.choices(members, k=debtor_count)]
+    return creditors, debtors
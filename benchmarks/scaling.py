@@ -0,0 +1,147 @@
+# Empirical growth of the domain algorithms
+#
+# Usage: python -m benchmarks.scaling
+#
+# Each case is timed at growing input sizes and a power law t = c * n^k is fitted
+# to the timings. A case fails when k exceeds its declared bound, which catches an
+# accidental quadratic long before it shows up in production latency. Bounds leave
+# room above the ideal exponent for cache effects and a noisy machine.
+
+import math
+import sys
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+from benchmarks.generators import random_balances, random_expense_payload, random_expenses, random_members
+from domain.models import Group, Member, User
+from domain.services import _map_and_validate_members, calculate_group_balance, calculate_group_balance_columnar, calculate_payments
+from infrastructure.memory.repository import MemoryStore
+from infrastructure.memory.unit_of_work import InMemoryUnitOfWork
+
+
+@dataclass
+class ScalingCase:
+    name: str
+    # (size, seed) -> the call to time, built outside the timings
+    setup: Callable[[int, int], Callable[[], object]]
+    sizes: list[int]
+    max_exponent: float
+
+
+def time_call(call: Callable[[], object], repeat: int = 5, min_time: float = 0.02) -> float:
+    """
+    Best time of one call over repeat rounds, each long enough to rise above the clock resolution.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def fit_exponent(points: list[tuple[int, float]]) -> float:
+    # Least squares slope of log(time) over log(size)
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    return (
+        sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+        / sum((x - x_mean) ** 2 for x in xs)
+    )
+
+
+def measure(case: ScalingCase, seed: int = 0) -> list[tuple[int, float]]:
+    return [(size, time_call(case.setup(size, seed))) for size in case.sizes]
+
+
+def group_balance_setup(member_count: int, expense_count: int, seed: int, columnar: bool = False) -> Callable[[], object]:
+    # Replays expense_count expenses of one group held by the in-memory backend
+    uow = InMemoryUnitOfWork(MemoryStore())
+    owner = User(id=0)
+    uow.users.add(owner)
+    group = Group(id="", name="Scaling")
+    uow.groups.add(group)
+    uow.groups.add_owner(group.id, owner)
+    members = []
+    for i in range(member_count):
+        member = Member(id=0, username=f"member{i}", group_id=group.id)
+        uow.groups.add_member(group.id, member)
+        members.append(member)
+    uow.expenses.add_many(random_expenses(members, expense_count, seed, max_creditors=2))
+    uow.commit()
+    if columnar:
+        return partial(calculate_group_balance_columnar, uow.expenses, group.id)
+    return partial(calculate_group_balance, uow.expenses, uow.groups, group.id)
+
+
+def map_members_setup(size: int, seed: int) -> Callable[[], object]:
+    # A group of size members, and an expense naming as many debtors and a tenth as many creditors
+    members = random_members(size)
+    group = Group(id="bench", name="Scaling", members=members)
+    creditors, debtors = random_expense_payload(members, max(size // 10, 1), size, seed)
+    return partial(_map_and_validate_members, group, creditors, debtors)
+
+
+CASES = [
+    ScalingCase(
+        "calculate_group_balance",
+        lambda size, seed: group_balance_setup(50, size, seed),
+        [1_000, 2_000, 4_000, 8_000, 16_000],
+        max_exponent=1.4,
+    ),
+    ScalingCase(
+        "calculate_group_balance_columnar",
+        lambda size, seed: group_balance_setup(50, size, seed, columnar=True),
+        [1_000, 2_000, 4_000, 8_000, 16_000],
+        max_exponent=1.4,
+    ),
+    ScalingCase(
+        "calculate_payments[heap]",
+        lambda size, seed: partial(calculate_payments, random_balances(size, seed), "heap"),
+        [500, 1_000, 2_000, 4_000, 8_000],
+        max_exponent=1.5,
+    ),
+    # The list solver keeps its creditors and debtors sorted by insertion, quadratic by design
+    ScalingCase(
+        "calculate_payments[list]",
+        lambda size, seed: partial(calculate_payments, random_balances(size, seed), "list"),
+        [500, 1_000, 2_000, 4_000, 8_000],
+        max_exponent=2.2,
+    ),
+    ScalingCase(
+        "_map_and_validate_members",
+        map_members_setup,
+        [1_000, 2_000, 4_000, 8_000, 16_000],
+        max_exponent=1.4,
+    ),
+]
+
+
+def main(seed: int = 0) -> int:
+    failed = []
+    for case in CASES:
+        points = measure(case, seed)
+        exponent = fit_exponent(points)
+        status = "ok" if exponent <= case.max_exponent else "FAIL"
+        timings = " ".join(f"{size}:{seconds * 1000:.2f}ms" for size, seconds in points)
+        print(f"{case.name:<34} k={exponent:.2f} (bound {case.max_exponent}) {status}  {timings}")
+        if status == "FAIL":
+            failed.append(case.name)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:2])))
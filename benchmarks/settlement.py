@@ -0,0 +1,42 @@
+# Settlement solver benchmark
+#
+# Usage: python -m benchmarks.settlement [size ...]
+#
+# Balances are drawn twice: uniformly at cent precision, where exact cancellations
+# are rare, and in multiples of 5.00, closer to real bills, where they are common.
+
+import sys
+import time
+from benchmarks.generators import random_balances
+from domain.models import Member
+from domain.services import calculate_payments, SETTLEMENT_SOLVERS
+
+DEFAULT_SIZES = [10, 100, 500, 1000, 5000, 10000]
+
+
+def time_solver(balances: dict[Member, float], solver: str, repeat: int = 3) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payments = calculate_payments(balances, solver=solver)
+        best = min(best, time.perf_counter() - start)
+    return best, len(payments)
+
+
+def main(sizes: list[int]):
+    solvers = sorted(SETTLEMENT_SOLVERS)
+    for rounded in (False, True):
+        print("balances in multiples of 5.00" if rounded else "balances at cent precision")
+        print(f"{'members':>8} " + " ".join(f"{solver + ' ms':>18} {'transfers':>9}" for solver in solvers))
+        for size in sizes:
+            balances = random_balances(size, rounded=rounded)
+            cells = []
+            for solver in solvers:
+                seconds, transfers = time_solver(balances, solver)
+                cells.append(f"{seconds * 1000:>18.2f} {transfers:>9}")
+            print(f"{size:>8} " + " ".join(cells))
+        print()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
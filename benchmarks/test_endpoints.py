@@ -0,0 +1,190 @@
+# Latency, queries and peak memory of every API route on seeded groups
+
+import itertools
+import math
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+import pytest
+from sqlalchemy import event
+from infrastructure.db import engine
+
+# Routes that read or write the whole group are timed fewer times
+HEAVY_ITERATIONS = 5
+
+# Every request comes from a new address, so the rate limits never kick in
+_addresses = itertools.count(1)
+
+
+def _remote_addr() -> str:
+    n = next(_addresses)
+    return f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+
+
+def call(ctx, method: str, path: str, **kwargs):
+    response = ctx.client.open(path, method=method, environ_base={"REMOTE_ADDR": _remote_addr()}, **kwargs)
+    # Streamed bodies are generated while they are read
+    response.get_data()
+    assert response.status_code < 400, f"{method} {path} -> {response.status_code}: {response.get_data(as_text=True)[:200]}"
+    return response
+
+
+@dataclass
+class Route:
+    name: str
+    # (seeded group, iteration) -> (method, path, client kwargs), may make untimed requests first
+    build: Callable
+    heavy: bool = False
+
+
+def expense_payload(ctx, description="Dinner"):
+    return {
+        "description": description,
+        "price": 60.0,
+        "creditors": [{"name": ctx.usernames[0], "amount": 60.0}],
+        "debtors": ctx.usernames[:4],
+    }
+
+
+def new_user(ctx) -> int:
+    return call(ctx, "POST", "/users", json={}).json["id"]
+
+
+def new_expense(ctx) -> int:
+    return call(ctx, "POST", f"/groups/{ctx.group_id}/expenses", json=expense_payload(ctx)).json["id"]
+
+
+def new_member(ctx, username: str) -> str:
+    call(ctx, "POST", f"/groups/{ctx.group_id}/members", json={"username": username})
+    return username
+
+
+def second_page_cursor(ctx) -> str:
+    if "cursor" not in ctx.state:
+        page = call(ctx, "GET", f"/groups/{ctx.group_id}/expenses?limit=100").json
+        ctx.state["cursor"] = page["next_cursor"] or ""
+    return ctx.state["cursor"]
+
+
+def summary_etag(ctx) -> str:
+    return call(ctx, "GET", f"/groups/{ctx.group_id}/summary").headers["ETag"]
+
+
+def cold_summary(ctx):
+    ctx.app.extensions["summary_cache"].clear()
+    return "GET", f"/groups/{ctx.group_id}/summary", {}
+
+
+ROUTES = [
+    Route("POST /users", lambda ctx, i: ("POST", "/users", {"json": {}})),
+    Route("GET /users/<id>", lambda ctx, i: ("GET", f"/users/{ctx.owner_id}", {})),
+    Route("POST /groups", lambda ctx, i: ("POST", "/groups", {"json": {
+        "name": f"Group {i}", "owner_id": ctx.owner_id, "members": ctx.usernames[:10]
+    }})),
+    Route("POST /groups/<id>/join", lambda ctx, i: (
+        "POST", f"/groups/{ctx.group_id}/join", {"json": {"user_id": new_user(ctx)}}
+    )),
+    Route("GET /groups", lambda ctx, i: ("GET", f"/groups?owner_id={ctx.owner_id}", {})),
+    Route("GET /groups?view=summary", lambda ctx, i: ("GET", f"/groups?owner_id={ctx.owner_id}&view=summary", {})),
+    Route("GET /groups/<id>", lambda ctx, i: ("GET", f"/groups/{ctx.group_id}?owner_id={ctx.owner_id}", {})),
+    Route("GET /groups/<id>/expenses", lambda ctx, i: ("GET", f"/groups/{ctx.group_id}/expenses", {}), heavy=True),
+    Route("GET /groups/<id>/expenses?limit=100", lambda ctx, i: (
+        "GET", f"/groups/{ctx.group_id}/expenses?limit=100", {}
+    )),
+    Route("GET /groups/<id>/expenses?cursor", lambda ctx, i: (
+        "GET", f"/groups/{ctx.group_id}/expenses?limit=100&cursor={second_page_cursor(ctx)}", {}
+    )),
+    Route("GET /groups/<id>/expenses/export?format=csv", lambda ctx, i: (
+        "GET", f"/groups/{ctx.group_id}/expenses/export?format=csv", {}
+    ), heavy=True),
+    Route("GET /groups/<id>/expenses/export?format=ndjson", lambda ctx, i: (
+        "GET", f"/groups/{ctx.group_id}/expenses/export?format=ndjson", {}
+    ), heavy=True),
+    Route("POST /groups/<id>/expenses", lambda ctx, i: (
+        "POST", f"/groups/{ctx.group_id}/expenses", {"json": expense_payload(ctx)}
+    )),
+    Route("POST /groups/<id>/expenses/import", lambda ctx, i: (
+        "POST", f"/groups/{ctx.group_id}/expenses/import",
+        {"json": [expense_payload(ctx, f"Import {n}") for n in range(100)]}
+    )),
+    Route("PUT /expenses/<id>", lambda ctx, i: (
+        "PUT", f"/expenses/{ctx.expense_ids[i % len(ctx.expense_ids)]}", {"json": expense_payload(ctx, "Updated")}
+    )),
+    Route("DELETE /expenses/<id>", lambda ctx, i: ("DELETE", f"/expenses/{new_expense(ctx)}", {})),
+    Route("POST /groups/<id>/members", lambda ctx, i: (
+        "POST", f"/groups/{ctx.group_id}/members", {"json": {"username": f"added{i}"}}
+    )),
+    Route("GET /groups/<id>/members", lambda ctx, i: ("GET", f"/groups/{ctx.group_id}/members", {})),
+    Route("PUT /groups/<id>/members/<name>", lambda ctx, i: (
+        "PUT", f"/groups/{ctx.group_id}/members/{new_member(ctx, f'old{i}')}", {"json": {"new_name": f"renamed{i}"}}
+    )),
+    Route("DELETE /groups/<id>/members/<name>", lambda ctx, i: (
+        "DELETE", f"/groups/{ctx.group_id}/members/{new_member(ctx, f'gone{i}')}", {}
+    )),
+    Route("GET /groups/<id>/summary", lambda ctx, i: ("GET", f"/groups/{ctx.group_id}/summary", {})),
+    Route("GET /groups/<id>/summary (cold)", lambda ctx, i: cold_summary(ctx)),
+    Route("GET /groups/<id>/summary (304)", lambda ctx, i: (
+        "GET", f"/groups/{ctx.group_id}/summary", {"headers": {"If-None-Match": summary_etag(ctx)}}
+    )),
+    Route("GET /stats/cache", lambda ctx, i: ("GET", "/stats/cache", {})),
+]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def measure(ctx, route: Route, iterations: int) -> dict:
+    counter = QueryCounter()
+    timings, queries = [], []
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        # The last round is traced for peak memory and left out of the timings
+        for i in range(iterations + 1):
+            method, path, kwargs = route.build(ctx, i)
+            traced = i == iterations
+            if traced:
+                tracemalloc.start()
+            counter.count = 0
+            start = time.perf_counter()
+            response = call(ctx, method, path, **kwargs)
+            elapsed = time.perf_counter() - start
+            if traced:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            else:
+                timings.append(elapsed)
+                queries.append(counter.count)
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+    return {
+        "status": response.status_code,
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "queries": max(queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+@pytest.mark.parametrize("route", ROUTES, ids=[route.name for route in ROUTES])
+def test_endpoint(seeded, route, bench_results, pytestconfig):
+    iterations = pytestconfig.getoption("--bench-iterations")
+    if route.heavy:
+        iterations = min(iterations, HEAVY_ITERATIONS)
+
+    stats = measure(seeded, route, iterations)
+    bench_results.setdefault(seeded.size, {})[route.name] = stats
@@ -0,0 +1,28 @@
+# Growth exponent of the domain algorithms stays within its declared bound
+
+import pytest
+from benchmarks.scaling import CASES, ScalingCase, fit_exponent, measure
+
+
+def quadratic(size: int):
+    return sum(i * j for i in range(size) for j in range(size))
+
+
+# Test 1: The fit recovers the exponent of an exact power law
+@pytest.mark.parametrize("exponent", [1.0, 1.5, 2.0])
+def test_fit_exponent(exponent):
+    points = [(size, 3e-6 * size ** exponent) for size in (100, 200, 400, 800)]
+    assert fit_exponent(points) == pytest.approx(exponent)
+
+# Test 2: A quadratic function is told apart from a linear one
+def test_quadratic_detected():
+    case = ScalingCase("quadratic", lambda size, seed: lambda: quadratic(size), [100, 200, 400, 800], max_exponent=1.4)
+    assert fit_exponent(measure(case)) > case.max_exponent
+
+# Test 3: Every case grows no faster than its bound
+@pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+def test_scaling(case):
+    points = measure(case)
+    exponent = fit_exponent(points)
+    timings = ", ".join(f"{size}: {seconds * 1000:.2f} ms" for size, seconds in points)
+    assert exponent <= case.max_exponent, f"{case.name} grows as n^{exponent:.2f} ({timings})"
@@ -4,8 +4,23 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# DATABASE_URL selecting the in-memory backend instead of a SQL database
+MEMORY_DATABASE_URL = "memory://"
+
+def is_memory_url(database_url: str) -> bool:
+    return database_url == MEMORY_DATABASE_URL
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///./splitred.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "false").lower() == "true"  # log every statement
+    DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "dev")  # dev, production-sqlite or production-postgres
     MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # 2 MB
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
+    SETTLEMENT_TIME_BUDGET = float(os.getenv("SETTLEMENT_TIME_BUDGET", "0.05"))  # CPU seconds of the request thread per summary
+    SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1024"))  # cached summaries per worker
+    GROUP_CACHE_SIZE = int(os.getenv("GROUP_CACHE_SIZE", "1024"))  # cached groups per worker
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))  # share of requests traced, 0 turns tracing off
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")  # traces are appended here as JSON lines
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "250"))  # statements this slow are logged, 0 turns the log off
+    SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")  # rotated at 5 MB, three backups kept
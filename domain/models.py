@@ -2,6 +2,7 @@
 
 from dataclasses import dataclass, field
 from typing import List
+import numpy as np
 
 @dataclass
 class User:
@@ -32,6 +33,12 @@ class Group:
     owners: List[User] = field(default_factory=list)
     members: List[Member] = field(default_factory=list)
 
+@dataclass
+class GroupSummary:
+    id: str
+    name: str
+    member_count: int
+
 @dataclass
 class Expense:
     id: int
@@ -39,4 +46,20 @@ class Expense:
     total_amount: float
     group_id: str
     creditors: List[tuple[Member, float]] = field(default_factory=list)
-    debtors: List[Member] = field(default_factory=list)
\ No newline at end of file
+    debtors: List[Member] = field(default_factory=list)
+
+@dataclass
+class ExpenseColumns:
+    """
+    The expenses of a group as flat arrays, for computations over the whole group.
+    Participants are indexes into members. The creditors of expense i are
+    creditor_indices[creditor_offsets[i]:creditor_offsets[i + 1]], likewise for debtors.
+    """
+    members: List[Member]
+    expense_ids: np.ndarray       # int64, ascending
+    total_amounts: np.ndarray     # float64, one per expense
+    creditor_offsets: np.ndarray  # int64, one more than expenses
+    creditor_indices: np.ndarray  # int64 member indexes
+    creditor_amounts: np.ndarray  # float64, one per creditor
+    debtor_offsets: np.ndarray    # int64, one more than expenses
+    debtor_indices: np.ndarray    # int64 member indexes
@@ -1,14 +1,27 @@
 # Use Cases
-from domain.models import User, Group, Expense, Member
+import heapq
+import time
+from itertools import combinations, count
+from typing import Iterable, Iterator
+import numpy as np
+from domain.models import User, Group, GroupSummary, Expense, ExpenseColumns, Member
 from application.ports import UserRepository, GroupRepository, ExpenseRepository, MemberRepository
+from application.tracing import traced
+
+# CPU seconds the min_transfers solver may spend searching for cancelling subsets
+MIN_TRANSFERS_TIME_BUDGET = 0.05
+# Combinations the min_transfers search looks at between two reads of the clock
+DEADLINE_CHECK_STEPS = 256
 
 # USERS
 
+@traced()
 def create_user(user_repo: UserRepository) -> User:
     new_user = User(id=0)
     user_repo.add(new_user)
     return new_user
 
+@traced()
 def get_user_by_id(user_repo: UserRepository, user_id: int) -> User:
     user = user_repo.get_by_id(user_id)
     if not user:
@@ -17,98 +30,141 @@ def get_user_by_id(user_repo: UserRepository, user_id: int) -> User:
 
 # MEMBERS
 
+@traced()
 def create_member(member_repo: MemberRepository, group_repo: GroupRepository, username: str, group_id: str) -> Member | None:
-    group = get_group_by_id(group_repo, group_id)
+    ensure_group_exists(group_repo, group_id)
 
-    if username in [m.username for m in group.members]:
+    if group_repo.has_member_username(group_id, username):
         raise ValueError("A member with the new name already exists in the group")
 
     new_member = Member(id=0, username=username, group_id=group_id)
     member_repo.add(new_member, group_id)
     return new_member
 
+@traced()
 def get_member_by_id(member_repo: MemberRepository, member_id: int, group_id: str) -> Member:
     member = member_repo.get_by_id(member_id, group_id)
     if not member:
         raise ValueError("Member not found")
     return member
 
+@traced()
 def get_member_by_username_and_group(group_repo: GroupRepository, member_username: str, group_id: str) -> Member | None:
-    group_members = group_repo.get_members(group_id)
-    for m in group_members:
-        if m.username == member_username:
-            return m
-    return None
+    return group_repo.get_member_by_username(group_id, member_username)
 
+@traced()
 def edit_member_name_in_group(group_repo: GroupRepository, group_id: str, old_name: str, new_name: str):
-    group = get_group_by_id(group_repo, group_id)
-    updatable = False
-    for m in group.members:
-        if old_name == m.username:
-            updatable = True
-        if new_name == m.username:
-            raise ValueError("A member with the new name already exists in the group")
-
-    if updatable:
-        group_repo.update_member_name(group_id, old_name, new_name)
-    else:
+    ensure_group_exists(group_repo, group_id)
+
+    if group_repo.has_member_username(group_id, new_name):
+        raise ValueError("A member with the new name already exists in the group")
+    if not group_repo.has_member_username(group_id, old_name):
         raise ValueError("Member not found")
 
+    group_repo.update_member_name(group_id, old_name, new_name)
+
 # GROUPS
 
+@traced()
 def get_group_by_id(group_repo: GroupRepository, group_id: str) -> Group:
     group = group_repo.get_by_id(group_id)
     if not group:
         raise ValueError("Group not found")
     return group
 
+@traced()
+def ensure_group_exists(group_repo: GroupRepository, group_id: str) -> None:
+    if not group_repo.exists(group_id):
+        raise ValueError("Group not found")
+
+@traced()
+def get_group_version(group_repo: GroupRepository, group_id: str) -> int:
+    version = group_repo.get_version(group_id)
+    if version is None:
+        raise ValueError("Group not found")
+    return version
+
+@traced()
 def get_groups_by_owner_id(group_repo: GroupRepository, owner_id: str | None) -> list[Group]:
     if owner_id:
         groups = group_repo.get_groups_by_owner_id(owner_id)
         return groups
     return []
 
+@traced()
+def get_group_summaries_by_owner_id(group_repo: GroupRepository, owner_id: str | None) -> list[GroupSummary]:
+    if owner_id:
+        return group_repo.get_group_summaries_by_owner_id(owner_id)
+    return []
+
+@traced()
 def create_group(group_repo: GroupRepository, name: str, owner: User) -> Group:
     group = Group(id="", name=name, owners=[owner])
     group_repo.add(group)
     group_repo.add_owner(group.id, owner)
     return group
 
+@traced()
 def add_owner_to_group(group_repo: GroupRepository, group_id: str, owner: User):
     group = get_group_by_id(group_repo, group_id)
     if owner in group.owners:
         raise ValueError("You are already in the group")
     group_repo.add_owner(group_id, owner)
 
+@traced()
 def add_member_to_group(group_repo: GroupRepository, group_id: str, member: Member):
-    group = get_group_by_id(group_repo, group_id)
-    for m in group.members:
-        if member.username == m.username:
-            raise ValueError("Member is already in the group")
+    ensure_group_exists(group_repo, group_id)
+    if group_repo.has_member_username(group_id, member.username):
+        raise ValueError("Member is already in the group")
     group_repo.add_member(group_id, member)
 
+@traced()
 def get_members_by_group_id(group_repo: GroupRepository, group_id: str) -> list[Member]:
     return group_repo.get_members(group_id)
 
+@traced()
 def remove_member_from_group(group_repo: GroupRepository, expense_repo: ExpenseRepository, group_id: str, member: Member):
-    group = get_group_by_id(group_repo, group_id)
-    if member not in group.members:
+    ensure_group_exists(group_repo, group_id)
+    found = group_repo.get_member_by_username(group_id, member.username)
+    if found is None or found.id != member.id:
         raise ValueError("Member is not in the group")
-    expenses = expense_repo.list_by_group(group_id)
-    for expense in expenses:
-        for creditor, amount in expense.creditors:
-            if member is creditor:
-                raise ValueError("Member is in an expense of the group")
-        if member in expense.debtors:
-            raise ValueError("Member is in an expense of the group")
+    if expense_repo.member_has_expenses(member.id):
+        raise ValueError("Member is in an expense of the group")
     group_repo.remove_member(group_id, member)
 
 
 # EXPENSES
 
+@traced()
 def get_expenses_by_group_id(expenses_repo: ExpenseRepository, group_id: str) -> list[Expense]:
     return expenses_repo.list_by_group(group_id)
 
+@traced()
+def iter_expenses_by_group_id(expenses_repo: ExpenseRepository, group_id: str) -> Iterator[Expense]:
+    return expenses_repo.iter_by_group(group_id)
+
+@traced()
+def get_expense_page(
+    expenses_repo: ExpenseRepository,
+    group_id: str,
+    limit: int,
+    cursor: str | None = None
+) -> tuple[list[Expense], str | None]: # (page, next cursor)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    try:
+        after_id = int(cursor) if cursor else None
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+    # Fetch one extra row to know whether another page follows
+    expenses = expenses_repo.list_by_group(group_id, limit + 1, after_id)
+    if len(expenses) > limit:
+        page = expenses[:limit]
+        return page, str(page[-1].id)
+    return expenses, None
+
+@traced()
 def create_expense(
     expense_repo: ExpenseRepository,
     group_repo: GroupRepository,
@@ -139,6 +195,47 @@ def create_expense(
     expense_repo.add(expense)
     return expense
 
+@traced()
+def import_expenses(
+    expense_repo: ExpenseRepository,
+    group_repo: GroupRepository,
+    group_id: str,
+    rows: Iterable[dict]  # [{description, price, creditors: [{name, amount}], debtors: [name]}]
+) -> tuple[list[Expense], list[tuple[int, str]]]: # (created expenses, (row number, error))
+    group = get_group_by_id(group_repo, group_id)
+    name_to_member = {m.username: m for m in group.members}
+
+    expenses = []
+    errors = []
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            creditors = [{"name": c["name"], "amount": float(c["amount"])} for c in row["creditors"]]
+            creditor_members, debtor_members = _map_and_validate_members(
+                group,
+                creditors,
+                row["debtors"],
+                name_to_member
+            )
+            expenses.append(Expense(
+                id=0,
+                description=row["description"],
+                total_amount=float(row["price"]),
+                group_id=group_id,
+                creditors=creditor_members,
+                debtors=debtor_members
+            ))
+        except KeyError as e:
+            errors.append((row_number, f"Missing field {e}"))
+        except (TypeError, ValueError) as e:
+            errors.append((row_number, str(e)))
+
+    # Nothing is stored unless every row is valid
+    if errors:
+        return [], errors
+    expense_repo.add_many(expenses)
+    return expenses, []
+
+@traced()
 def update_expense(
     expense_repo: ExpenseRepository,
     group_repo: GroupRepository,
@@ -172,9 +269,11 @@ def update_expense(
 
     return expense
 
+@traced()
 def remove_expense(expense_repo: ExpenseRepository, expense_id: str):
     expense_repo.remove(expense_id)
 
+@traced()
 def calculate_group_balance(
     expense_repo: ExpenseRepository,
     group_repo: GroupRepository,
@@ -193,7 +292,115 @@ def calculate_group_balance(
         
     return balances
 
-def calculate_payments(balances: dict[Member, float]) -> list[tuple[Member, Member, float]]:
+def expense_balance_deltas(
+    total_amount: float,
+    creditors: list[tuple[int, float]],
+    debtor_ids: list[int]
+) -> dict[int, float]: # member id -> change in balance
+    """
+    Change in each member's balance caused by one expense, the per-expense step of
+    calculate_group_balance. Repositories keeping stored balances apply it on every write.
+    """
+    deltas: dict[int, float] = {}
+    for member_id, amount in creditors:
+        deltas[member_id] = deltas.get(member_id, 0.0) + amount
+    for member_id in debtor_ids:
+        deltas[member_id] = deltas.get(member_id, 0.0) - total_amount / len(debtor_ids)
+    return deltas
+
+@traced()
+def calculate_group_balance_columnar(expense_repo: ExpenseRepository, group_id: str) -> dict[Member, float]: # member -> balance
+    """
+    Same balances as calculate_group_balance, summed over the expense columns of the
+    group instead of looping over Expense objects keyed by Member.
+    """
+    return column_balances(expense_repo.get_expense_columns(group_id))
+
+def column_balances(columns: ExpenseColumns) -> dict[Member, float]: # member -> balance
+    member_count = len(columns.members)
+    credited = np.bincount(columns.creditor_indices, weights=columns.creditor_amounts, minlength=member_count)
+
+    # Each debtor owes an even share of the expense total
+    debtor_counts = np.diff(columns.debtor_offsets)
+    shares = np.divide(
+        columns.total_amounts, debtor_counts,
+        out=np.zeros_like(columns.total_amounts), where=debtor_counts > 0,
+    )
+    owed = np.bincount(columns.debtor_indices, weights=np.repeat(shares, debtor_counts), minlength=member_count)
+
+    return dict(zip(columns.members, (credited - owed).tolist()))
+
+def build_expense_columns(
+    members: list[Member],
+    expenses: Iterable[tuple[int, float]], # (expense id, total amount)
+    creditor_links: Iterable[tuple[int, int, float]], # (expense id, member id, amount)
+    debtor_links: Iterable[tuple[int, int]], # (expense id, member id)
+) -> ExpenseColumns:
+    """
+    Columns of a group from plain rows, in any order. Links to members or expenses
+    outside the group are left out.
+    """
+    member_ids = np.array([member.id for member in members], dtype=np.int64)
+    member_order = np.argsort(member_ids)
+    expense_ids, total_amounts = _columns(expenses, np.int64, np.float64)
+    expense_order = np.argsort(expense_ids, kind="stable")
+    expense_ids, total_amounts = expense_ids[expense_order], total_amounts[expense_order]
+
+    def links(rows, *value_types):
+        link_expense_ids, link_member_ids, *values = _columns(rows, np.int64, np.int64, *value_types)
+        indices = _positions(member_ids, link_member_ids, member_order)
+        keep = (indices >= 0) & (_positions(expense_ids, link_expense_ids) >= 0)
+        order = np.argsort(link_expense_ids[keep], kind="stable")
+        offsets = np.append(np.searchsorted(link_expense_ids[keep][order], expense_ids), keep.sum())
+        return offsets, indices[keep][order], *(value[keep][order] for value in values)
+
+    creditor_offsets, creditor_indices, creditor_amounts = links(creditor_links, np.float64)
+    debtor_offsets, debtor_indices = links(debtor_links)
+    return ExpenseColumns(
+        members=list(members),
+        expense_ids=expense_ids,
+        total_amounts=total_amounts,
+        creditor_offsets=creditor_offsets,
+        creditor_indices=creditor_indices,
+        creditor_amounts=creditor_amounts,
+        debtor_offsets=debtor_offsets,
+        debtor_indices=debtor_indices,
+    )
+
+def _columns(rows: Iterable[tuple], *types) -> list[np.ndarray]:
+    # One pass over the tuples into a record array, then a contiguous array per column.
+    # Structured dtypes only take plain tuples, so database rows are converted first.
+    records = np.fromiter(map(tuple, rows), dtype=[(f"f{i}", dtype) for i, dtype in enumerate(types)])
+    return [np.ascontiguousarray(records[name]) for name in records.dtype.names]
+
+def _positions(keys: np.ndarray, values: np.ndarray, sorter: np.ndarray | None = None) -> np.ndarray:
+    # Index of each value in keys, -1 for values that are not there
+    if not len(keys):
+        return np.full(len(values), -1, dtype=np.int64)
+    found = np.searchsorted(keys, values, sorter=sorter).clip(max=len(keys) - 1)
+    if sorter is not None:
+        found = sorter[found]
+    return np.where(keys[found] == values, found, -1)
+
+@traced()
+def get_group_balances(group_repo: GroupRepository, group_id: str) -> dict[Member, float]: # member -> balance
+    return group_repo.get_balances(group_id)
+
+@traced()
+def calculate_payments(
+    balances: dict[Member, float],
+    solver: str = "heap",
+    time_budget: float = MIN_TRANSFERS_TIME_BUDGET
+) -> list[tuple[Member, Member, float]]:
+    if solver not in SETTLEMENT_SOLVERS:
+        raise ValueError(f"Unknown settlement solver '{solver}'")
+    return SETTLEMENT_SOLVERS[solver](balances, time_budget)
+
+def _calculate_payments_list(
+    balances: dict[Member, float],
+    time_budget: float = MIN_TRANSFERS_TIME_BUDGET
+) -> list[tuple[Member, Member, float]]:
+    # Greedy solvers finish in bounded time, they take time_budget only to share the solver signature
     creditors, debtors = _split_group_creditors_and_debtors(balances)
     payments = []
     
@@ -211,6 +418,164 @@ def calculate_payments(balances: dict[Member, float]) -> list[tuple[Member, Memb
     
     return payments
 
+def _calculate_payments_heap(
+    balances: dict[Member, float],
+    time_budget: float = MIN_TRANSFERS_TIME_BUDGET
+) -> list[tuple[Member, Member, float]]:
+    """
+    Same greedy matching as _calculate_payments_list in O(n log n), time_budget is ignored.
+    Untouched creditors are consumed largest first, while the remainders of partially
+    paid creditors wait in a min-heap and are only reached once every untouched
+    creditor has been used, which is the order the list-based insertion produces.
+    Debtors are always consumed smallest first. Ties keep insertion order.
+    """
+    creditors, debtors = _split_group_creditors_and_debtors(balances)
+    payments = []
+    order = count()
+
+    # Already ascending, so the list is a valid heap
+    debtor_heap = [(balance, next(order), member) for member, balance in debtors]
+    creditor_remainders = []
+    next_creditor = 0
+
+    def pop_creditor():
+        nonlocal next_creditor
+        if next_creditor < len(creditors):
+            next_creditor += 1
+            return creditors[next_creditor - 1]
+        if creditor_remainders:
+            balance, _, member = heapq.heappop(creditor_remainders)
+            return member, balance
+        return None
+
+    current = pop_creditor()
+    while current and debtor_heap:
+        creditor, creditor_balance = current
+        debtor_balance, _, debtor = heapq.heappop(debtor_heap)
+        payment = min(creditor_balance, debtor_balance)
+
+        if debtor_balance > creditor_balance:
+            heapq.heappush(debtor_heap, (debtor_balance - payment, next(order), debtor))
+
+        payments.append((creditor, debtor, payment))
+
+        if creditor_balance > debtor_balance:
+            remainder = creditor_balance - payment
+            if next_creditor < len(creditors):
+                if creditors[next_creditor][1] > remainder:
+                    current = (creditor, remainder)
+                else:
+                    heapq.heappush(creditor_remainders, (remainder, next(order), creditor))
+                    current = pop_creditor()
+            elif creditor_remainders and creditor_remainders[0][0] <= remainder:
+                balance, _, member = heapq.heappushpop(creditor_remainders, (remainder, next(order), creditor))
+                current = (member, balance)
+            else:
+                current = (creditor, remainder)
+        else:
+            current = pop_creditor()
+
+    return payments
+
+def _calculate_payments_min_transfers(
+    balances: dict[Member, float],
+    time_budget: float = MIN_TRANSFERS_TIME_BUDGET
+) -> list[tuple[Member, Member, float]]:
+    """
+    Settles exactly-cancelling creditor/debtor subsets on their own, so each subset of
+    k members needs only k - 1 transfers, then settles the rest with the greedy matching.
+    The subset search runs on integer cents and stops once time_budget seconds of CPU
+    time have been spent by the calling thread, falling back to greedy for whatever is left.
+    """
+    deadline = time.thread_time() + time_budget
+    cents = _balances_to_cents(balances)
+    creditors = [(member, amount) for member, amount in cents.items() if amount > 0]
+    debtors = [(member, -amount) for member, amount in cents.items() if amount < 0]
+
+    subsets = []
+    for creditor_count, debtor_count in ((1, 1), (2, 1), (1, 2), (2, 2)):
+        if time.thread_time() > deadline:
+            break
+        found, creditors, debtors = _match_cancelling_subsets(
+            creditors, debtors, creditor_count, debtor_count, deadline
+        )
+        subsets.extend(found)
+    subsets.append((creditors, debtors))
+
+    payments = []
+    for subset_creditors, subset_debtors in subsets:
+        subset = {member: amount for member, amount in subset_creditors}
+        subset.update({member: -amount for member, amount in subset_debtors})
+        payments.extend(
+            (creditor, debtor, amount / 100)
+            for creditor, debtor, amount in _calculate_payments_heap(subset)
+        )
+    return payments
+
+def _balances_to_cents(balances: dict[Member, float]) -> dict[Member, int]:
+    cents = {member: round(balance * 100) for member, balance in balances.items()}
+    # Rounding can leave the group a few cents off zero, give them to the largest balance
+    drift = sum(cents.values())
+    if drift:
+        largest = max(cents, key=lambda member: abs(cents[member]))
+        cents[largest] -= drift
+    return {member: amount for member, amount in cents.items() if amount}
+
+def _match_cancelling_subsets(
+    creditors: list[tuple[Member, int]],
+    debtors: list[tuple[Member, int]],
+    creditor_count: int,
+    debtor_count: int,
+    deadline: float
+) -> tuple[list[tuple[list, list]], list[tuple[Member, int]], list[tuple[Member, int]]]:
+    """
+    Finds disjoint groups of creditor_count creditors and debtor_count debtors whose amounts
+    cancel exactly. Returns the groups found and the creditors and debtors left over.
+    """
+    # Every combination looked at counts as one step, whichever loop it is in.
+    # Once the deadline has passed it stays passed.
+    steps = count(1)
+    timed_out = False
+    def out_of_time() -> bool:
+        nonlocal timed_out
+        if not timed_out and next(steps) % DEADLINE_CHECK_STEPS == 0:
+            timed_out = time.thread_time() > deadline
+        return timed_out
+
+    debtor_combinations = {}
+    for combination in combinations(range(len(debtors)), debtor_count):
+        if out_of_time():
+            return [], creditors, debtors
+        total = sum(debtors[d][1] for d in combination)
+        debtor_combinations.setdefault(total, []).append(combination)
+
+    used_creditors = set()
+    used_debtors = set()
+    found = []
+    for creditor_combination in combinations(range(len(creditors)), creditor_count):
+        if out_of_time():
+            break
+        if used_creditors.intersection(creditor_combination):
+            continue
+        total = sum(creditors[c][1] for c in creditor_combination)
+        for debtor_combination in debtor_combinations.get(total, []):
+            if out_of_time():
+                break
+            if not used_debtors.intersection(debtor_combination):
+                used_creditors.update(creditor_combination)
+                used_debtors.update(debtor_combination)
+                found.append((
+                    [creditors[c] for c in creditor_combination],
+                    [debtors[d] for d in debtor_combination],
+                ))
+                break
+
+    return (
+        found,
+        [c for i, c in enumerate(creditors) if i not in used_creditors],
+        [d for i, d in enumerate(debtors) if i not in used_debtors],
+    )
+
 def _split_group_creditors_and_debtors(balances: dict[Member, float]) -> tuple[list[tuple[Member, float]], list[tuple[Member, float]]]:
     creditors = []
     debtors = []
@@ -231,9 +596,11 @@ def _insert_ordered(lst: list[tuple[Member, float]], item: tuple[Member, float])
 def _map_and_validate_members(
     group: Group,
     creditors_data: list[dict],
-    debtor_names: list[str]
+    debtor_names: list[str],
+    name_to_member: dict[str, Member] | None = None
 ) -> tuple[list[tuple[Member, float]], list[Member]]:
-    name_to_member = {m.username: m for m in group.members}
+    if name_to_member is None:
+        name_to_member = {m.username: m for m in group.members}
 
     creditor_members = []
     for c in creditors_data:
@@ -250,3 +617,9 @@ def _map_and_validate_members(
         debtor_members.append(name_to_member[name])
 
     return creditor_members, debtor_members
+
+SETTLEMENT_SOLVERS = {
+    "list": _calculate_payments_list,
+    "heap": _calculate_payments_heap,
+    "min_transfers": _calculate_payments_min_transfers,
+}
@@ -0,0 +1,21 @@
+# gunicorn settings, read from the working directory on start
+#
+# With PROMETHEUS_MULTIPROC_DIR set, every worker keeps its metrics in files there
+# and /metrics adds them up. The directory is emptied when the server starts, and
+# the files of a worker that exits stop counting towards its live gauges.
+
+import os
+import shutil
+
+
+def on_starting(server):
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
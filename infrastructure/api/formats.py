@@ -0,0 +1,165 @@
+# Expense serialization formats
+
+import codecs
+import csv
+import io
+import json
+import re
+from itertools import chain
+from typing import Iterable, Iterator
+from domain.models import Expense
+
+CSV_HEADER = ["id", "description", "price", "creditors", "debtors"]
+CHUNK_SIZE = 64 * 1024  # characters per streamed chunk
+WHITESPACE = re.compile(r"\s*")
+
+
+def expense_to_json(expense: Expense) -> dict:
+    return {
+        "id": str(expense.id),
+        "description": expense.description,
+        "creditors": [{"name": c[0].username, "amount": c[1]} for c in expense.creditors],
+        "debtors": [d.username for d in expense.debtors],
+        "price": expense.total_amount
+    }
+
+
+def expense_to_csv_row(expense: Expense) -> list:
+    """
+    Creditors are written as "name:amount" pairs and debtors as names, both separated by ";".
+    """
+    return [
+        expense.id,
+        expense.description,
+        expense.total_amount,
+        ";".join(f"{member.username}:{amount}" for member, amount in expense.creditors),
+        ";".join(member.username for member in expense.debtors),
+    ]
+
+
+def _chunked(lines: Iterable[str], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Joins small lines into chunks so the response is not written one row at a time.
+    """
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def _csv_lines(expenses: Iterable[Expense]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in chain([CSV_HEADER], map(expense_to_csv_row, expenses)):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_csv(expenses: Iterable[Expense]) -> Iterator[str]:
+    return _chunked(_csv_lines(expenses))
+
+
+def stream_ndjson(expenses: Iterable[Expense]) -> Iterator[str]:
+    return _chunked(json.dumps(expense_to_json(expense)) + "\n" for expense in expenses)
+
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+def _split(field: str | None) -> list[str]:
+    return [part.strip() for part in (field or "").split(";") if part.strip()]
+
+
+def _parse_creditor(field: str) -> dict:
+    name, separator, amount = field.rpartition(":")
+    if not separator:
+        return {"name": field, "amount": None}
+    return {"name": name.strip(), "amount": amount.strip()}
+
+
+def iter_csv_rows(stream: io.RawIOBase) -> Iterator[dict]:
+    """
+    Reads expenses written by stream_csv one line at a time. The id column is ignored.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    for row in csv.DictReader(text):
+        yield {
+            "description": row.get("description"),
+            "price": row.get("price"),
+            "creditors": [_parse_creditor(c) for c in _split(row.get("creditors"))],
+            "debtors": _split(row.get("debtors")),
+        }
+
+
+def iter_json_array(stream: io.RawIOBase, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """
+    Yields the elements of a top-level JSON array while reading the stream in chunks,
+    so only the current element and one chunk are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    eof = False
+    expect = "["  # then "first", "value" or "next"
+
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        need_more = position == len(buffer)
+
+        if not need_more:
+            char = buffer[position]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                position += 1
+                expect = "first"
+                continue
+            if char == "]" and expect in ("first", "next"):
+                return
+            if expect == "next":
+                if char != ",":
+                    raise ValueError("Expected ',' or ']' in JSON array")
+                position += 1
+                expect = "value"
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # A value is only complete once the separator after it has been read,
+                # otherwise a number cut by the chunk boundary would be split in two
+                follow = WHITESPACE.match(buffer, end).end()
+                need_more = not eof and (follow == len(buffer) or buffer[follow] not in ",]")
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError("Malformed JSON array")
+                need_more = True
+            if not need_more:
+                yield value
+                position = end
+                expect = "next"
+                continue
+
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + text.decode(chunk, final=eof)
+        position = 0
+
+
+IMPORT_FORMATS = {
+    "csv": iter_csv_rows,
+    "json": iter_json_array,
+}
@@ -0,0 +1,62 @@
+# Request lifecycle hooks
+
+from flask import g, request
+from application.tracing import tracer
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def register_unit_of_work(app, uow_factory):
+    """
+    Opens a unit of work for every request as g.uow. Writes are committed once if
+    the response succeeded, everything else is rolled back, and the unit of work
+    is closed when the request ends.
+    Streamed responses keep it open until the stream is consumed.
+    """
+
+    @app.before_request
+    def open_unit_of_work():
+        g.uow = uow_factory()
+
+    @app.after_request
+    def finish_unit_of_work(response):
+        uow = g.get("uow")
+        if uow is not None:
+            if request.method not in SAFE_METHODS and response.status_code < 400:
+                uow.commit()
+            else:
+                uow.rollback()
+        return response
+
+    @app.teardown_request
+    def close_unit_of_work(exc):
+        uow = g.pop("uow", None)
+        if uow is not None:
+            uow.close()
+
+
+def register_tracing(app):
+    """
+    Samples a trace for each request, with the request as its root span. The trace
+    ends with the request, after a streamed body is consumed, and sampled responses
+    carry its id in X-Trace-Id.
+    """
+
+    @app.before_request
+    def start_trace():
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        g.trace = tracer.start_trace(f"{request.method} {rule}", method=request.method, path=request.path)
+
+    @app.after_request
+    def tag_trace(response):
+        trace = g.get("trace")
+        if trace is not None:
+            trace.attributes["status"] = response.status_code
+            response.headers["X-Trace-Id"] = trace.trace_id
+        return response
+
+    @app.teardown_request
+    def end_trace(exc):
+        trace = g.pop("trace", None)
+        if trace is not None:
+            tracer.end_span(trace, exc)
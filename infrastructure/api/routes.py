@@ -1,17 +1,25 @@
-from flask import request, jsonify
-from domain.services import add_owner_to_group, calculate_group_balance, calculate_payments, create_expense, create_user, create_group, create_member, edit_member_name_in_group, get_expenses_by_group_id, get_groups_by_owner_id, get_member_by_id, get_member_by_username_and_group, get_members_by_group_id, get_user_by_id, add_member_to_group, get_group_by_id, remove_expense, remove_member_from_group, update_expense
-from infrastructure.db.repository import SQLAlchemyUserRepository, SQLAlchemyGroupRepository, SQLAlchemyMemberRepository, SQLAlchemyExpenseRepository
-from infrastructure.db import SessionLocal
+from flask import g, request, jsonify, make_response, Response, stream_with_context
+from domain.services import add_owner_to_group, calculate_payments, create_expense, create_user, create_group, create_member, edit_member_name_in_group, ensure_group_exists, get_expense_page, get_expenses_by_group_id, get_group_summaries_by_owner_id, get_groups_by_owner_id, get_member_by_id, get_member_by_username_and_group, get_members_by_group_id, get_user_by_id, add_member_to_group, get_group_by_id, get_group_balances, get_group_version, import_expenses, iter_expenses_by_group_id, remove_expense, remove_member_from_group, update_expense
+from application.tracing import traced
+from infrastructure.cache import LRUCache
+from infrastructure.api.formats import expense_to_json, EXPORT_FORMATS, IMPORT_FORMATS
+from werkzeug.exceptions import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
 
 def register_routes(app, limiter):
+    # Summaries keyed by (group_id, group version, solver), stale entries age out
+    summary_cache = LRUCache(app.config["SUMMARY_CACHE_SIZE"])
+    app.extensions["summary_cache"] = summary_cache
 
     # USERS
 
     @app.route("/users", methods=["POST"])
     @limiter.limit("10 per minute")
+    @traced()
     def post_user():
-        session = SessionLocal()
-        repo = SQLAlchemyUserRepository(session)
+        repo = g.uow.users
         try:
             data = request.get_json()
             user = create_user(repo)
@@ -22,13 +30,11 @@ def register_routes(app, limiter):
             return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     @app.route("/users/<int:user_id>", methods=["GET"])
+    @traced()
     def get_user(user_id):
-        session = SessionLocal()
-        repo = SQLAlchemyUserRepository(session)
+        repo = g.uow.users
         try:
             user = get_user_by_id(repo, user_id)
             if not user:
@@ -36,18 +42,16 @@ def register_routes(app, limiter):
             return jsonify({"id": user.id})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     # GROUPS
 
     @app.route("/groups", methods=["POST"])
     @limiter.limit("10 per minute")
+    @traced()
     def post_group():
-        session = SessionLocal()
-        user_repo = SQLAlchemyUserRepository(session)
-        group_repo = SQLAlchemyGroupRepository(session)
-        member_repo = SQLAlchemyMemberRepository(session)
+        user_repo = g.uow.users
+        group_repo = g.uow.groups
+        member_repo = g.uow.members
         try:
             data = request.get_json()
             name = data["name"]
@@ -61,7 +65,6 @@ def register_routes(app, limiter):
             group = create_group(group_repo, name, owner)
             for member in members:
                 m = create_member(member_repo, group_repo, member, str(group.id))
-            session.flush()
 
             return jsonify({
                 "id": str(group.id),
@@ -74,14 +77,12 @@ def register_routes(app, limiter):
             return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     @app.route("/groups/<group_id>/join", methods=["POST"])
+    @traced()
     def join_group(group_id: str):
-        session = SessionLocal()
-        group_repo = SQLAlchemyGroupRepository(session)
-        user_repo = SQLAlchemyUserRepository(session)
+        group_repo = g.uow.groups
+        user_repo = g.uow.users
         try:
             data = request.get_json()
             user_id = data.get("user_id")
@@ -100,18 +101,25 @@ def register_routes(app, limiter):
             return jsonify({"message": "User added as owner"}), 200
 
         except Exception as e:
-            session.rollback()
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     @app.route("/groups", methods=["GET"])
+    @traced()
     def get_groups():
-        session = SessionLocal()
-        group_repo = SQLAlchemyGroupRepository(session)
+        group_repo = g.uow.groups
 
         try:
             owner_id = request.args.get("owner_id")
+
+            # Lightweight dashboard listing without member and owner lists.
+            if request.args.get("view") == "summary":
+                summaries = get_group_summaries_by_owner_id(group_repo, owner_id)
+                return jsonify([{
+                    "id": str(summary.id),
+                    "name": summary.name,
+                    "member_count": summary.member_count
+                } for summary in summaries])
+
             groups = get_groups_by_owner_id(group_repo, owner_id)
 
             return jsonify([{
@@ -122,14 +130,12 @@ def register_routes(app, limiter):
             } for group in groups])
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
 
     @app.route("/groups/<group_id>", methods=["GET"])
+    @traced()
     def get_group(group_id: str):
-        session = SessionLocal()
-        group_repo = SQLAlchemyGroupRepository(session)
+        group_repo = g.uow.groups
         try:
             owner_id = request.args.get("owner_id")
 
@@ -153,37 +159,70 @@ def register_routes(app, limiter):
 
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
 
     # EXPENSES
 
     @app.route("/groups/<group_id>/expenses", methods=["GET"])
+    @traced()
     def get_expenses(group_id: str):
-        session = SessionLocal()
-        expenses_repo = SQLAlchemyExpenseRepository(session)
+        expenses_repo = g.uow.expenses
         try:
-            expenses = get_expenses_by_group_id(expenses_repo, group_id)
-            
-            return jsonify([{
-                "id": str(e.id),
-                "description": e.description,
-                "creditors": [{"name": c[0].username, "amount":c[1]} for c in e.creditors],
-                "debtors": [d.username for d in e.debtors],
-                "price": e.total_amount
-            } for e in expenses])
+            raw_limit = request.args.get("limit")
+            cursor = request.args.get("cursor")
+
+            # Without paging parameters the whole list is returned, as before
+            if raw_limit is None and cursor is None:
+                expenses = get_expenses_by_group_id(expenses_repo, group_id)
+                return jsonify([expense_to_json(e) for e in expenses])
+
+            if raw_limit is None:
+                limit = DEFAULT_PAGE_SIZE
+            elif raw_limit.isdigit():
+                limit = min(int(raw_limit), MAX_PAGE_SIZE)
+            else:
+                raise ValueError("limit must be a positive integer")
+            expenses, next_cursor = get_expense_page(expenses_repo, group_id, limit, cursor)
+            return jsonify({
+                "expenses": [expense_to_json(e) for e in expenses],
+                "next_cursor": next_cursor
+            })
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error" : str(e)}), 500
-        finally:
-            session.close()
+
+    @app.route("/groups/<group_id>/expenses/export", methods=["GET"])
+    @traced()
+    def export_expenses(group_id: str):
+        export_format = request.args.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"Unknown export format '{export_format}'"}), 400
+        serialize, mimetype = EXPORT_FORMATS[export_format]
+
+        # Checked before streaming starts, once the 200 is sent an error can only cut the body short
+        try:
+            ensure_group_exists(g.uow.groups, group_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        def generate():
+            # stream_with_context keeps the request, and its unit of work, open while streaming
+            expenses = iter_expenses_by_group_id(g.uow.expenses, group_id)
+            yield from serialize(expenses)
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=expenses-{group_id}.{export_format}"},
+        )
 
     @app.route("/groups/<group_id>/expenses", methods=["POST"])
     @limiter.limit("30 per minute")
+    @traced()
     def post_expense(group_id: str):
-        session = SessionLocal()
-        expense_repo = SQLAlchemyExpenseRepository(session)
-        group_repo = SQLAlchemyGroupRepository(session)
+        expense_repo = g.uow.expenses
+        group_repo = g.uow.groups
 
         try:
             data = request.get_json()
@@ -197,26 +236,56 @@ def register_routes(app, limiter):
                 description, price, creditors, debtors
             )
 
+            return jsonify(expense_to_json(expense)), 201
+
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route("/groups/<group_id>/expenses/import", methods=["POST"])
+    @limiter.limit("5 per minute")
+    @traced()
+    def import_expenses_endpoint(group_id: str):
+        # The upload is parsed while it is read, never loaded whole into memory
+        if request.mimetype == "multipart/form-data" and "file" in request.files:
+            upload = request.files["file"]
+            stream = upload.stream
+            is_csv = upload.mimetype == "text/csv" or (upload.filename or "").endswith(".csv")
+        elif request.mimetype in ("text/csv", "application/json"):
+            stream = request.stream
+            is_csv = request.mimetype == "text/csv"
+        else:
+            return jsonify({"error": "Upload a JSON array or a CSV file"}), 415
+        parse = IMPORT_FORMATS["csv" if is_csv else "json"]
+
+        expense_repo = g.uow.expenses
+        group_repo = g.uow.groups
+        try:
+            expenses, errors = import_expenses(expense_repo, group_repo, group_id, parse(stream))
+            if errors:
+                return jsonify({
+                    "error": "No expenses were imported",
+                    "errors": [{"row": row, "error": error} for row, error in errors]
+                }), 400
+
             return jsonify({
-                "id": str(expense.id),
-                "description": expense.description,
-                "creditors": [{"name": c[0].username, "amount": c[1]} for c in expense.creditors],
-                "debtors": [d.username for d in expense.debtors],
-                "price": expense.total_amount
+                "created": len(expenses),
+                "ids": [str(expense.id) for expense in expenses]
             }), 201
 
+        except HTTPException:
+            raise
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     @app.route("/expenses/<expense_id>", methods=["PUT"])   # This should depend of the group_id
+    @traced()
     def update_expense_endpoint(expense_id: str):
-        session = SessionLocal()
-        expense_repo = SQLAlchemyExpenseRepository(session)
-        group_repo = SQLAlchemyGroupRepository(session)
+        expense_repo = g.uow.expenses
+        group_repo = g.uow.groups
 
         try:
             data = request.get_json()
@@ -235,28 +304,20 @@ def register_routes(app, limiter):
                 debtors
             )
 
-            return jsonify({
-                "id": str(expense.id),
-                "description": expense.description,
-                "creditors": [{"name": c[0].username, "amount": c[1]} for c in expense.creditors],
-                "debtors": [d.username for d in expense.debtors],
-                "price": expense.total_amount
-            }), 200
+            return jsonify(expense_to_json(expense)), 200
 
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     # MEMBERS
 
     @app.route("/groups/<group_id>/members", methods=["POST"])
+    @traced()
     def post_member(group_id):
-        session = SessionLocal()
-        member_repo = SQLAlchemyMemberRepository(session)
-        group_repo = SQLAlchemyGroupRepository(session)
+        member_repo = g.uow.members
+        group_repo = g.uow.groups
         try:
             data = request.get_json()
             member_username = data["username"]
@@ -267,28 +328,26 @@ def register_routes(app, limiter):
                 "id": member.id,
                 "member_username": member.username,
             }), 201
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     @app.route("/groups/<group_id>/members", methods=["GET"])
+    @traced()
     def get_members(group_id):
-        session = SessionLocal()
-        group_repo = SQLAlchemyGroupRepository(session)
+        group_repo = g.uow.groups
         try:
             members = get_members_by_group_id(group_repo, group_id)
             return jsonify([member.username for member in members])
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     @app.route("/groups/<group_id>/members/<username>", methods=["DELETE"])
+    @traced()
     def delete_member(group_id, username):
-        session = SessionLocal()
-        group_repo = SQLAlchemyGroupRepository(session)
-        expense_repo = SQLAlchemyExpenseRepository(session)
+        group_repo = g.uow.groups
+        expense_repo = g.uow.expenses
         try:
             member = get_member_by_username_and_group(group_repo, username, group_id)
             if not member:
@@ -300,13 +359,11 @@ def register_routes(app, limiter):
             return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     @app.route("/groups/<group_id>/members/<old_name>", methods=["PUT"])
+    @traced()
     def update_member(group_id, old_name):
-        session = SessionLocal()
-        group_repo = SQLAlchemyGroupRepository(session)
+        group_repo = g.uow.groups
         body = request.get_json()
         new_name = body.get("new_name")
         if not new_name:
@@ -319,9 +376,9 @@ def register_routes(app, limiter):
             return jsonify({"error": str(e)}), 400
 
     @app.route("/expenses/<expense_id>", methods=["DELETE"])
+    @traced()
     def delete_expense(expense_id):
-        session = SessionLocal()
-        expense_repo = SQLAlchemyExpenseRepository(session)
+        expense_repo = g.uow.expenses
         try:
             remove_expense(expense_repo, expense_id)
             
@@ -330,35 +387,60 @@ def register_routes(app, limiter):
             return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            session.close()
 
     # SUMMARY
 
     @app.route("/groups/<group_id>/summary", methods=["GET"])
+    @traced()
     def get_group_summary(group_id):
-        session = SessionLocal()
-        expense_repo = SQLAlchemyExpenseRepository(session)
-        group_repo = SQLAlchemyGroupRepository(session)
+        group_repo = g.uow.groups
         try:
-            balances = calculate_group_balance(expense_repo, group_repo, group_id)
-            payments = calculate_payments(balances)
-
-            response = {
-                "balances": {
-                    member.username: round(balance, 2)
-                    for member, balance in balances.items()
-                },
-                "payments": [
-                    {
-                        "from": debtor.username,
-                        "to": creditor.username,
-                        "amount": round(amount, 2),
-                    }
-                    for creditor, debtor, amount in payments
-                ],
-            }
-            return jsonify(response), 200
+            solver = request.args.get("solver", "heap")
+            version = get_group_version(group_repo, group_id)
+            etag = f"{group_id}-{version}-{solver}"
+
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                return response
+
+            cache_key = (group_id, version, solver)
+            summary = summary_cache.get(cache_key)
+            if summary is None:
+                balances = get_group_balances(group_repo, group_id)
+                payments = calculate_payments(balances, solver, app.config["SETTLEMENT_TIME_BUDGET"])
+
+                summary = {
+                    "balances": {
+                        member.username: round(balance, 2)
+                        for member, balance in balances.items()
+                    },
+                    "payments": [
+                        {
+                            "from": debtor.username,
+                            "to": creditor.username,
+                            "amount": round(amount, 2),
+                        }
+                        for creditor, debtor, amount in payments
+                    ],
+                }
+                summary_cache.set(cache_key, summary)
+
+            response = make_response(jsonify(summary), 200)
+            response.set_etag(etag)
+            return response
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
-            print(f"Error in /groups/{group_id}/summary: {e}")
+            app.logger.exception("Error in /groups/%s/summary", group_id)
             return jsonify({"error": str(e)}), 500
+
+    # STATS
+
+    @app.route("/stats/cache", methods=["GET"])
+    @traced()
+    def get_cache_stats():
+        stats = {"summary": summary_cache.stats()}
+        if "group_cache" in app.extensions:
+            stats["groups"] = app.extensions["group_cache"].stats()
+        return jsonify(stats)
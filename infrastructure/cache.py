@@ -0,0 +1,136 @@
+# In-process caches
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable
+from application.ports import GroupRepository
+from domain.models import Group, GroupSummary, Member, User
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with hit and miss counters.
+    Safe to share between the threads of a worker process.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+def _copy_group(group: Group) -> Group:
+    # Callers get their own objects, never the ones held by the cache
+    return Group(
+        id=group.id,
+        name=group.name,
+        owners=[User(id=owner.id) for owner in group.owners],
+        members=[Member(id=m.id, username=m.username, group_id=m.group_id) for m in group.members],
+    )
+
+
+class CachingGroupRepository(GroupRepository):
+    """
+    Read-through cache of Group aggregates in front of another GroupRepository.
+    Entries are stamped with the group version, which every write to the group bumps,
+    so a cheap version read is enough to notice changes made by other workers.
+    Groups changed by the current unit of work bypass the cache until it ends,
+    so uncommitted state is never shared.
+    """
+    def __init__(self, inner: GroupRepository, cache: LRUCache, has_pending_changes: Callable[[str], bool] = lambda group_id: False):
+        self.inner = inner
+        self.cache = cache
+        self.has_pending_changes = has_pending_changes
+
+    def get_by_id(self, group_id: str) -> Group | None:
+        if self.has_pending_changes(group_id):
+            return self.inner.get_by_id(group_id)
+
+        version = self.inner.get_version(group_id)
+        if version is None:
+            return None
+        entry = self.cache.get(group_id)
+        if entry is not None and entry[0] == version:
+            return _copy_group(entry[1])
+
+        group = self.inner.get_by_id(group_id)
+        if group is not None:
+            self.cache.set(group_id, (version, _copy_group(group)))
+        return group
+
+    def get_groups_by_owner_id(self, owner_id: str) -> list[Group]:
+        return self.inner.get_groups_by_owner_id(owner_id)
+
+    def get_group_summaries_by_owner_id(self, owner_id: str) -> list[GroupSummary]:
+        return self.inner.get_group_summaries_by_owner_id(owner_id)
+
+    def add(self, group: Group) -> None:
+        self.inner.add(group)
+
+    def add_member(self, group_id: str, member: Member) -> None:
+        self.inner.add_member(group_id, member)
+
+    def update_member_name(self, group_id: str, old_name: str, new_name: str) -> None:
+        self.inner.update_member_name(group_id, old_name, new_name)
+
+    def get_version(self, group_id: str) -> int | None:
+        return self.inner.get_version(group_id)
+
+    def get_members(self, group_id: str) -> list[Member]:
+        return self.inner.get_members(group_id)
+
+    def get_member_by_username(self, group_id: str, username: str) -> Member | None:
+        return self.inner.get_member_by_username(group_id, username)
+
+    def has_member_username(self, group_id: str, username: str) -> bool:
+        return self.inner.has_member_username(group_id, username)
+
+    def exists(self, group_id: str) -> bool:
+        return self.inner.exists(group_id)
+
+    def get_balances(self, group_id: str) -> dict[Member, float]:
+        return self.inner.get_balances(group_id)
+
+    def remove_member(self, group_id: str, member: Member) -> None:
+        self.inner.remove_member(group_id, member)
+
+    def add_owner(self, group_id: str, owner: User) -> None:
+        self.inner.add_owner(group_id, owner)
+
+    def get_owners(self, group_id: str) -> list[User]:
+        return self.inner.get_owners(group_id)
+
+    def get_by_expense_id(self, expense_id: str) -> Group | None:
+        return self.inner.get_by_expense_id(expense_id)
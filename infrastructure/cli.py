@@ -0,0 +1,85 @@
+# Flask CLI commands
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from infrastructure.db import SessionLocal, engine
+from infrastructure.db.migrations import current_version, run_migrations
+from infrastructure.db.ledger import rebuild_ledger, verify_ledger
+from infrastructure.db.slow_queries import summarize
+
+
+def register_commands(app):
+
+    # LEDGER
+
+    ledger = AppGroup("ledger", help="Maintain the member balances ledger.")
+
+    @ledger.command("verify")
+    @click.option("--group-id", default=None, help="Only check this group.")
+    def ledger_verify(group_id):
+        """Check the ledger against a full replay of the expenses."""
+        session = SessionLocal()
+        try:
+            mismatches = verify_ledger(session, group_id)
+        finally:
+            session.close()
+
+        for gid, username, ledger_balance, replayed_balance in mismatches:
+            click.echo(f"{gid} {username}: ledger={ledger_balance:.2f} replay={replayed_balance:.2f}")
+        if mismatches:
+            raise SystemExit(f"{len(mismatches)} balance(s) out of sync, run 'flask ledger rebuild'")
+        click.echo("Ledger is in sync")
+
+    @ledger.command("rebuild")
+    @click.option("--group-id", default=None, help="Only rebuild this group.")
+    def ledger_rebuild(group_id):
+        """Rewrite the ledger from the balances aggregated in the database."""
+        session = SessionLocal()
+        try:
+            count = rebuild_ledger(session, group_id)
+        finally:
+            session.close()
+        click.echo(f"Rebuilt balances of {count} group(s)")
+
+    app.cli.add_command(ledger)
+
+    # SCHEMA
+
+    db = AppGroup("db", help="Manage the database schema.")
+
+    @db.command("upgrade")
+    def db_upgrade():
+        """Apply the pending schema migrations."""
+        applied = run_migrations(engine)
+        click.echo(f"Applied migrations {applied}" if applied else "Schema is up to date")
+        click.echo(f"Schema version {current_version(engine)}")
+
+    @db.command("version")
+    def db_version():
+        """Show the schema version of the database."""
+        click.echo(f"Schema version {current_version(engine)}")
+
+    @db.command("slow-queries")
+    @click.option("--top", default=10, show_default=True, help="Number of statements to show.")
+    @click.option("--log", "log_path", default=None, help="Slow query log, SLOW_QUERY_LOG by default.")
+    def db_slow_queries(top, log_path):
+        """Show the statements of the slow query log that took the most time in total."""
+        offenders = summarize(log_path or current_app.config["SLOW_QUERY_LOG"], top)
+        if not offenders:
+            click.echo("No slow queries logged")
+            return
+        for rank, item in enumerate(offenders, 1):
+            click.echo(
+                f"{rank}. {item.total_ms:.1f} ms total, {item.count} run(s), "
+                f"mean {item.total_ms / item.count:.1f} ms, max {item.max_ms:.1f} ms"
+            )
+            click.echo(f"   {item.statement}")
+            for origin, count in sorted(item.origins.items(), key=lambda entry: -entry[1]):
+                click.echo(f"   from {origin} ({count})")
+            for route, count in sorted(item.routes.items(), key=lambda entry: -entry[1]):
+                click.echo(f"   on {route} ({count})")
+            for line in item.plan:
+                click.echo(f"   plan: {line}")
+
+    app.cli.add_command(db)
@@ -1,10 +1,13 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from config import Config
-from infrastructure.db.models import Base
+from config import Config, is_memory_url
+from infrastructure.db.migrations import run_migrations
+from infrastructure.db.profiles import create_profiled_engine
 
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI, echo=True)
+# The in-memory backend runs without an engine
+engine = None if is_memory_url(Config.SQLALCHEMY_DATABASE_URI) else create_profiled_engine(
+    Config.SQLALCHEMY_DATABASE_URI, Config.DB_ENGINE_PROFILE, Config.SQLALCHEMY_ECHO
+)
 SessionLocal = sessionmaker(bind=engine)
 
 def init_db():
-    Base.metadata.create_all(engine)
+    run_migrations(engine)
@@ -0,0 +1,53 @@
+# Maintenance of the member_balances ledger
+
+from uuid import UUID
+
+from domain.services import calculate_group_balance_columnar
+from infrastructure.db.models import GroupDB, MemberBalanceDB
+from infrastructure.db.repository import SQLAlchemyGroupRepository, SQLAlchemyExpenseRepository
+
+TOLERANCE = 1e-6
+
+
+def _group_ids(session, group_id: str | None) -> list[str]:
+    if group_id:
+        return [group_id]
+    return [str(gid) for (gid,) in session.query(GroupDB.id).all()]
+
+
+def verify_ledger(session, group_id: str | None = None) -> list[tuple[str, str, float, float]]:
+    """
+    Compares the ledger against a full replay of every group's expenses.
+    Returns the mismatches as (group_id, username, ledger_balance, replayed_balance).
+    """
+    group_repo = SQLAlchemyGroupRepository(session)
+    expense_repo = SQLAlchemyExpenseRepository(session)
+
+    mismatches = []
+    for gid in _group_ids(session, group_id):
+        ledger = group_repo.get_balances(gid)
+        replayed = calculate_group_balance_columnar(expense_repo, gid)
+        for member, balance in replayed.items():
+            if abs(ledger.get(member, 0.0) - balance) > TOLERANCE:
+                mismatches.append((gid, member.username, ledger.get(member, 0.0), balance))
+    return mismatches
+
+
+def rebuild_ledger(session, group_id: str | None = None) -> int:
+    """
+    Rewrites the ledger from the balances aggregated in the database.
+    Returns the number of groups rebuilt.
+    """
+    expense_repo = SQLAlchemyExpenseRepository(session)
+
+    group_ids = _group_ids(session, group_id)
+    for gid in group_ids:
+        group_uuid = UUID(gid)
+        balances = expense_repo.aggregate_balances(gid)
+        session.query(MemberBalanceDB).filter_by(group_id=group_uuid).delete()
+        session.add_all([
+            MemberBalanceDB(member_id=member.id, group_id=group_uuid, balance=balance)
+            for member, balance in balances.items()
+        ])
+    session.commit()
+    return len(group_ids)
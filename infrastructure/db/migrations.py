@@ -0,0 +1,94 @@
+# Versioned schema migrations
+#
+# A fresh database is created from the models and stamped with every version.
+# An existing one is brought forward by running, in order, the steps missing
+# from schema_migrations. Steps check what is already there, so they also work
+# on databases created by create_all at any earlier point.
+
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+from infrastructure.db.ledger import rebuild_ledger
+from infrastructure.db.models import Base, GroupDB, MemberBalanceDB, MemberDB, SchemaMigrationDB
+
+
+def _add_group_version(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("groups")}
+    if "version" not in columns:
+        conn.execute(text("ALTER TABLE groups ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+
+
+def _add_member_balances(conn: Connection) -> None:
+    if inspect(conn).has_table(MemberBalanceDB.__tablename__):
+        return
+    conn.execute(CreateTable(MemberBalanceDB.__table__))
+    # Joins the migration transaction, its commit does not end it
+    with Session(bind=conn) as session:
+        rebuild_ledger(session)
+
+
+def _add_secondary_indexes(conn: Connection) -> None:
+    duplicate = conn.execute(
+        select(MemberDB.group_id, MemberDB.username)
+        .group_by(MemberDB.group_id, MemberDB.username)
+        .having(func.count() > 1)
+    ).first()
+    if duplicate:
+        raise RuntimeError(
+            f"Group {duplicate.group_id} has more than one member named '{duplicate.username}', "
+            "rename them before adding the unique index"
+        )
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+# (version, name, step), never reorder or renumber
+MIGRATIONS = [
+    (1, "add groups.version", _add_group_version),
+    (2, "add member_balances ledger", _add_member_balances),
+    (3, "add secondary indexes", _add_secondary_indexes),
+]
+
+
+def current_version(engine: Engine) -> int:
+    if not inspect(engine).has_table(SchemaMigrationDB.__tablename__):
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(SchemaMigrationDB.version))).scalar() or 0
+
+
+def _stamp(conn: Connection, version: int, name: str) -> None:
+    conn.execute(insert(SchemaMigrationDB).values(version=version, name=name))
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """
+    Creates or upgrades the schema. Returns the versions applied by this call.
+    """
+    if not inspect(engine).has_table(GroupDB.__tablename__):
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for version, name, _ in MIGRATIONS:
+                _stamp(conn, version, name)
+        return []
+
+    SchemaMigrationDB.__table__.create(engine, checkfirst=True)
+    applied = []
+    for version, name, step in MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                done = conn.execute(
+                    select(SchemaMigrationDB.version).where(SchemaMigrationDB.version == version)
+                ).first()
+                if done:
+                    continue
+                step(conn)
+                _stamp(conn, version, name)
+        except IntegrityError:
+            # Another worker stamped this version first
+            continue
+        applied.append(version)
+    return applied
@@ -1,9 +1,10 @@
 import uuid
-from sqlalchemy import String, Float, ForeignKey
+from sqlalchemy import String, Float, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
+from typing import Optional
 
 Base = declarative_base()
 
@@ -35,6 +36,8 @@ class GroupDB(Base):
             default=datetime.now(),
             onupdate=datetime.now()
         )
+    # Bumped by every member and expense write, identifies a snapshot of the group
+    version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
     # Users that own this group
     owners: Mapped[list["GroupOwnerDB"]] = relationship(
         back_populates="group", cascade="all, delete-orphan"
@@ -60,6 +63,10 @@ class GroupOwnerDB(Base):
     Composite primary key: (group_id, user_id)
     """
     __tablename__ = "group_owners"
+    __table_args__ = (
+        # Groups of an owner, the primary key only covers lookups by group
+        Index("ix_group_owners_user_id", "user_id"),
+    )
 
     group_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("groups.id"), primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
@@ -76,6 +83,10 @@ class MemberDB(Base):
     A member can participate in expenses as debtor and/or creditor.
     """
     __tablename__ = "members"
+    __table_args__ = (
+        # Usernames are unique within a group, also serves lookups by group
+        Index("uq_members_group_id_username", "group_id", "username", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     username: Mapped[str] = mapped_column(String(30), nullable=False)
@@ -94,6 +105,30 @@ class MemberDB(Base):
         back_populates="member", cascade="all, delete-orphan"
     )
 
+    # Running balance of this member within its group
+    balance: Mapped[Optional["MemberBalanceDB"]] = relationship(
+        back_populates="member", cascade="all, delete-orphan"
+    )
+
+
+class MemberBalanceDB(Base):
+    """
+    Persisted balance of a member within its group.
+    Kept up to date by applying the delta of every expense write,
+    so balances can be read without replaying the group's expenses.
+    """
+    __tablename__ = "member_balances"
+    __table_args__ = (
+        Index("ix_member_balances_group_id", "group_id"),
+    )
+
+    member_id: Mapped[int] = mapped_column(ForeignKey("members.id"), primary_key=True)
+    group_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("groups.id"), nullable=False)
+    balance: Mapped[float] = mapped_column(nullable=False, default=0.0)
+
+    # The member this balance belongs to
+    member: Mapped["MemberDB"] = relationship(back_populates="balance")
+
 
 class ExpenseDB(Base):
     """
@@ -101,6 +136,10 @@ class ExpenseDB(Base):
     It has a total amount and can have multiple creditors and debtors.
     """
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Expenses of a group in id order, as read by keyset pagination
+        Index("ix_expenses_group_id_id", "group_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     description: Mapped[str] = mapped_column(String)
@@ -128,6 +167,9 @@ class ExpenseCreditorDB(Base):
     Composite primary key: (expense_id, member_id)
     """
     __tablename__ = "expense_creditors"
+    __table_args__ = (
+        Index("ix_expense_creditors_member_id", "member_id"),
+    )
 
     expense_id: Mapped[int] = mapped_column(ForeignKey("expenses.id"), primary_key=True)
     member_id: Mapped[int] = mapped_column(ForeignKey("members.id"), primary_key=True)
@@ -146,6 +188,9 @@ class ExpenseDebtorDB(Base):
     Composite primary key: (expense_id, member_id)
     """
     __tablename__ = "expense_debtors"
+    __table_args__ = (
+        Index("ix_expense_debtors_member_id", "member_id"),
+    )
 
     expense_id: Mapped[int] = mapped_column(ForeignKey("expenses.id"), primary_key=True)
     member_id: Mapped[int] = mapped_column(ForeignKey("members.id"), primary_key=True)
@@ -154,3 +199,15 @@ class ExpenseDebtorDB(Base):
     expense: Mapped["ExpenseDB"] = relationship(back_populates="debtors")
     # The member who owes
     member: Mapped["MemberDB"] = relationship(back_populates="debtor_expenses")
+
+
+class SchemaMigrationDB(Base):
+    """
+    Records the migrations applied to the database.
+    See infrastructure.db.migrations.
+    """
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.now)
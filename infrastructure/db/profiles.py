@@ -0,0 +1,73 @@
+# Engine profiles
+#
+# A profile bundles the pool settings and SQLite pragmas suited to one way of
+# running the app. It is selected with Config.DB_ENGINE_PROFILE.
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+ENGINE_PROFILES = {
+    # Local development: default pool, waits on locks instead of failing
+    "dev": {
+        "engine": {},
+        "pragmas": {
+            "busy_timeout": 5000,
+        },
+    },
+    # Several gunicorn workers sharing one SQLite file
+    "production-sqlite": {
+        "engine": {
+            "pool_size": 10,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+        },
+        "pragmas": {
+            "journal_mode": "WAL",  # readers no longer wait for writers
+            "synchronous": "NORMAL",  # fsync on checkpoints, not on every commit
+            "mmap_size": 256 * 1024 * 1024,
+            "busy_timeout": 5000,
+            "cache_size": -64 * 1024,  # in KiB when negative
+        },
+    },
+    # Pooled connections to a server that may drop idle ones
+    "production-postgres": {
+        "engine": {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True,
+        },
+        "pragmas": {},
+    },
+}
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def create_profiled_engine(database_url: str, profile: str, echo: bool = False) -> Engine:
+    """
+    Builds the engine for a database URL with the settings of the named profile.
+    Pool sizing is skipped for in-memory SQLite, which keeps one connection per thread,
+    and pragmas are only applied to SQLite connections.
+    """
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown engine profile '{profile}', expected one of {sorted(ENGINE_PROFILES)}")
+    settings = ENGINE_PROFILES[profile]
+    url = make_url(database_url)
+
+    engine_options = {} if _is_memory_sqlite(url) else dict(settings["engine"])
+    engine = create_engine(url, echo=echo, **engine_options)
+
+    pragmas = settings["pragmas"]
+    if url.get_backend_name() == "sqlite" and pragmas:
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return engine
@@ -1,21 +1,56 @@
 # SQLAlchemy Implementations of Repository Interfaces
-
+#
+# Repositories only flush their changes, the unit of work of the request commits them.
+#
+# Writes go through the ORM. Reads select only the columns they need from the tables with
+# Core statements and map the tuples straight into domain models, so no ORM instance,
+# identity map entry or attribute state is created per row. Core statements do not
+# autoflush, which is safe as every write flushes before returning.
+
+from typing import Iterator
 from uuid import UUID
 
 from flask import session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Float, bindparam, cast, exists, func, insert, literal, null, or_, select, union_all, update
+from sqlalchemy.orm.util import identity_key
 from application.ports import UserRepository, GroupRepository, ExpenseRepository, MemberRepository
-from domain.models import User, Group, Expense, Member
+from application.tracing import traced_methods
+from domain.models import User, Group, GroupSummary, Expense, ExpenseColumns, Member
+from domain.services import build_expense_columns, expense_balance_deltas
 from infrastructure.db.models import (
     UserDB,
     GroupDB,
     GroupOwnerDB,
     MemberDB,
+    MemberBalanceDB,
     ExpenseDB,
     ExpenseCreditorDB,
     ExpenseDebtorDB,
 )
 
+_groups = GroupDB.__table__
+_group_owners = GroupOwnerDB.__table__
+_members = MemberDB.__table__
+_expenses = ExpenseDB.__table__
+_expense_creditors = ExpenseCreditorDB.__table__
+_expense_debtors = ExpenseDebtorDB.__table__
+
+_member_columns = (_members.c.id, _members.c.username, _members.c.group_id)
+_expense_columns = (_expenses.c.id, _expenses.c.description, _expenses.c.total_amount, _expenses.c.group_id)
+
+
+def _to_member(row) -> Member:
+    member_id, username, group_id = row
+    return Member(id=member_id, username=username, group_id=group_id)
+
+
+def _to_expense(row) -> Expense:
+    expense_id, description, total_amount, group_id = row
+    return Expense(id=expense_id, description=description, total_amount=total_amount, group_id=group_id)
 
+
+@traced_methods
 class SQLAlchemyUserRepository(UserRepository):
     """
     SQLAlchemy implementation of the UserRepository.
@@ -31,10 +66,11 @@ class SQLAlchemyUserRepository(UserRepository):
     def add(self, user: User) -> None:
         db_user = UserDB()
         self.session.add(db_user)
-        self.session.commit()
+        self.session.flush()
         user.id = db_user.id
 
 
+@traced_methods
 class SQLAlchemyMemberRepository(MemberRepository):
     """
     SQLAlchemy implementation of the MemberRepository.
@@ -49,12 +85,17 @@ class SQLAlchemyMemberRepository(MemberRepository):
 
     def add(self, member: Member, group_id: str) -> None:
         group_uuid = UUID(group_id)  # Convert string to UUID instance
-        db_member = MemberDB(username=member.username, group_id=group_uuid)
+        db_member = MemberDB(
+            username=member.username,
+            group_id=group_uuid,
+            balance=MemberBalanceDB(group_id=group_uuid, balance=0.0),
+        )
         self.session.add(db_member)
-        self.session.commit()
+        _flush_member(self.session, group_uuid)
         member.id = db_member.id
 
 
+@traced_methods
 class SQLAlchemyGroupRepository(GroupRepository):
     """
     SQLAlchemy implementation of the GroupRepository.
@@ -63,61 +104,72 @@ class SQLAlchemyGroupRepository(GroupRepository):
     def __init__(self, session):
         self.session = session
 
+    def _with_participants(self, rows) -> list[Group]:
+        # Owners and members of all the groups, one statement each
+        groups = {group_id: Group(id=group_id, name=name) for group_id, name in rows}
+        if not groups:
+            return []
+
+        owner_rows = self.session.execute(
+            select(_group_owners.c.group_id, _group_owners.c.user_id).where(_group_owners.c.group_id.in_(groups))
+        )
+        for group_id, user_id in owner_rows:
+            groups[group_id].owners.append(User(id=user_id))
+
+        member_rows = self.session.execute(
+            select(*_member_columns).where(_members.c.group_id.in_(groups)).order_by(_members.c.id)
+        )
+        for row in member_rows:
+            groups[row.group_id].members.append(_to_member(row))
+        return list(groups.values())
+
     def get_by_id(self, group_id: str) -> Group | None:
         group_uuid = UUID(group_id)  # Convert string to UUID instance
 
-        db_group = self.session.query(GroupDB).filter_by(id=group_uuid).first()
-        if not db_group:
-            return None
-        return Group(
-            id=db_group.id,
-            name=db_group.name,
-            owners=[User(id=gp.user_id) for gp in db_group.owners],
-            members=[
-                Member(id=m.id, username=m.username, group_id=m.group_id) for m in db_group.members
-            ]
-        )
+        row = self.session.execute(select(_groups.c.id, _groups.c.name).where(_groups.c.id == group_uuid)).first()
+        return self._with_participants([row])[0] if row else None
 
     def get_groups_by_owner_id(self, owner_id: str) -> list[Group]:
-        db_groups_owners = self.session.query(GroupOwnerDB).filter_by(user_id=owner_id).all()
-        db_groups = []
-        for db_group_owner in db_groups_owners:
-            db_group = self.session.query(GroupDB).filter_by(id=db_group_owner.group_id).first()
-            if db_group:
-                db_groups.append(db_group)
-
-        return [Group(
-            id=db_group.id,
-            name=db_group.name,
-            owners=[User(id=gp.user_id) for gp in db_group.owners],
-            members=[
-                Member(id=m.id, username=m.username, group_id=m.group_id) for m in db_group.members
-            ]) for db_group in db_groups]
-
-    def get_by_expense_id(self, expense_id:str) -> Group | None:
-        db_expense = self.session.query(ExpenseDB).filter_by(id=expense_id).first()
-        db_group = self.session.query(GroupDB).filter_by(id=db_expense.group_id).first()
-        if not db_group:
-            return 
-        return Group(
-            id=db_group.id,
-            name=db_group.name,
-            owners=[User(id=gp.user_id) for gp in db_group.owners],
-            members=[
-                Member(id=m.id, username=m.username, group_id=m.group_id) for m in db_group.members
-            ])
+        rows = self.session.execute(
+            select(_groups.c.id, _groups.c.name)
+            .join(_group_owners, _group_owners.c.group_id == _groups.c.id)
+            .where(_group_owners.c.user_id == owner_id)
+        ).all()
+        return self._with_participants(rows)
+
+    def get_group_summaries_by_owner_id(self, owner_id: str) -> list[GroupSummary]:
+        rows = self.session.execute(
+            select(_groups.c.id, _groups.c.name, func.count(_members.c.id))
+            .join(_group_owners, _group_owners.c.group_id == _groups.c.id)
+            .outerjoin(_members, _members.c.group_id == _groups.c.id)
+            .where(_group_owners.c.user_id == owner_id)
+            .group_by(_groups.c.id, _groups.c.name)
+        )
+        return [GroupSummary(id=group_id, name=name, member_count=member_count) for group_id, name, member_count in rows]
+
+    def get_by_expense_id(self, expense_id: str) -> Group | None:
+        row = self.session.execute(
+            select(_groups.c.id, _groups.c.name)
+            .join(_expenses, _expenses.c.group_id == _groups.c.id)
+            .where(_expenses.c.id == expense_id)
+        ).first()
+        return self._with_participants([row])[0] if row else None
 
     def add(self, group: Group) -> None:
         db_group = GroupDB(name=group.name)
         self.session.add(db_group)
-        self.session.commit()
+        self.session.flush()
         group.id = str(db_group.id)
 
     def add_member(self, group_id: str, member: Member) -> None:
         group_uuid = UUID(group_id)  # Convert string to UUID instance
-        db_member = MemberDB(username=member.username, group_id=group_uuid)
+        db_member = MemberDB(
+            username=member.username,
+            group_id=group_uuid,
+            balance=MemberBalanceDB(group_id=group_uuid, balance=0.0),
+        )
         self.session.add(db_member)
-        self.session.commit()
+        _flush_member(self.session, group_uuid)
         member.id = db_member.id
 
     def update_member_name(self, group_id: str, old_name: str, new_name: str) -> None:
@@ -131,20 +183,59 @@ class SQLAlchemyGroupRepository(GroupRepository):
 
         if db_member:
             db_member.username = new_name
-            self.session.commit()
+            _flush_member(self.session, group_uuid)
+
+    def get_version(self, group_id: str) -> int | None:
+        group_uuid = UUID(group_id)  # Convert string to UUID instance
+        return self.session.query(GroupDB.version).filter_by(id=group_uuid).scalar()
 
     def get_members(self, group_id: str) -> list[Member]:
         group_uuid = UUID(group_id)  # Convert string to UUID instance
 
-        members = self.session.query(MemberDB).filter_by(group_id=group_uuid).all()
-        return [Member(id=m.id, username=m.username, group_id=m.group_id) for m in members]
+        rows = self.session.execute(select(*_member_columns).where(_members.c.group_id == group_uuid).order_by(_members.c.id))
+        return [_to_member(row) for row in rows]
+
+    def get_member_by_username(self, group_id: str, username: str) -> Member | None:
+        group_uuid = UUID(group_id)  # Convert string to UUID instance
+
+        row = self.session.execute(
+            select(*_member_columns).where(_members.c.group_id == group_uuid, _members.c.username == username)
+        ).first()
+        return _to_member(row) if row else None
+
+    def has_member_username(self, group_id: str, username: str) -> bool:
+        group_uuid = UUID(group_id)  # Convert string to UUID instance
+
+        # Answered from the unique (group_id, username) index alone
+        query = exists().where(MemberDB.group_id == group_uuid, MemberDB.username == username)
+        return self.session.execute(select(query)).scalar()
+
+    def exists(self, group_id: str) -> bool:
+        group_uuid = UUID(group_id)  # Convert string to UUID instance
+        return self.session.execute(select(exists().where(GroupDB.id == group_uuid))).scalar()
+
+    def get_balances(self, group_id: str) -> dict[Member, float]:
+        group_uuid = UUID(group_id)  # Convert string to UUID instance
+
+        rows = (
+            self.session.query(MemberDB.id, MemberDB.username, MemberDB.group_id, MemberBalanceDB.balance)
+            .outerjoin(MemberBalanceDB, MemberBalanceDB.member_id == MemberDB.id)
+            .filter(MemberDB.group_id == group_uuid)
+            .all()
+        )
+        # Rounded to drop the float noise that accumulates from incremental deltas
+        return {
+            Member(id=member_id, username=username, group_id=member_group_id): round(balance or 0.0, 9)
+            for member_id, username, member_group_id, balance in rows
+        }
 
     def remove_member(self, group_id: str, member: Member) -> None:
         group_uuid = UUID(group_id)  # Convert string to UUID instance
         db_member = self.session.query(MemberDB).filter_by(id=member.id, group_id=group_uuid).first()
         if db_member:
             self.session.delete(db_member)
-            self.session.commit()
+            _bump_group_version(self.session, group_uuid)
+            self.session.flush()
 
     def add_owner(self, group_id: str, owner: User) -> None:
         group_uuid = UUID(group_id)  # Convert string to UUID instance
@@ -158,19 +249,17 @@ class SQLAlchemyGroupRepository(GroupRepository):
 
         db_owner = GroupOwnerDB(group_id=group_uuid, user_id=db_user.id)
         self.session.add(db_owner)
-        self.session.commit()
+        _bump_group_version(self.session, group_uuid)
+        self.session.flush()
 
     def get_owners(self, group_id: str) -> list[User]:
         group_uuid = UUID(group_id)  # Convert string to UUID instance
 
-        owners = (
-            self.session.query(GroupOwnerDB)
-            .filter_by(group_id=group_uuid)
-            .all()
-        )
-        return [User(id=o.user.id) for o in owners]
+        rows = self.session.execute(select(_group_owners.c.user_id).where(_group_owners.c.group_id == group_uuid))
+        return [User(id=user_id) for (user_id,) in rows]
 
 
+@traced_methods
 class SQLAlchemyExpenseRepository(ExpenseRepository):
     """
     SQLAlchemy implementation of the ExpenseRepository.
@@ -179,17 +268,44 @@ class SQLAlchemyExpenseRepository(ExpenseRepository):
     def __init__(self, session):
         self.session = session
 
-    def get_by_id(self, expense_id: str) -> Expense | None:
-        db_expense = self.session.query(ExpenseDB).filter_by(id=expense_id).first()
-        if not db_expense:
+    def _apply_balance_deltas(self, group_uuid: UUID, deltas: dict[int, float]) -> None:
+        """
+        Adds each member's delta to the member_balances ledger inside the current transaction.
+        """
+        deltas = {member_id: delta for member_id, delta in deltas.items() if delta}
+        if not deltas:
             return
-        return Expense(
-            id=db_expense.id,
-            description=db_expense.description,
-            total_amount=db_expense.total_amount,
-            group_id=db_expense.group_id,
+
+        existing = {
+            member_id for (member_id,) in self.session.query(MemberBalanceDB.member_id)
+            .filter(MemberBalanceDB.member_id.in_(deltas))
+        }
+        for member_id in deltas.keys() - existing:
+            self.session.add(MemberBalanceDB(member_id=member_id, group_id=group_uuid, balance=0.0))
+        self.session.flush()
+
+        balances = MemberBalanceDB.__table__
+        self.session.execute(
+            update(balances)
+            .where(balances.c.member_id == bindparam("b_member_id"))
+            .values(balance=balances.c.balance + bindparam("b_delta")),
+            [{"b_member_id": member_id, "b_delta": delta} for member_id, delta in deltas.items()],
+        )
+
+    def _stored_balance_deltas(self, db_expense: ExpenseDB) -> dict[int, float]:
+        """
+        Balance contribution of an expense as currently stored in the database.
+        """
+        return expense_balance_deltas(
+            db_expense.total_amount,
+            [(c.member_id, c.amount) for c in db_expense.creditors],
+            [d.member_id for d in db_expense.debtors],
         )
 
+    def get_by_id(self, expense_id: str) -> Expense | None:
+        row = self.session.execute(select(*_expense_columns).where(_expenses.c.id == expense_id)).first()
+        return _to_expense(row) if row else None
+
     def add(self, expense: Expense) -> None:
         db_expense = ExpenseDB(
             description=expense.description,
@@ -214,14 +330,71 @@ class SQLAlchemyExpenseRepository(ExpenseRepository):
                 amount=amount
             ))
 
-        self.session.commit()
+        self._apply_balance_deltas(db_expense.group_id, expense_balance_deltas(
+            expense.total_amount,
+            [(member.id, amount) for member, amount in expense.creditors],
+            [debtor.id for debtor in expense.debtors],
+        ))
+        _bump_group_version(self.session, db_expense.group_id)
+
+        self.session.flush()
         expense.id = db_expense.id
 
+    def add_many(self, expenses: list[Expense]) -> None:
+        if not expenses:
+            return
+
+        # Executemany-style inserts, ids come back in parameter order
+        expense_ids = self.session.scalars(
+            insert(ExpenseDB).returning(ExpenseDB.id, sort_by_parameter_order=True),
+            [
+                {
+                    "description": expense.description,
+                    "total_amount": expense.total_amount,
+                    "group_id": UUID(expense.group_id),
+                }
+                for expense in expenses
+            ],
+        ).all()
+        for expense, expense_id in zip(expenses, expense_ids):
+            expense.id = expense_id
+
+        debtor_rows = [
+            {"expense_id": expense.id, "member_id": debtor.id}
+            for expense in expenses for debtor in expense.debtors
+        ]
+        creditor_rows = [
+            {"expense_id": expense.id, "member_id": member.id, "amount": amount}
+            for expense in expenses for member, amount in expense.creditors
+        ]
+        if debtor_rows:
+            self.session.execute(insert(ExpenseDebtorDB), debtor_rows)
+        if creditor_rows:
+            self.session.execute(insert(ExpenseCreditorDB), creditor_rows)
+
+        deltas_by_group: dict[UUID, dict[int, float]] = {}
+        for expense in expenses:
+            group_deltas = deltas_by_group.setdefault(UUID(expense.group_id), {})
+            for member_id, delta in expense_balance_deltas(
+                expense.total_amount,
+                [(member.id, amount) for member, amount in expense.creditors],
+                [debtor.id for debtor in expense.debtors],
+            ).items():
+                group_deltas[member_id] = group_deltas.get(member_id, 0.0) + delta
+        for group_uuid, deltas in deltas_by_group.items():
+            self._apply_balance_deltas(group_uuid, deltas)
+            _bump_group_version(self.session, group_uuid)
+
+        self.session.flush()
+
     def update(self, expense: Expense) -> None:
         db_expense = self.session.query(ExpenseDB).filter_by(id=expense.id).first()
         if not db_expense:
             raise ValueError("Expense not found")
 
+        # Undo the previous contribution to the balances
+        deltas = {member_id: -delta for member_id, delta in self._stored_balance_deltas(db_expense).items()}
+
         # Update simple fields
         db_expense.description = expense.description
         db_expense.total_amount = expense.total_amount
@@ -244,40 +417,255 @@ class SQLAlchemyExpenseRepository(ExpenseRepository):
                 amount=amount
             ))
 
-        self.session.commit()
+        new_deltas = expense_balance_deltas(
+            expense.total_amount,
+            [(member.id, amount) for member, amount in expense.creditors],
+            [debtor.id for debtor in expense.debtors],
+        )
+        for member_id, delta in new_deltas.items():
+            deltas[member_id] = deltas.get(member_id, 0.0) + delta
+        self._apply_balance_deltas(db_expense.group_id, deltas)
+        _bump_group_version(self.session, db_expense.group_id)
+
+        self.session.flush()
 
     def remove(self, expense_id: str) -> None:
         db_expense = self.session.query(ExpenseDB).filter_by(id=expense_id).first()
         if db_expense:
+            deltas = {member_id: -delta for member_id, delta in self._stored_balance_deltas(db_expense).items()}
+            self._apply_balance_deltas(db_expense.group_id, deltas)
+            _bump_group_version(self.session, db_expense.group_id)
             self.session.delete(db_expense)
-            self.session.commit()
+            self.session.flush()
 
 
-    def list_by_group(self, group_id: str) -> list[Expense]:
+    def iter_by_group(self, group_id: str, batch_size: int = 1000) -> Iterator[Expense]:
         group_uuid = UUID(group_id)
-        expenses = self.session.query(ExpenseDB).filter_by(group_id=group_uuid).all()
-        result = []
-
-        for e in expenses:
-            creditors = []
-            for c in e.creditors:
-                db_member = self.session.query(MemberDB).filter_by(id=c.member_id).first()
-                creditors.append(
-                    (Member(id=db_member.id, username=db_member.username, group_id=db_member.group_id), c.amount)
+
+        # Each branch only reads the links of the group, through the expenses index
+        links = union_all(
+            select(
+                ExpenseCreditorDB.expense_id,
+                ExpenseCreditorDB.member_id,
+                ExpenseCreditorDB.amount.label("amount"),
+                literal("creditor").label("role"),
+            )
+            .join(ExpenseDB, ExpenseDB.id == ExpenseCreditorDB.expense_id)
+            .where(ExpenseDB.group_id == group_uuid),
+            select(
+                ExpenseDebtorDB.expense_id,
+                ExpenseDebtorDB.member_id,
+                cast(null(), Float).label("amount"),
+                literal("debtor").label("role"),
+            )
+            .join(ExpenseDB, ExpenseDB.id == ExpenseDebtorDB.expense_id)
+            .where(ExpenseDB.group_id == group_uuid),
+        ).subquery()
+
+        # One ordered statement streamed from a server-side cursor, one row per participant
+        rows = self.session.execute(
+            select(
+                ExpenseDB.id,
+                ExpenseDB.description,
+                ExpenseDB.total_amount,
+                ExpenseDB.group_id,
+                links.c.role,
+                links.c.amount,
+                MemberDB.id,
+                MemberDB.username,
+            )
+            .outerjoin(links, links.c.expense_id == ExpenseDB.id)
+            .outerjoin(MemberDB, MemberDB.id == links.c.member_id)
+            .where(ExpenseDB.group_id == group_uuid)
+            .order_by(ExpenseDB.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        members = {}
+        expense = None
+        for expense_id, description, total_amount, expense_group_id, role, amount, member_id, username in rows:
+            if expense is None or expense.id != expense_id:
+                if expense is not None:
+                    yield expense
+                expense = Expense(
+                    id=expense_id,
+                    description=description,
+                    total_amount=total_amount,
+                    group_id=expense_group_id,
                 )
+            if member_id is None:
+                continue
+            if member_id not in members:
+                members[member_id] = Member(id=member_id, username=username, group_id=expense_group_id)
+            if role == "creditor":
+                expense.creditors.append((members[member_id], amount))
+            else:
+                expense.debtors.append(members[member_id])
+        if expense is not None:
+            yield expense
+
+    def member_has_expenses(self, member_id: int) -> bool:
+        # Two index probes on the member_id columns, no expense is loaded
+        as_creditor = exists().where(ExpenseCreditorDB.member_id == member_id)
+        as_debtor = exists().where(ExpenseDebtorDB.member_id == member_id)
+        return self.session.execute(select(or_(as_creditor, as_debtor))).scalar()
+
+    def aggregate_balances(self, group_id: str) -> dict[Member, float]:
+        group_uuid = UUID(group_id)
 
-            debtors = []
-            for d in e.debtors:
-                db_member = self.session.query(MemberDB).filter_by(id=d.member_id).first()
-                debtors.append(Member(id=db_member.id, username=db_member.username, group_id=db_member.group_id))
-
-            result.append(Expense(
-                id=e.id,
-                description=e.description,
-                total_amount=e.total_amount,
-                group_id=e.group_id,
-                creditors=creditors,
-                debtors=debtors
-            ))
+        credited = (
+            select(ExpenseCreditorDB.member_id, func.sum(ExpenseCreditorDB.amount).label("total"))
+            .join(ExpenseDB, ExpenseDB.id == ExpenseCreditorDB.expense_id)
+            .where(ExpenseDB.group_id == group_uuid)
+            .group_by(ExpenseCreditorDB.member_id)
+            .subquery()
+        )
+        debtor_counts = (
+            select(ExpenseDebtorDB.expense_id, func.count().label("debtor_count"))
+            .join(ExpenseDB, ExpenseDB.id == ExpenseDebtorDB.expense_id)
+            .where(ExpenseDB.group_id == group_uuid)
+            .group_by(ExpenseDebtorDB.expense_id)
+            .subquery()
+        )
+        owed = (
+            select(
+                ExpenseDebtorDB.member_id,
+                func.sum(ExpenseDB.total_amount / cast(debtor_counts.c.debtor_count, Float)).label("total"),
+            )
+            .join(ExpenseDB, ExpenseDB.id == ExpenseDebtorDB.expense_id)
+            .join(debtor_counts, debtor_counts.c.expense_id == ExpenseDebtorDB.expense_id)
+            .group_by(ExpenseDebtorDB.member_id)
+            .subquery()
+        )
+
+        rows = self.session.execute(
+            select(
+                MemberDB.id,
+                MemberDB.username,
+                MemberDB.group_id,
+                func.coalesce(credited.c.total, 0.0) - func.coalesce(owed.c.total, 0.0),
+            )
+            .outerjoin(credited, credited.c.member_id == MemberDB.id)
+            .outerjoin(owed, owed.c.member_id == MemberDB.id)
+            .where(MemberDB.group_id == group_uuid)
+        )
+        return {
+            Member(id=member_id, username=username, group_id=member_group_id): balance
+            for member_id, username, member_group_id, balance in rows
+        }
+
+    def get_expense_columns(self, group_id: str) -> ExpenseColumns:
+        group_uuid = UUID(group_id)
+
+        members = [
+            Member(id=member_id, username=username, group_id=member_group_id)
+            for member_id, username, member_group_id in self.session.execute(
+                select(MemberDB.id, MemberDB.username, MemberDB.group_id).where(MemberDB.group_id == group_uuid)
+            )
+        ]
+        expenses = self.session.execute(
+            select(_expenses.c.id, _expenses.c.total_amount).where(_expenses.c.group_id == group_uuid)
+        ).tuples().all()
+        creditor_links = self.session.execute(
+            select(_expense_creditors.c.expense_id, _expense_creditors.c.member_id, _expense_creditors.c.amount)
+            .join(_expenses, _expenses.c.id == _expense_creditors.c.expense_id)
+            .where(_expenses.c.group_id == group_uuid)
+        ).tuples().all()
+        debtor_links = self.session.execute(
+            select(_expense_debtors.c.expense_id, _expense_debtors.c.member_id)
+            .join(_expenses, _expenses.c.id == _expense_debtors.c.expense_id)
+            .where(_expenses.c.group_id == group_uuid)
+        ).tuples().all()
+        return build_expense_columns(members, expenses, creditor_links, debtor_links)
+
+    def list_by_group(self, group_id: str, limit: int | None = None, after_id: int | None = None) -> list[Expense]:
+        group_uuid = UUID(group_id)
 
-        return result
+        # Four statements regardless of group size: members, expenses, creditor and debtor links.
+        members = {
+            row.id: _to_member(row)
+            for row in self.session.execute(select(*_member_columns).where(_members.c.group_id == group_uuid))
+        }
+
+        expenses_query = select(*_expense_columns).where(_expenses.c.group_id == group_uuid).order_by(_expenses.c.id)
+        # Keyset pagination: a page starts right after the last expense id of the previous one
+        if after_id is not None:
+            expenses_query = expenses_query.where(_expenses.c.id > after_id)
+        if limit is not None:
+            expenses_query = expenses_query.limit(limit)
+
+        result = {row.id: _to_expense(row) for row in self.session.execute(expenses_query)}
+        if not result:
+            return []
+
+        # Only the links of the expenses in the page
+        in_page = _expenses.c.id.between(min(result), max(result))
+
+        creditor_rows = self.session.execute(
+            select(_expense_creditors.c.expense_id, _expense_creditors.c.member_id, _expense_creditors.c.amount)
+            .join(_expenses, _expenses.c.id == _expense_creditors.c.expense_id)
+            .where(_expenses.c.group_id == group_uuid, in_page)
+        )
+        for expense_id, member_id, amount in creditor_rows:
+            result[expense_id].creditors.append((members[member_id], amount))
+
+        debtor_rows = self.session.execute(
+            select(_expense_debtors.c.expense_id, _expense_debtors.c.member_id)
+            .join(_expenses, _expenses.c.id == _expense_debtors.c.expense_id)
+            .where(_expenses.c.group_id == group_uuid, in_page)
+        )
+        for expense_id, member_id in debtor_rows:
+            result[expense_id].debtors.append(members[member_id])
+
+        return list(result.values())
+
+
+def _flush_member(session, group_uuid: UUID) -> None:
+    """
+    Writes a new or renamed member, turning a clash with the unique
+    (group_id, username) index into the error the services raise.
+    """
+    try:
+        _bump_group_version(session, group_uuid)
+        session.flush()
+    except IntegrityError as e:
+        if _is_member_username_clash(e):
+            raise ValueError("A member with the new name already exists in the group") from e
+        raise
+
+
+def _is_member_username_clash(error: IntegrityError) -> bool:
+    # Postgres names the violated index, SQLite only lists its columns
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint is not None:
+        return constraint == "uq_members_group_id_username"
+    return "UNIQUE constraint failed: members.group_id, members.username" in str(error.orig)
+
+
+def _bump_group_version(session, group_uuid: UUID) -> None:
+    """
+    Marks the group as changed within the current transaction.
+    """
+    groups = GroupDB.__table__
+    session.execute(
+        update(groups).where(groups.c.id == group_uuid).values(version=groups.c.version + 1)
+    )
+    session.info.setdefault("changed_groups", set()).add(group_uuid)
+    _expire_group(session, group_uuid)
+
+
+def has_pending_group_changes(session, group_id: str) -> bool:
+    """
+    Whether the session changed the group in a transaction that may not be committed yet.
+    """
+    return UUID(str(group_id)) in session.info.get("changed_groups", ())
+
+
+def _expire_group(session, group_uuid: UUID) -> None:
+    """
+    Drops the loaded state of the group, if any, so later reads in the same
+    unit of work see members and owners that were added through their foreign key.
+    """
+    db_group = session.identity_map.get(identity_key(GroupDB, group_uuid))
+    if db_group is not None:
+        session.expire(db_group)
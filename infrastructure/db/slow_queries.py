@@ -0,0 +1,198 @@
+# Slow query log
+#
+# Statements running longer than a threshold are written to a rotating log as JSON
+# lines, with their parameters, the code and route that issued them and the query plan
+# of the database. `flask db slow-queries` sums the log up by statement.
+
+import json
+import logging
+import re
+import sys
+import time
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from infrastructure.cache import LRUCache
+
+MAX_PARAMETERS_LENGTH = 500
+
+# Frames of these modules are skipped when looking for the code that issued a statement
+_PLUMBING_MODULES = ("sqlalchemy.", "application.tracing", "infrastructure.metrics", __name__)
+
+_recorders: "weakref.WeakKeyDictionary[Engine, SlowQueryRecorder]" = weakref.WeakKeyDictionary()
+
+
+def _origin() -> str | None:
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_PLUMBING_MODULES):
+            code = frame.f_code
+            return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return None
+
+
+def _route() -> str | None:
+    if not has_request_context():
+        return None
+    rule = request.url_rule.rule if request.url_rule is not None else request.path
+    return f"{request.method} {rule}"
+
+
+def _explain(dialect: str, dbapi_connection, statement: str, parameters) -> list[str]:
+    """
+    Query plan of the statement, which is not run again. On Postgres the EXPLAIN runs in a
+    savepoint so a failure does not abort the transaction of the request.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        if dialect == "postgresql":
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        return []
+    finally:
+        cursor.close()
+
+
+class SlowQueryRecorder:
+    """
+    Times every statement of one engine and logs those at or above threshold_ms.
+    Plans are looked up once per distinct statement and remembered.
+    """
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.threshold = None
+        self.logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.plans = LRUCache(256)
+
+    def configure(self, threshold_ms: float, log_path: str, max_bytes: int, backup_count: int) -> None:
+        # A threshold of 0 or less turns the log off
+        self.threshold = threshold_ms / 1000 if threshold_ms > 0 else None
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        if self.threshold is not None:
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def install(self) -> None:
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["slow_query_start"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("slow_query_start", time.perf_counter())
+        if self.threshold is None or elapsed < self.threshold:
+            return
+        self.logger.info(json.dumps(self.record(conn, cursor, statement, parameters, executemany, elapsed)))
+
+    def record(self, conn, cursor, statement: str, parameters, executemany: bool, elapsed: float) -> dict:
+        plan = self.plans.get(statement)
+        if plan is None and not executemany:
+            try:
+                plan = _explain(conn.dialect.name, cursor.connection, statement, parameters)
+            except Exception as e:
+                plan = [f"EXPLAIN failed: {e}"]
+            self.plans.set(statement, plan)
+        return {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "parameters": repr(parameters)[:MAX_PARAMETERS_LENGTH],
+            "executemany": executemany,
+            "origin": _origin(),
+            "route": _route(),
+            "plan": plan or [],
+        }
+
+
+def record_slow_queries(
+    engine: Engine,
+    threshold_ms: float,
+    log_path: str,
+    max_bytes: int = 5 * 1024 * 1024,
+    backup_count: int = 3,
+) -> SlowQueryRecorder:
+    """
+    Starts logging the slow statements of the engine, or changes the settings if it already does.
+    """
+    recorder = _recorders.get(engine)
+    if recorder is None:
+        recorder = SlowQueryRecorder(engine)
+        recorder.install()
+        _recorders[engine] = recorder
+    recorder.configure(threshold_ms, log_path, max_bytes, backup_count)
+    return recorder
+
+
+# SUMMARY
+
+@dataclass
+class SlowQueryStats:
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    origins: dict = field(default_factory=dict)  # origin -> count
+    routes: dict = field(default_factory=dict)  # route -> count
+    plan: list = field(default_factory=list)
+
+
+def normalize_statement(statement: str) -> str:
+    # One shape per statement, whatever the whitespace or the length of its IN lists
+    statement = " ".join(statement.split())
+    return re.sub(r"\((?:\?|%\(\w+\)s|%s)(?:, (?:\?|%\(\w+\)s|%s))+\)", "(...)", statement)
+
+
+def log_files(log_path: str) -> list[Path]:
+    # The log and its rotated backups, oldest first
+    path = Path(log_path)
+    backups = sorted(path.parent.glob(f"{path.name}.*"), key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0)
+    return [*reversed(backups), path]
+
+
+def summarize(log_path: str, top: int = 10) -> list[SlowQueryStats]:
+    """
+    Slow statements of the log and its backups, by total time spent on them.
+    """
+    stats: dict[str, SlowQueryStats] = {}
+    for log_file in log_files(log_path):
+        if not log_file.is_file():
+            continue
+        with open(log_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                shape = normalize_statement(entry["statement"])
+                item = stats.setdefault(shape, SlowQueryStats(shape))
+                item.count += 1
+                item.total_ms += entry["duration_ms"]
+                item.max_ms = max(item.max_ms, entry["duration_ms"])
+                for key, counts in ((entry.get("origin"), item.origins), (entry.get("route"), item.routes)):
+                    if key:
+                        counts[key] = counts.get(key, 0) + 1
+                item.plan = entry.get("plan") or item.plan
+    return sorted(stats.values(), key=lambda item: item.total_ms, reverse=True)[:top]
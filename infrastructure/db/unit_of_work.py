@@ -0,0 +1,39 @@
+# Unit of Work over a single SQLAlchemy session
+
+from functools import partial
+from infrastructure.cache import CachingGroupRepository, LRUCache
+from infrastructure.db import SessionLocal
+from infrastructure.db.repository import (
+    SQLAlchemyUserRepository,
+    SQLAlchemyGroupRepository,
+    SQLAlchemyMemberRepository,
+    SQLAlchemyExpenseRepository,
+    has_pending_group_changes,
+)
+
+
+class SQLAlchemyUnitOfWork:
+    """
+    Shares one session between the repositories used by a request.
+    The repositories flush, the unit of work commits or rolls back once at the end.
+    Given a group_cache, group reads go through a CachingGroupRepository sharing it.
+    """
+    def __init__(self, session_factory=SessionLocal, group_cache: LRUCache | None = None):
+        self.session = session_factory()
+        self.users = SQLAlchemyUserRepository(self.session)
+        self.groups = SQLAlchemyGroupRepository(self.session)
+        if group_cache is not None:
+            self.groups = CachingGroupRepository(
+                self.groups, group_cache, partial(has_pending_group_changes, self.session)
+            )
+        self.members = SQLAlchemyMemberRepository(self.session)
+        self.expenses = SQLAlchemyExpenseRepository(self.session)
+
+    def commit(self) -> None:
+        self.session.commit()
+
+    def rollback(self) -> None:
+        self.session.rollback()
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,475 @@
+# In-memory Implementations of Repository Interfaces
+#
+# Every port is backed by dicts held in a MemoryStore shared by the units of work
+# of a process. Lookups go through indexes by group id, member username and owner
+# id, so each operation touches about as many entries as the matching indexed SQL
+# query reads rows, without any I/O. Writes are visible to other units of work at
+# once and are undone through the journal on rollback. Containers shared between
+# units of work are only changed in place, so undoing one write never discards
+# another's.
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import count
+from threading import RLock
+from typing import Callable, Iterator
+from uuid import UUID, uuid4
+
+from application.ports import UserRepository, GroupRepository, ExpenseRepository, MemberRepository
+from domain.models import User, Group, GroupSummary, Expense, ExpenseColumns, Member
+from domain.services import build_expense_columns, expense_balance_deltas
+
+
+@dataclass
+class _GroupRecord:
+    name: str
+    version: int = 0
+    owner_ids: list[int] = field(default_factory=list)
+    member_ids: dict[str, int] = field(default_factory=dict)  # username -> member id
+
+
+@dataclass
+class _MemberRecord:
+    id: int
+    username: str
+    group_id: str
+
+
+@dataclass
+class _ExpenseRecord:
+    id: int
+    description: str
+    total_amount: float
+    group_id: str
+    creditors: list[tuple[int, float]]  # (member id, amount)
+    debtor_ids: list[int]
+
+
+class MemoryStore:
+    """
+    Tables and indexes of the in-memory backend.
+    """
+    def __init__(self):
+        self.lock = RLock()
+        self.user_ids: set[int] = set()
+        self.groups: dict[str, _GroupRecord] = {}
+        self.group_ids_by_owner: dict[int, list[str]] = {}
+        self.members: dict[int, _MemberRecord] = {}
+        self.expenses: dict[int, _ExpenseRecord] = {}
+        self.expense_ids_by_group: dict[str, list[int]] = {}  # ascending ids
+        self.expense_counts_by_member: dict[int, int] = {}
+        self.balances: dict[int, float] = {}  # member id -> balance
+        self._ids = {"users": count(1), "members": count(1), "expenses": count(1)}
+
+    def next_id(self, table: str) -> int:
+        # Like database sequences, ids are not reused after a rollback
+        return next(self._ids[table])
+
+
+class Journal:
+    """
+    Undo steps of the writes made by one unit of work, newest last.
+    """
+    def __init__(self):
+        self._undo: list[Callable[[], None]] = []
+
+    def record(self, undo: Callable[[], None]) -> None:
+        self._undo.append(undo)
+
+    def rollback(self) -> None:
+        while self._undo:
+            self._undo.pop()()
+
+    def clear(self) -> None:
+        self._undo.clear()
+
+
+_MISSING = object()
+
+
+def _set_item(journal: Journal, mapping: dict, key, value) -> None:
+    old = mapping.get(key, _MISSING)
+    mapping[key] = value
+    if old is _MISSING:
+        journal.record(lambda: mapping.pop(key, None))
+    else:
+        journal.record(lambda: mapping.__setitem__(key, old))
+
+
+def _pop_item(journal: Journal, mapping: dict, key) -> None:
+    old = mapping.pop(key)
+    journal.record(lambda: mapping.__setitem__(key, old))
+
+
+def _set_attr(journal: Journal, obj, name: str, value) -> None:
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    journal.record(lambda: setattr(obj, name, old))
+
+
+def _append(journal: Journal, items: list, value) -> None:
+    items.append(value)
+    journal.record(lambda: items.remove(value))
+
+
+def _add_to(journal: Journal, mapping: dict, key, delta) -> None:
+    # Additive, so undoing stays correct when other units of work changed the value since
+    mapping[key] = mapping.get(key, 0) + delta
+    journal.record(lambda: mapping.__setitem__(key, mapping.get(key, 0) - delta))
+
+
+def _group_key(group_id) -> str:
+    # Same ids and the same ValueError for malformed ones as the SQL backend
+    return str(UUID(str(group_id)))
+
+
+def _int_id(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bump_group_version(group: _GroupRecord) -> None:
+    # Not undone: a version number must never come back with different contents
+    group.version += 1
+
+
+def _to_member(record: _MemberRecord) -> Member:
+    return Member(id=record.id, username=record.username, group_id=record.group_id)
+
+
+def _add_member(store: MemoryStore, journal: Journal, group_id: str, member: Member) -> None:
+    key = _group_key(group_id)
+    with store.lock:
+        group = store.groups.get(key)
+        if group is None:
+            raise ValueError("Group not found")
+        if member.username in group.member_ids:
+            raise ValueError("A member with the new name already exists in the group")
+
+        record = _MemberRecord(id=store.next_id("members"), username=member.username, group_id=key)
+        _set_item(journal, store.members, record.id, record)
+        _set_item(journal, group.member_ids, record.username, record.id)
+        _set_item(journal, store.balances, record.id, 0.0)
+        _bump_group_version(group)
+    member.id = record.id
+
+
+class InMemoryUserRepository(UserRepository):
+    """
+    In-memory implementation of the UserRepository.
+    """
+    def __init__(self, store: MemoryStore, journal: Journal | None = None):
+        self.store = store
+        self.journal = journal or Journal()
+
+    def get_by_id(self, user_id: int) -> User | None:
+        user_id = _int_id(user_id)
+        return User(id=user_id) if user_id in self.store.user_ids else None
+
+    def add(self, user: User) -> None:
+        with self.store.lock:
+            user_id = self.store.next_id("users")
+            self.store.user_ids.add(user_id)
+            self.journal.record(lambda: self.store.user_ids.discard(user_id))
+        user.id = user_id
+
+
+class InMemoryMemberRepository(MemberRepository):
+    """
+    In-memory implementation of the MemberRepository.
+    """
+    def __init__(self, store: MemoryStore, journal: Journal | None = None):
+        self.store = store
+        self.journal = journal or Journal()
+
+    def get_by_id(self, member_id: int, group_id: str) -> Member | None:
+        record = self.store.members.get(_int_id(member_id))
+        return Member(id=record.id, username=record.username, group_id=group_id) if record else None
+
+    def add(self, member: Member, group_id: str) -> None:
+        _add_member(self.store, self.journal, group_id, member)
+
+
+class InMemoryGroupRepository(GroupRepository):
+    """
+    In-memory implementation of the GroupRepository.
+    """
+    def __init__(self, store: MemoryStore, journal: Journal | None = None):
+        self.store = store
+        self.journal = journal or Journal()
+
+    def _to_group(self, key: str, group: _GroupRecord) -> Group:
+        return Group(
+            id=key,
+            name=group.name,
+            owners=[User(id=owner_id) for owner_id in group.owner_ids],
+            members=[_to_member(self.store.members[member_id]) for member_id in group.member_ids.values()],
+        )
+
+    def get_by_id(self, group_id: str) -> Group | None:
+        key = _group_key(group_id)
+        with self.store.lock:
+            group = self.store.groups.get(key)
+            return self._to_group(key, group) if group else None
+
+    def get_groups_by_owner_id(self, owner_id: str) -> list[Group]:
+        with self.store.lock:
+            return [
+                self._to_group(key, self.store.groups[key])
+                for key in self.store.group_ids_by_owner.get(_int_id(owner_id), [])
+            ]
+
+    def get_group_summaries_by_owner_id(self, owner_id: str) -> list[GroupSummary]:
+        with self.store.lock:
+            return [
+                GroupSummary(id=key, name=self.store.groups[key].name, member_count=len(self.store.groups[key].member_ids))
+                for key in self.store.group_ids_by_owner.get(_int_id(owner_id), [])
+            ]
+
+    def get_by_expense_id(self, expense_id: str) -> Group | None:
+        expense = self.store.expenses.get(_int_id(expense_id))
+        return self.get_by_id(expense.group_id) if expense else None
+
+    def add(self, group: Group) -> None:
+        key = str(uuid4())
+        with self.store.lock:
+            _set_item(self.journal, self.store.groups, key, _GroupRecord(name=group.name))
+        group.id = key
+
+    def add_member(self, group_id: str, member: Member) -> None:
+        _add_member(self.store, self.journal, group_id, member)
+
+    def update_member_name(self, group_id: str, old_name: str, new_name: str) -> None:
+        key = _group_key(group_id)
+        with self.store.lock:
+            group = self.store.groups.get(key)
+            if group is None or old_name not in group.member_ids:
+                return
+            if new_name != old_name and new_name in group.member_ids:
+                raise ValueError("A member with the new name already exists in the group")
+
+            member_id = group.member_ids[old_name]
+            _pop_item(self.journal, group.member_ids, old_name)
+            _set_item(self.journal, group.member_ids, new_name, member_id)
+            _set_attr(self.journal, self.store.members[member_id], "username", new_name)
+            _bump_group_version(group)
+
+    def get_version(self, group_id: str) -> int | None:
+        group = self.store.groups.get(_group_key(group_id))
+        return group.version if group else None
+
+    def get_members(self, group_id: str) -> list[Member]:
+        with self.store.lock:
+            group = self.store.groups.get(_group_key(group_id))
+            if group is None:
+                return []
+            return [_to_member(self.store.members[member_id]) for member_id in group.member_ids.values()]
+
+    def get_member_by_username(self, group_id: str, username: str) -> Member | None:
+        with self.store.lock:
+            group = self.store.groups.get(_group_key(group_id))
+            member_id = group.member_ids.get(username) if group else None
+            return _to_member(self.store.members[member_id]) if member_id is not None else None
+
+    def has_member_username(self, group_id: str, username: str) -> bool:
+        group = self.store.groups.get(_group_key(group_id))
+        return group is not None and username in group.member_ids
+
+    def exists(self, group_id: str) -> bool:
+        return _group_key(group_id) in self.store.groups
+
+    def get_balances(self, group_id: str) -> dict[Member, float]:
+        with self.store.lock:
+            return {
+                member: round(self.store.balances.get(member.id, 0.0), 9)
+                for member in self.get_members(group_id)
+            }
+
+    def remove_member(self, group_id: str, member: Member) -> None:
+        key = _group_key(group_id)
+        with self.store.lock:
+            group = self.store.groups.get(key)
+            record = self.store.members.get(member.id)
+            if group is None or record is None or record.group_id != key:
+                return
+
+            _pop_item(self.journal, group.member_ids, record.username)
+            _pop_item(self.journal, self.store.members, record.id)
+            if record.id in self.store.balances:
+                _pop_item(self.journal, self.store.balances, record.id)
+            _bump_group_version(group)
+
+    def add_owner(self, group_id: str, owner: User) -> None:
+        key = _group_key(group_id)
+        with self.store.lock:
+            group = self.store.groups.get(key)
+            if group is None:
+                raise ValueError("Group not found")
+            # Ensure user exists
+            owner_id = _int_id(owner.id)
+            if owner_id not in self.store.user_ids:
+                new_owner = User(id=0)
+                InMemoryUserRepository(self.store, self.journal).add(new_owner)
+                owner.id = owner_id = new_owner.id
+
+            _append(self.journal, group.owner_ids, owner_id)
+            _append(self.journal, self.store.group_ids_by_owner.setdefault(owner_id, []), key)
+            _bump_group_version(group)
+
+    def get_owners(self, group_id: str) -> list[User]:
+        group = self.store.groups.get(_group_key(group_id))
+        return [User(id=owner_id) for owner_id in group.owner_ids] if group else []
+
+
+class InMemoryExpenseRepository(ExpenseRepository):
+    """
+    In-memory implementation of the ExpenseRepository.
+    Keeps the balances ledger and each member's expense count up to date on every write.
+    """
+    def __init__(self, store: MemoryStore, journal: Journal | None = None):
+        self.store = store
+        self.journal = journal or Journal()
+
+    def _apply(self, record: _ExpenseRecord, sign: int) -> None:
+        """
+        Adds (sign=1) or takes back (sign=-1) the expense's balance deltas and participations.
+        """
+        deltas = expense_balance_deltas(record.total_amount, record.creditors, record.debtor_ids)
+        for member_id, delta in deltas.items():
+            _add_to(self.journal, self.store.balances, member_id, sign * delta)
+        for member_id in [member_id for member_id, _ in record.creditors] + record.debtor_ids:
+            _add_to(self.journal, self.store.expense_counts_by_member, member_id, sign)
+
+    def _insert(self, expense: Expense) -> str:
+        key = _group_key(expense.group_id)
+        group = self.store.groups.get(key)
+        if group is None:
+            raise ValueError("Group not found")
+
+        record = _ExpenseRecord(
+            id=self.store.next_id("expenses"),
+            description=expense.description,
+            total_amount=expense.total_amount,
+            group_id=key,
+            creditors=[(member.id, amount) for member, amount in expense.creditors],
+            debtor_ids=[debtor.id for debtor in expense.debtors],
+        )
+        _set_item(self.journal, self.store.expenses, record.id, record)
+        _append(self.journal, self.store.expense_ids_by_group.setdefault(key, []), record.id)
+        self._apply(record, 1)
+        expense.id = record.id
+        return key
+
+    def _to_expense(self, record: _ExpenseRecord, members: dict[int, Member]) -> Expense:
+        for member_id in [member_id for member_id, _ in record.creditors] + record.debtor_ids:
+            if member_id not in members:
+                members[member_id] = _to_member(self.store.members[member_id])
+        return Expense(
+            id=record.id,
+            description=record.description,
+            total_amount=record.total_amount,
+            group_id=record.group_id,
+            creditors=[(members[member_id], amount) for member_id, amount in record.creditors],
+            debtors=[members[member_id] for member_id in record.debtor_ids],
+        )
+
+    def get_by_id(self, expense_id: str) -> Expense | None:
+        record = self.store.expenses.get(_int_id(expense_id))
+        if not record:
+            return
+        return Expense(
+            id=record.id,
+            description=record.description,
+            total_amount=record.total_amount,
+            group_id=record.group_id,
+        )
+
+    def add(self, expense: Expense) -> None:
+        with self.store.lock:
+            key = self._insert(expense)
+            _bump_group_version(self.store.groups[key])
+
+    def add_many(self, expenses: list[Expense]) -> None:
+        with self.store.lock:
+            keys = {self._insert(expense) for expense in expenses}
+            for key in keys:
+                _bump_group_version(self.store.groups[key])
+
+    def update(self, expense: Expense) -> None:
+        with self.store.lock:
+            record = self.store.expenses.get(_int_id(expense.id))
+            if not record:
+                raise ValueError("Expense not found")
+
+            # Undo the previous contribution to the balances
+            self._apply(record, -1)
+            _set_attr(self.journal, record, "description", expense.description)
+            _set_attr(self.journal, record, "total_amount", expense.total_amount)
+            _set_attr(self.journal, record, "creditors", [(member.id, amount) for member, amount in expense.creditors])
+            _set_attr(self.journal, record, "debtor_ids", [debtor.id for debtor in expense.debtors])
+            self._apply(record, 1)
+            _bump_group_version(self.store.groups[record.group_id])
+
+    def remove(self, expense_id: str) -> None:
+        with self.store.lock:
+            record = self.store.expenses.get(_int_id(expense_id))
+            if not record:
+                return
+
+            self._apply(record, -1)
+            ids = self.store.expense_ids_by_group[record.group_id]
+            ids.remove(record.id)
+            self.journal.record(lambda: ids.insert(bisect_right(ids, record.id), record.id))
+            _pop_item(self.journal, self.store.expenses, record.id)
+            _bump_group_version(self.store.groups[record.group_id])
+
+    def list_by_group(self, group_id: str, limit: int | None = None, after_id: int | None = None) -> list[Expense]:
+        key = _group_key(group_id)
+        with self.store.lock:
+            ids = self.store.expense_ids_by_group.get(key, [])
+            # The ids are kept sorted, so a page is a slice found by bisecting after_id
+            start = bisect_right(ids, after_id) if after_id is not None else 0
+            end = start + limit if limit is not None else len(ids)
+            members = {}
+            return [self._to_expense(self.store.expenses[expense_id], members) for expense_id in ids[start:end]]
+
+    def iter_by_group(self, group_id: str, batch_size: int = 1000) -> Iterator[Expense]:
+        after_id = None
+        while True:
+            batch = self.list_by_group(group_id, batch_size, after_id)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after_id = batch[-1].id
+
+    def member_has_expenses(self, member_id: int) -> bool:
+        return self.store.expense_counts_by_member.get(member_id, 0) > 0
+
+    def aggregate_balances(self, group_id: str) -> dict[Member, float]:
+        # Replays the expenses rather than reading the ledger, like the SQL aggregate
+        key = _group_key(group_id)
+        with self.store.lock:
+            group = self.store.groups.get(key)
+            if group is None:
+                return {}
+            balances = {member_id: 0.0 for member_id in group.member_ids.values()}
+            for expense_id in self.store.expense_ids_by_group.get(key, []):
+                record = self.store.expenses[expense_id]
+                for member_id, delta in expense_balance_deltas(record.total_amount, record.creditors, record.debtor_ids).items():
+                    if member_id in balances:
+                        balances[member_id] += delta
+            return {_to_member(self.store.members[member_id]): balance for member_id, balance in balances.items()}
+
+    def get_expense_columns(self, group_id: str) -> ExpenseColumns:
+        key = _group_key(group_id)
+        with self.store.lock:
+            group = self.store.groups.get(key)
+            member_ids = group.member_ids.values() if group is not None else ()
+            members = [_to_member(self.store.members[member_id]) for member_id in member_ids]
+            records = [self.store.expenses[expense_id] for expense_id in self.store.expense_ids_by_group.get(key, [])]
+            expenses = [(record.id, record.total_amount) for record in records]
+            creditor_links = [(record.id, member_id, amount) for record in records for member_id, amount in record.creditors]
+            debtor_links = [(record.id, member_id) for record in records for member_id in record.debtor_ids]
+        return build_expense_columns(members, expenses, creditor_links, debtor_links)
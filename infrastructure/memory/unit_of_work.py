@@ -0,0 +1,34 @@
+# Unit of Work over the in-memory store
+
+from infrastructure.memory.repository import (
+    Journal,
+    MemoryStore,
+    InMemoryUserRepository,
+    InMemoryGroupRepository,
+    InMemoryMemberRepository,
+    InMemoryExpenseRepository,
+)
+
+
+class InMemoryUnitOfWork:
+    """
+    Same interface as SQLAlchemyUnitOfWork over a MemoryStore.
+    Writes reach the store at once, rollback undoes them, as does closing without a commit.
+    """
+    def __init__(self, store: MemoryStore):
+        self.journal = Journal()
+        self.users = InMemoryUserRepository(store, self.journal)
+        self.groups = InMemoryGroupRepository(store, self.journal)
+        self.members = InMemoryMemberRepository(store, self.journal)
+        self.expenses = InMemoryExpenseRepository(store, self.journal)
+        self._store = store
+
+    def commit(self) -> None:
+        self.journal.clear()
+
+    def rollback(self) -> None:
+        with self._store.lock:
+            self.journal.rollback()
+
+    def close(self) -> None:
+        self.rollback()
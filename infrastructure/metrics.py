@@ -0,0 +1,149 @@
+# Request and database metrics in the Prometheus text format
+#
+# Metrics live in this process. When PROMETHEUS_MULTIPROC_DIR is set, every worker writes
+# its values to files in that directory and /metrics adds up the files of all workers,
+# so any worker answers for the whole server. See gunicorn.conf.py.
+
+import os
+import time
+from flask import Response, g, request, has_request_context
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REQUESTS = Counter(
+    "splitred_http_requests_total", "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "splitred_http_request_duration_seconds", "Time from the start of a request to its last byte",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+SQL_STATEMENTS = Counter(
+    "splitred_db_statements_total", "SQL statements executed while serving a route",
+    ["method", "route"],
+)
+SQL_TIME = Counter(
+    "splitred_db_statement_duration_seconds_total", "Time spent executing SQL statements while serving a route",
+    ["method", "route"],
+)
+SQL_STATEMENTS_PER_REQUEST = Histogram(
+    "splitred_db_statements_per_request", "SQL statements executed by one request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "splitred_db_pool_checkout_wait_seconds", "Time spent waiting for a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKED_OUT = Gauge(
+    "splitred_db_pool_checked_out", "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+
+
+def _route_label() -> str:
+    # The rule keeps ids out of the labels, unmatched paths share one label
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"]
+    if has_request_context() and "sql_stats" in g:
+        g.sql_stats[0] += 1
+        g.sql_stats[1] += elapsed
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKED_OUT.inc()
+
+
+def _checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Times every statement of the engine and every wait for one of its pooled connections.
+    Safe to call again for the same engine.
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.pool, "checkout", _checkout)
+    event.listen(engine.pool, "checkin", _checkin)
+
+    # The pool has no event before a checkout, so the method that waits for a connection is timed
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+
+
+def collect() -> bytes:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def register_metrics(app, engine: Engine | None = None):
+    """
+    Records count, latency, status code and SQL statements of every request, and serves
+    them on GET /metrics. Requests are measured until their response is closed, so
+    streamed bodies count in full.
+    """
+    if engine is not None:
+        instrument_engine(engine)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_start = time.perf_counter()
+        g.sql_stats = [0, 0.0]
+
+    @app.after_request
+    def record_status(response):
+        g.response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request_metrics(exc):
+        start = g.pop("request_start", None)
+        if start is None:
+            return
+        method, route = request.method, _route_label()
+        status = 500 if exc is not None else g.pop("response_status", 500)
+        statements, sql_seconds = g.pop("sql_stats")
+
+        REQUESTS.labels(method, route, str(status)).inc()
+        REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+        SQL_STATEMENTS.labels(method, route).inc(statements)
+        SQL_TIME.labels(method, route).inc(sql_seconds)
+        SQL_STATEMENTS_PER_REQUEST.labels(method, route).observe(statements)
+
+    @app.route("/metrics", methods=["GET"])
+    def get_metrics():
+        return Response(collect(), content_type=CONTENT_TYPE_LATEST)
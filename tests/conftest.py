@@ -0,0 +1,122 @@
+# Shared fixtures
+
+import os
+
+# Point the app at an in-memory SQLite database before config is imported.
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest
+from sqlalchemy import event
+from infrastructure.db import engine, SessionLocal
+from infrastructure.db.models import Base
+from infrastructure.db.unit_of_work import SQLAlchemyUnitOfWork
+from config import MEMORY_DATABASE_URL
+from infrastructure.memory.repository import MemoryStore
+from infrastructure.memory.unit_of_work import InMemoryUnitOfWork
+
+# Per-request query recording, budgets and N+1 detection
+pytest_plugins = ["tests.query_budget"]
+
+
+class QueryCounter:
+    """
+    Collects every SQL statement executed on the engine while active.
+    """
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def reset(self):
+        self.statements = []
+
+
+@pytest.fixture
+def database():
+    Base.metadata.create_all(engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def session(database):
+    db_session = SessionLocal()
+    try:
+        yield db_session
+    finally:
+        db_session.close()
+
+
+@pytest.fixture
+def session_uow(session):
+    """
+    A SQLAlchemyUnitOfWork on the session fixture, for tests that also use the session.
+    """
+    return SQLAlchemyUnitOfWork(lambda: session)
+
+
+@pytest.fixture
+def app(database):
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(params=["sqlalchemy", "memory"])
+def backend_app(request, monkeypatch):
+    """
+    The app on each repository backend, for tests that only go through the API.
+    """
+    from app import create_app
+    from config import Config
+    if request.param == "memory":
+        monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", MEMORY_DATABASE_URL)
+    else:
+        request.getfixturevalue("database")
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def backend_client(backend_app):
+    return backend_app.test_client()
+
+
+@pytest.fixture(params=["sqlalchemy", "memory"])
+def uow(request):
+    """
+    A unit of work on each repository backend, for tests of the ports' behaviour.
+    """
+    if request.param == "memory":
+        unit = InMemoryUnitOfWork(MemoryStore())
+    else:
+        request.getfixturevalue("database")
+        unit = SQLAlchemyUnitOfWork()
+    try:
+        yield unit
+    finally:
+        unit.close()
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
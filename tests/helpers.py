@@ -0,0 +1,50 @@
+# Helpers shared by the tests
+
+from domain.models import User, Group, Expense, Member
+
+# Utils to create a group with members through the API, and optionally return its owner id
+def create_group(client, members, with_owner=False):
+    user_id = client.post("/users", json={}).json["id"]
+    group = client.post("/groups", json={"name": "Trip", "owner_id": user_id, "members": members}).json
+    return (group["id"], str(user_id)) if with_owner else group["id"]
+
+def add_expense(client, group_id, price, creditor, debtors):
+    response = client.post(f"/groups/{group_id}/expenses", json={
+        "description": "Expense",
+        "price": price,
+        "creditors": [{"name": creditor, "amount": price}],
+        "debtors": debtors,
+    })
+    assert response.status_code == 201
+
+# Utils to seed groups straight through the repositories of a unit of work
+def make_owner(uow):
+    owner = User(id=0)
+    uow.users.add(owner)
+    return owner
+
+def seed_group(uow, usernames, name="Trip", owner=None, expense_count=0):
+    group = Group(id="", name=name)
+    uow.groups.add(group)
+    if owner is not None:
+        uow.groups.add_owner(group.id, owner)
+    members = []
+    for username in usernames:
+        member = Member(id=0, username=username, group_id=group.id)
+        uow.groups.add_member(group.id, member)
+        members.append(member)
+
+    for i in range(expense_count):
+        uow.expenses.add(Expense(
+            id=0, description=f"Expense {i}", total_amount=30.0, group_id=group.id,
+            creditors=[(members[i % len(members)], 30.0)],
+            debtors=members
+        ))
+    return group, members
+
+def seed_groups(uow, owner, group_count, member_count, expense_count=0):
+    usernames = [f"member{j}" for j in range(member_count)]
+    return [
+        seed_group(uow, usernames, name=f"Group {i}", owner=owner, expense_count=expense_count)[0]
+        for i in range(group_count)
+    ]
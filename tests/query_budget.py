@@ -0,0 +1,114 @@
+# Query budgets for API tests
+#
+# The request_queries fixture records the SQL statements of every test-client request,
+# grouped by request. A request running the same statement shape again and again is the
+# mark of an N+1 loop. Tests marked with query_budget fail when any request goes over it:
+#
+#     @pytest.mark.query_budget(max_queries=6, max_repeats=2)
+#     def test_something(client, request_queries): ...
+
+from dataclasses import dataclass, field
+import pytest
+from flask import request, request_started, request_tearing_down
+from sqlalchemy import event
+from infrastructure.db import engine
+from infrastructure.db.slow_queries import normalize_statement
+
+# Same shape this many times in one request counts as an N+1 pattern
+DEFAULT_MAX_REPEATS = 3
+
+
+@dataclass
+class RequestQueries:
+    route: str  # "METHOD /rule"
+    statements: list[tuple[str, bool]] = field(default_factory=list)  # (statement, executemany)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, max_repeats: int = DEFAULT_MAX_REPEATS) -> dict[str, int]:
+        # Statement shapes run more than max_repeats times. Executemany batches are left out,
+        # a bulk insert can take several of them.
+        counts: dict[str, int] = {}
+        for statement, executemany in self.statements:
+            if executemany:
+                continue
+            shape = normalize_statement(statement)
+            counts[shape] = counts.get(shape, 0) + 1
+        return {shape: count for shape, count in counts.items() if count > max_repeats}
+
+
+class RequestQueryRecorder:
+    def __init__(self):
+        self.requests: list[RequestQueries] = []
+        self._current: RequestQueries | None = None
+
+    def _started(self, sender, **extra):
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        self._current = RequestQueries(f"{request.method} {rule}")
+        self.requests.append(self._current)
+
+    def _tearing_down(self, sender, **extra):
+        self._current = None
+
+    def _statement(self, conn, cursor, statement, parameters, context, executemany):
+        if self._current is not None:
+            self._current.statements.append((statement, executemany))
+
+    def reset(self) -> None:
+        self.requests = []
+
+    @property
+    def last(self) -> RequestQueries:
+        return self.requests[-1]
+
+    def by_route(self) -> dict[str, list[int]]:
+        # Query count of each request, by route
+        counts: dict[str, list[int]] = {}
+        for recorded in self.requests:
+            counts.setdefault(recorded.route, []).append(recorded.count)
+        return counts
+
+    def violations(self, max_queries: int | None = None, max_repeats: int = DEFAULT_MAX_REPEATS) -> list[str]:
+        problems = []
+        for recorded in self.requests:
+            if max_queries is not None and recorded.count > max_queries:
+                problems.append(f"{recorded.route} ran {recorded.count} queries, budget is {max_queries}")
+            for shape, count in recorded.repeated(max_repeats).items():
+                problems.append(f"{recorded.route} ran {count}x (N+1?): {shape}")
+        return problems
+
+
+@pytest.fixture
+def request_queries(app):
+    recorder = RequestQueryRecorder()
+    request_started.connect(recorder._started, app)
+    request_tearing_down.connect(recorder._tearing_down, app)
+    event.listen(engine, "before_cursor_execute", recorder._statement)
+    try:
+        yield recorder
+    finally:
+        event.remove(engine, "before_cursor_execute", recorder._statement)
+        request_tearing_down.disconnect(recorder._tearing_down, app)
+        request_started.disconnect(recorder._started, app)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries=None, max_repeats=3): fail when a request of the test "
+        "runs more queries, or repeats a statement shape more often",
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    result = yield
+    marker = item.get_closest_marker("query_budget")
+    recorder = getattr(item, "funcargs", {}).get("request_queries")
+    if marker is not None and recorder is not None:
+        problems = recorder.violations(**marker.kwargs)
+        if problems:
+            raise AssertionError("Query budget exceeded:\n  " + "\n  ".join(problems))
+    return result
@@ -1,65 +1,105 @@
 import pytest
-from domain.models import User, Expense
-from domain.services import calculate_group_balance
-from tests.mocks import MockExpenseRepository, MockGroupRepository
+from domain.models import Expense, Member
+from domain.services import build_expense_columns, calculate_group_balance, calculate_group_balance_columnar
+from infrastructure.memory.repository import MemoryStore
+from infrastructure.memory.unit_of_work import InMemoryUnitOfWork
+from tests.helpers import seed_group
 
-# Utils to create users
-def make_users(names):
-    return [User(id=i+1, username=name) for i, name in enumerate(names)]
+# Utils to create a group with members in the in-memory backend
+def make_group(names):
+    uow = InMemoryUnitOfWork(MemoryStore())
+    group, members = seed_group(uow, names)
+    return uow.groups, uow.expenses, group.id, members
 
 # Test 1: No expenses
 def test_balance_empty_group():
-    users = make_users(["alice", "bob"])
-    group_repo = MockGroupRepository(users)
-    expense_repo = MockExpenseRepository([])
+    group_repo, expense_repo, group_id, _ = make_group(["alice", "bob"])
 
-    balances = calculate_group_balance(expense_repo, group_repo, group_id=1)
+    balances = calculate_group_balance(expense_repo, group_repo, group_id)
+    assert len(balances) == 2
     assert all(balance == 0.0 for balance in balances.values())
 
 # Test 2: 1 expense, 1 creditor, 1 debtor
 def test_one_creditor_one_debtor():
-    [alice, bob] = make_users(["alice", "bob"])
+    group_repo, expense_repo, group_id, [alice, bob] = make_group(["alice", "bob"])
     expense = Expense(
-        id=1, description="Taxi", total_amount=60.0, group_id=1,
+        id=1, description="Taxi", total_amount=60.0, group_id=group_id,
         creditors=[(alice, 60.0)],
         debtors=[bob]
     )
-    group_repo = MockGroupRepository([alice, bob])
-    expense_repo = MockExpenseRepository([expense])
+    expense_repo.add(expense)
 
-    balances = calculate_group_balance(expense_repo, group_repo, group_id=1)
+    balances = calculate_group_balance(expense_repo, group_repo, group_id)
     assert balances[alice] == 60.0
     assert balances[bob] == -60.0
 
 # Test 3: 1 creditor, multiple debtors
 def test_one_creditor_multiple_debtors():
-    [alice, bob, carol] = make_users(["alice", "bob", "carol"])
+    group_repo, expense_repo, group_id, [alice, bob, carol] = make_group(["alice", "bob", "carol"])
     expense = Expense(
-        id=1, description="Pizza", total_amount=90.0, group_id=1,
+        id=1, description="Pizza", total_amount=90.0, group_id=group_id,
         creditors=[(alice, 90.0)],
         debtors=[alice, bob, carol]
     )
-    group_repo = MockGroupRepository([alice, bob, carol])
-    expense_repo = MockExpenseRepository([expense])
+    expense_repo.add(expense)
 
-    balances = calculate_group_balance(expense_repo, group_repo, group_id=1)
+    balances = calculate_group_balance(expense_repo, group_repo, group_id)
     assert balances[alice] == 60.0
     assert balances[bob] == -30.0
     assert balances[carol] == -30.0
 
 # Test 4: multiple creditors, multiple debtors
 def test_multiple_creditors_multiple_debtors():
-    [alice, bob, carol, dave] = make_users(["alice", "bob", "carol", "dave"])
+    group_repo, expense_repo, group_id, [alice, bob, carol, dave] = make_group(["alice", "bob", "carol", "dave"])
     expense = Expense(
-        id=1, description="Pizza", total_amount=90.0, group_id=1,
+        id=1, description="Pizza", total_amount=90.0, group_id=group_id,
         creditors=[(alice, 30.0), (bob, 60.0)],
         debtors=[alice, bob, carol, dave]
     )
-    group_repo = MockGroupRepository([alice, bob, carol, dave])
-    expense_repo = MockExpenseRepository([expense])
+    expense_repo.add(expense)
 
-    balances = calculate_group_balance(expense_repo, group_repo, group_id=1)
+    balances = calculate_group_balance(expense_repo, group_repo, group_id)
     assert balances[alice] == 7.5
     assert balances[bob] == 37.5
     assert balances[carol] == -22.5
-    assert balances[dave] == -22.5
\ No newline at end of file
+    assert balances[dave] == -22.5
+
+# Test 5: The columnar replay gives the balances of the loop
+def test_columnar_matches_loop():
+    group_repo, expense_repo, group_id, [alice, bob, carol, dave] = make_group(["alice", "bob", "carol", "dave"])
+    expense_repo.add(Expense(
+        id=1, description="Pizza", total_amount=90.0, group_id=group_id,
+        creditors=[(alice, 30.0), (bob, 60.0)],
+        debtors=[alice, bob, carol]
+    ))
+    expense_repo.add(Expense(
+        id=2, description="Taxi", total_amount=25.0, group_id=group_id,
+        creditors=[(carol, 25.0)],
+        debtors=[alice, bob]
+    ))
+
+    columns = expense_repo.get_expense_columns(group_id)
+    assert columns.creditor_offsets.tolist() == [0, 2, 3]
+    assert columns.debtor_offsets.tolist() == [0, 3, 5]
+    assert [columns.members[i] for i in columns.debtor_indices] == [alice, bob, carol, alice, bob]
+
+    balances = calculate_group_balance_columnar(expense_repo, group_id)
+    assert balances == pytest.approx(calculate_group_balance(expense_repo, group_repo, group_id))
+    assert balances[dave] == 0.0
+
+# Test 6: Columns are built from rows in any order, without links to other members or expenses
+def test_build_expense_columns():
+    alice, bob = Member(id=7, username="alice", group_id="g"), Member(id=3, username="bob", group_id="g")
+    columns = build_expense_columns(
+        [alice, bob],
+        [(20, 10.0), (10, 30.0), (30, 5.0)],
+        [(20, 3, 10.0), (10, 7, 30.0), (10, 99, 1.0)],
+        [(20, 7), (10, 3), (10, 7), (40, 3)],
+    )
+
+    assert columns.expense_ids.tolist() == [10, 20, 30]
+    assert columns.creditor_offsets.tolist() == [0, 1, 2, 2]
+    assert columns.creditor_indices.tolist() == [0, 1]
+    assert columns.debtor_offsets.tolist() == [0, 2, 3, 3]
+    assert columns.debtor_indices.tolist() == [1, 0, 0]
+    assert build_expense_columns([], [], [], []).debtor_offsets.tolist() == [0]
@@ -1,9 +1,9 @@
 import pytest
-from domain.models import User
+from domain.models import Member
 from domain.services import calculate_payments
 
 def make_users(names):
-    return [User(id=i+1, username=name) for i, name in enumerate(names)]
+    return [Member(id=i+1, username=name, group_id="1") for i, name in enumerate(names)]
 
 # Test 1: No payments needed
 def test_no_payments_needed():
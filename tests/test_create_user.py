@@ -1,22 +1,22 @@
 import pytest
 from domain.services import create_user
-from tests.mocks import MockUserRepository
+from infrastructure.memory.repository import MemoryStore, InMemoryUserRepository
 
 def test_create_user_success():
-    repo = MockUserRepository()
-    user = create_user(repo, "alice")
-    assert user.username == "alice"
+    repo = InMemoryUserRepository(MemoryStore())
+    user = create_user(repo)
     assert user.id == 1
+    assert repo.get_by_id(1) == user
 
 def test_create_user_duplicate():
-    repo = MockUserRepository()
-    create_user(repo, "alice")
-    create_user(repo, "alice")
-    assert repo.get_by_id(1).username == "alice" 
-    assert repo.get_by_id(2).username == "alice"
+    repo = InMemoryUserRepository(MemoryStore())
+    create_user(repo)
+    create_user(repo)
+    assert repo.get_by_id(1).id == 1
+    assert repo.get_by_id(2).id == 2
 
 def test_create_user_with_different_ids():
-    repo = MockUserRepository()
-    user1 = create_user(repo, "alice")
-    user2 = create_user(repo, "bob")
+    repo = InMemoryUserRepository(MemoryStore())
+    user1 = create_user(repo)
+    user2 = create_user(repo)
     assert user1.id != user2.id
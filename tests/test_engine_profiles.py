@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import text
+from infrastructure.db.profiles import create_profiled_engine
+
+# Utils to read a pragma on a fresh connection
+def pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+# Test 1: The production SQLite profile sets its pragmas on every connection
+def test_production_sqlite_pragmas(tmp_path):
+    engine = create_profiled_engine(f"sqlite:///{tmp_path}/app.db", "production-sqlite")
+    try:
+        assert pragma(engine, "journal_mode") == "wal"
+        assert pragma(engine, "synchronous") == 1  # NORMAL
+        assert pragma(engine, "busy_timeout") == 5000
+        assert pragma(engine, "cache_size") == -65536
+        assert engine.pool.size() == 10
+        assert engine.echo is False
+    finally:
+        engine.dispose()
+
+# Test 2: Pool sizing is skipped for in-memory SQLite
+def test_memory_sqlite_accepts_pooled_profile():
+    engine = create_profiled_engine("sqlite://", "production-sqlite")
+    try:
+        assert pragma(engine, "busy_timeout") == 5000
+    finally:
+        engine.dispose()
+
+# Test 3: Unknown profiles are rejected
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        create_profiled_engine("sqlite://", "turbo")
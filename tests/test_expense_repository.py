@@ -0,0 +1,158 @@
+import pytest
+from sqlalchemy import event
+from domain.models import Expense
+from domain.services import calculate_group_balance
+from infrastructure.db.repository import SQLAlchemyGroupRepository, SQLAlchemyExpenseRepository
+from tests.helpers import seed_group
+
+# Test 1: Expenses come back with their creditors and debtors
+def test_list_by_group_loads_participants(session, session_uow):
+    group, [alice, bob, carol] = seed_group(session_uow, ["alice", "bob", "carol"], expense_count=2)
+    expenses = SQLAlchemyExpenseRepository(session).list_by_group(group.id)
+
+    assert [e.description for e in expenses] == ["Expense 0", "Expense 1"]
+    assert [(c.username, amount) for c, amount in expenses[0].creditors] == [("alice", 30.0)]
+    assert [(c.username, amount) for c, amount in expenses[1].creditors] == [("bob", 30.0)]
+    assert sorted(d.username for d in expenses[0].debtors) == ["alice", "bob", "carol"]
+
+# Test 2: Other groups' expenses are not listed
+def test_list_by_group_filters_by_group(session, session_uow):
+    group, _ = seed_group(session_uow, ["alice", "bob"], expense_count=3)
+    seed_group(session_uow, ["carol", "dave"], expense_count=2)
+
+    expenses = SQLAlchemyExpenseRepository(session).list_by_group(group.id)
+    assert len(expenses) == 3
+
+# Test 3: Query count does not grow with the number of expenses
+@pytest.mark.parametrize("expense_count", [1, 10, 200])
+def test_list_by_group_query_budget(session, session_uow, query_counter, expense_count):
+    group, _ = seed_group(session_uow, ["alice", "bob", "carol", "dave", "erin", "frank"], expense_count=expense_count)
+    session.expire_all()
+
+    query_counter.reset()
+    expenses = SQLAlchemyExpenseRepository(session).list_by_group(group.id)
+
+    assert len(expenses) == expense_count
+    assert query_counter.count <= 4
+
+# Test 4: Balances aggregated in SQL match the Python replay
+def test_aggregate_balances_matches_replay(session, session_uow):
+    group, [alice, bob, carol, dave] = seed_group(session_uow, ["alice", "bob", "carol", "dave"])
+    expense_repo = SQLAlchemyExpenseRepository(session)
+    expense_repo.add(Expense(
+        id=0, description="Pizza", total_amount=90.0, group_id=group.id,
+        creditors=[(alice, 30.0), (bob, 60.0)], debtors=[alice, bob, carol]
+    ))
+    expense_repo.add(Expense(
+        id=0, description="Taxi", total_amount=25.0, group_id=group.id,
+        creditors=[(carol, 25.0)], debtors=[alice, bob]
+    ))
+    seed_group(session_uow, ["erin"], expense_count=1)
+
+    replayed = calculate_group_balance(expense_repo, SQLAlchemyGroupRepository(session), group.id)
+    aggregated = expense_repo.aggregate_balances(group.id)
+
+    assert aggregated.keys() == replayed.keys()
+    for member, balance in replayed.items():
+        assert aggregated[member] == pytest.approx(balance)
+    assert aggregated[dave] == 0.0
+
+# Test 5: Aggregating takes one statement regardless of the number of expenses
+@pytest.mark.parametrize("expense_count", [1, 100])
+def test_aggregate_balances_query_budget(session, session_uow, query_counter, expense_count):
+    group, _ = seed_group(session_uow, ["alice", "bob", "carol"], expense_count=expense_count)
+
+    query_counter.reset()
+    SQLAlchemyExpenseRepository(session).aggregate_balances(group.id)
+
+    assert query_counter.count == 1
+
+# Test 6: Pages follow each other by expense id
+def test_list_by_group_pages(session, session_uow):
+    group, _ = seed_group(session_uow, ["alice", "bob"], expense_count=5)
+    expense_repo = SQLAlchemyExpenseRepository(session)
+
+    first = expense_repo.list_by_group(group.id, limit=2)
+    second = expense_repo.list_by_group(group.id, limit=2, after_id=first[-1].id)
+    last = expense_repo.list_by_group(group.id, limit=2, after_id=second[-1].id)
+
+    assert [e.description for e in first + second + last] == [f"Expense {i}" for i in range(5)]
+    assert all(len(e.debtors) == 2 and len(e.creditors) == 1 for e in first + second + last)
+    assert expense_repo.list_by_group(group.id, limit=2, after_id=last[-1].id) == []
+
+# Test 7: A page costs the same number of queries however old the group is
+@pytest.mark.parametrize("expense_count", [10, 300])
+def test_list_by_group_page_query_budget(session, session_uow, query_counter, expense_count):
+    group, _ = seed_group(session_uow, ["alice", "bob", "carol"], expense_count=expense_count)
+    expense_repo = SQLAlchemyExpenseRepository(session)
+    after_id = expense_repo.list_by_group(group.id)[-6].id
+
+    query_counter.reset()
+    page = expense_repo.list_by_group(group.id, limit=5, after_id=after_id)
+
+    assert len(page) == 5
+    assert query_counter.count <= 4
+
+# Test 8: Streaming yields the same expenses as the listing
+def test_iter_by_group_matches_list(session, session_uow):
+    group, _ = seed_group(session_uow, ["alice", "bob", "carol"], expense_count=25)
+    seed_group(session_uow, ["dave"], expense_count=3)
+    expense_repo = SQLAlchemyExpenseRepository(session)
+
+    streamed = list(expense_repo.iter_by_group(group.id, batch_size=7))
+    listed = expense_repo.list_by_group(group.id)
+
+    assert [e.id for e in streamed] == [e.id for e in listed]
+    for s, l in zip(streamed, listed):
+        assert s.creditors == l.creditors
+        assert sorted(d.id for d in s.debtors) == sorted(d.id for d in l.debtors)
+
+# Test 9: Participation is found whether the member paid or owes
+def test_member_has_expenses(session, session_uow, query_counter):
+    group_repo = SQLAlchemyGroupRepository(session)
+    expense_repo = SQLAlchemyExpenseRepository(session)
+    group, [alice, bob, carol] = seed_group(session_uow, ["alice", "bob", "carol"])
+    expense_repo.add(Expense(
+        id=0, description="Dinner", total_amount=30.0, group_id=group.id,
+        creditors=[(alice, 30.0)], debtors=[bob]
+    ))
+
+    query_counter.reset()
+    assert expense_repo.member_has_expenses(alice.id)
+    assert expense_repo.member_has_expenses(bob.id)
+    assert not expense_repo.member_has_expenses(carol.id)
+    assert query_counter.count == 3
+
+# Test 10: The expense columns take four statements regardless of the number of expenses
+@pytest.mark.parametrize("expense_count", [1, 100])
+def test_expense_columns_query_budget(session, session_uow, query_counter, expense_count):
+    group, members = seed_group(session_uow, ["alice", "bob", "carol"], expense_count=expense_count)
+    seed_group(session_uow, ["erin"], expense_count=1)
+    expense_repo = SQLAlchemyExpenseRepository(session)
+
+    query_counter.reset()
+    columns = expense_repo.get_expense_columns(group.id)
+
+    assert query_counter.count == 4
+    assert columns.members == members
+    assert len(columns.expense_ids) == expense_count
+    assert columns.debtor_offsets[-1] == 3 * expense_count
+
+# Test 11: Streaming reads the links of the group only, not every link in the database
+def test_iter_by_group_plan_stays_in_group(session, session_uow):
+    group, _ = seed_group(session_uow, ["alice", "bob"], expense_count=3)
+    seed_group(session_uow, ["carol"], expense_count=3)
+    connection = session.connection()
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        assert len(list(SQLAlchemyExpenseRepository(session).iter_by_group(group.id))) == 3
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+    [(statement, parameters)] = statements
+    plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    assert not any(line.startswith("SCAN expense_") for line in plan), plan
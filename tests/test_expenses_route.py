@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import pytest
+from tests.helpers import create_group, add_expense
+
+# Test 1: Without paging parameters the full list is returned
+def test_list_expenses_unpaginated(backend_client):
+    group_id = create_group(backend_client, ["alice", "bob"])
+    for price in (10.0, 20.0, 30.0):
+        add_expense(backend_client, group_id, price, "alice", ["bob"])
+
+    response = backend_client.get(f"/groups/{group_id}/expenses")
+
+    assert response.status_code == 200
+    assert [e["price"] for e in response.json] == [10.0, 20.0, 30.0]
+
+# Test 2: Following next_cursor walks every expense once
+def test_list_expenses_paginated(backend_client):
+    group_id = create_group(backend_client, ["alice", "bob"])
+    for price in range(1, 6):
+        add_expense(backend_client, group_id, float(price), "alice", ["bob"])
+
+    prices = []
+    cursor = None
+    pages = 0
+    while True:
+        query = f"?limit=2&cursor={cursor}" if cursor else "?limit=2"
+        body = backend_client.get(f"/groups/{group_id}/expenses{query}").json
+        prices.extend(e["price"] for e in body["expenses"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert prices == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert pages == 3
+
+# Test 3: Malformed cursors are rejected
+def test_list_expenses_invalid_cursor(backend_client):
+    group_id = create_group(backend_client, ["alice"])
+    response = backend_client.get(f"/groups/{group_id}/expenses?cursor=abc")
+    assert response.status_code == 400
+
+# Test 4: A limit that is not a positive integer is rejected, not read as no paging at all
+@pytest.mark.parametrize("limit", ["abc", "-5", "0", ""])
+def test_list_expenses_invalid_limit(backend_client, limit):
+    group_id = create_group(backend_client, ["alice"])
+    response = backend_client.get(f"/groups/{group_id}/expenses?limit={limit}")
+
+    assert response.status_code == 400
+    assert response.json == {"error": "limit must be a positive integer"}
+
+# Test 5: CSV export has a header and one row per expense
+def test_export_expenses_csv(backend_client):
+    group_id = create_group(backend_client, ["alice", "bob"])
+    add_expense(backend_client, group_id, 60.0, "alice", ["alice", "bob"])
+    add_expense(backend_client, group_id, 10.0, "bob", ["alice"])
+
+    response = backend_client.get(f"/groups/{group_id}/expenses/export?format=csv")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ["id", "description", "price", "creditors", "debtors"]
+    assert [row[2:] for row in rows[1:]] == [["60.0", "alice:60.0", "alice;bob"], ["10.0", "bob:10.0", "alice"]]
+
+# Test 6: NDJSON export matches the expense listing
+def test_export_expenses_ndjson(backend_client):
+    group_id = create_group(backend_client, ["alice", "bob", "carol"])
+    for price in (5.0, 15.0, 25.0):
+        add_expense(backend_client, group_id, price, "carol", ["alice", "bob"])
+
+    response = backend_client.get(f"/groups/{group_id}/expenses/export?format=ndjson")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert lines == backend_client.get(f"/groups/{group_id}/expenses").json
+
+# Test 7: Unknown export formats are rejected
+def test_export_expenses_unknown_format(backend_client):
+    group_id = create_group(backend_client, ["alice"])
+    assert backend_client.get(f"/groups/{group_id}/expenses/export?format=xml").status_code == 400
+
+# Test 8: Exports of unknown groups and malformed ids are rejected before streaming
+@pytest.mark.parametrize("group_id, error", [
+    ("00000000-0000-0000-0000-000000000000", "Group not found"),
+    ("not-a-uuid", "badly formed hexadecimal UUID string"),
+])
+def test_export_expenses_unknown_group(backend_client, group_id, error):
+    response = backend_client.get(f"/groups/{group_id}/expenses/export?format=csv")
+
+    assert response.status_code == 400
+    assert response.json == {"error": error}
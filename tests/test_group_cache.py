@@ -0,0 +1,66 @@
+import pytest
+from domain.models import Member
+from infrastructure.cache import LRUCache
+from infrastructure.db.unit_of_work import SQLAlchemyUnitOfWork
+from tests.helpers import create_group
+
+# Test 1: Repeated reads of a group are served from the cache
+def test_group_reads_hit_cache(client, query_counter):
+    group_id, owner_id = create_group(client, ["alice", "bob"], with_owner=True)
+
+    query_counter.reset()
+    first = client.get(f"/groups/{group_id}?owner_id={owner_id}")
+    cold = query_counter.count
+    query_counter.reset()
+    second = client.get(f"/groups/{group_id}?owner_id={owner_id}")
+
+    assert first.json == second.json
+    assert query_counter.count < cold
+    stats = client.get("/stats/cache").json["groups"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+# Test 2: A write made by another worker is seen through the version stamp
+def test_cache_invalidated_across_workers(app, client):
+    from app import create_app
+    other_worker = create_app().test_client()
+    group_id, owner_id = create_group(client, ["alice", "bob"], with_owner=True)
+    client.get(f"/groups/{group_id}?owner_id={owner_id}")
+
+    other_worker.post(f"/groups/{group_id}/members", json={"username": "carol"})
+    new_owner = other_worker.post("/users", json={}).json["id"]
+    other_worker.post(f"/groups/{group_id}/join", json={"user_id": new_owner})
+
+    group = client.get(f"/groups/{group_id}?owner_id={owner_id}").json
+    assert group["members"] == ["alice", "bob", "carol"]
+    assert str(new_owner) in group["owner_ids"]
+
+# Test 3: Changes that are rolled back never reach the cache
+def test_rolled_back_changes_not_cached(client):
+    group_id = create_group(client, ["alice", "bob"])
+    cache = LRUCache(10)
+
+    uow = SQLAlchemyUnitOfWork(group_cache=cache)
+    try:
+        uow.groups.add_member(group_id, Member(id=0, username="carol", group_id=group_id))
+        assert len(uow.groups.get_by_id(group_id).members) == 3
+        uow.rollback()
+    finally:
+        uow.close()
+
+    uow = SQLAlchemyUnitOfWork(group_cache=cache)
+    try:
+        assert [m.username for m in uow.groups.get_by_id(group_id).members] == ["alice", "bob"]
+    finally:
+        uow.close()
+    assert cache.stats()["hits"] == 0
+
+# Test 4: Callers cannot change the cached group
+def test_cached_group_is_copied(client):
+    group_id = create_group(client, ["alice", "bob"])
+    uow = SQLAlchemyUnitOfWork(group_cache=LRUCache(10))
+    try:
+        uow.groups.get_by_id(group_id).members.clear()
+        assert len(uow.groups.get_by_id(group_id).members) == 2
+    finally:
+        uow.close()
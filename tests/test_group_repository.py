@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from domain.models import Member
+from infrastructure.db.repository import SQLAlchemyGroupRepository
+from tests.helpers import make_owner, seed_group, seed_groups
+
+# Test 1: Groups come back with owners and members
+def test_get_groups_by_owner_id(session, session_uow):
+    owner = make_owner(session_uow)
+    seed_groups(session_uow, owner, 2, 3)
+    seed_groups(session_uow, make_owner(session_uow), 1, 1)
+
+    groups = SQLAlchemyGroupRepository(session).get_groups_by_owner_id(owner.id)
+
+    assert sorted(g.name for g in groups) == ["Group 0", "Group 1"]
+    for group in groups:
+        assert group.owners == [owner]
+        assert sorted(m.username for m in group.members) == ["member0", "member1", "member2"]
+
+# Test 2: Summaries only carry id, name and member count
+def test_get_group_summaries_by_owner_id(session, session_uow):
+    owner = make_owner(session_uow)
+    [group] = seed_groups(session_uow, owner, 1, 4)
+    seed_group(session_uow, [], name="Empty", owner=owner)
+
+    summaries = SQLAlchemyGroupRepository(session).get_group_summaries_by_owner_id(owner.id)
+
+    assert sorted((s.name, s.member_count) for s in summaries) == [("Empty", 0), ("Group 0", 4)]
+    assert str(next(s.id for s in summaries if s.name == "Group 0")) == group.id
+
+# Test 3: Query count does not grow with the number of groups
+@pytest.mark.parametrize("group_count", [1, 10, 50])
+def test_get_groups_by_owner_id_query_budget(session, session_uow, query_counter, group_count):
+    owner = make_owner(session_uow)
+    seed_groups(session_uow, owner, group_count, 3)
+    session.expire_all()
+
+    query_counter.reset()
+    groups = SQLAlchemyGroupRepository(session).get_groups_by_owner_id(owner.id)
+
+    assert len(groups) == group_count
+    assert query_counter.count <= 3
+
+# Test 4: Members are looked up by username within their group only
+def test_member_username_lookups(session, session_uow, query_counter):
+    owner = make_owner(session_uow)
+    [group, other] = seed_groups(session_uow, owner, 2, 3)
+    group_repo = SQLAlchemyGroupRepository(session)
+
+    query_counter.reset()
+    member = group_repo.get_member_by_username(group.id, "member1")
+    assert member.username == "member1"
+    assert str(member.group_id) == group.id
+    assert group_repo.get_member_by_username(group.id, "nobody") is None
+    assert group_repo.has_member_username(other.id, "member2")
+    assert not group_repo.has_member_username(other.id, "nobody")
+    assert group_repo.exists(group.id)
+    assert not group_repo.exists("00000000-0000-0000-0000-000000000000")
+    assert query_counter.count == 6
+
+# Test 5: Only a duplicate username becomes the service error, other integrity errors pass through
+def test_add_member_integrity_errors(session, session_uow):
+    owner = make_owner(session_uow)
+    [group] = seed_groups(session_uow, owner, 1, 1)
+    group_repo = SQLAlchemyGroupRepository(session)
+
+    with pytest.raises(ValueError, match="already exists") as duplicate:
+        group_repo.add_member(group.id, Member(id=0, username="member0", group_id=group.id))
+    assert isinstance(duplicate.value.__cause__, IntegrityError)
+    session.rollback()
+
+    with pytest.raises(IntegrityError, match="NOT NULL"):
+        group_repo.add_member(group.id, Member(id=0, username=None, group_id=group.id))
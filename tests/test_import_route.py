@@ -0,0 +1,76 @@
+import io
+import json
+import pytest
+from infrastructure.api.formats import iter_json_array
+from tests.helpers import create_group, add_expense
+
+EXPENSES = [
+    {"description": "Pizza", "price": 90.0, "creditors": [{"name": "alice", "amount": 90.0}], "debtors": ["alice", "bob", "carol"]},
+    {"description": "Taxi", "price": 30.0, "creditors": [{"name": "bob", "amount": 30.0}], "debtors": ["carol"]},
+]
+
+# Test 1: A JSON array is imported in one request
+def test_import_json(client):
+    group_id = create_group(client, ["alice", "bob", "carol"])
+
+    response = client.post(f"/groups/{group_id}/expenses/import", json=EXPENSES)
+
+    assert response.status_code == 201
+    assert response.json["created"] == 2
+    listed = client.get(f"/groups/{group_id}/expenses").json
+    assert [e["description"] for e in listed] == ["Pizza", "Taxi"]
+    summary = client.get(f"/groups/{group_id}/summary").json
+    assert summary["balances"] == {"alice": 60.0, "bob": 0.0, "carol": -60.0}
+
+# Test 2: A CSV export can be imported into another group
+def test_import_csv_round_trip(client):
+    source_id = create_group(client, ["alice", "bob"])
+    add_expense(client, source_id, 60.0, "alice", ["alice", "bob"])
+    add_expense(client, source_id, 10.0, "bob", ["alice"])
+    exported = client.get(f"/groups/{source_id}/expenses/export?format=csv").data
+
+    target_id = create_group(client, ["alice", "bob"])
+    response = client.post(
+        f"/groups/{target_id}/expenses/import",
+        data={"file": (io.BytesIO(exported), "expenses.csv")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 201
+    strip_ids = lambda expenses: [{k: v for k, v in e.items() if k != "id"} for e in expenses]
+    assert strip_ids(client.get(f"/groups/{target_id}/expenses").json) == strip_ids(client.get(f"/groups/{source_id}/expenses").json)
+
+# Test 3: Invalid rows are reported and nothing is imported
+def test_import_reports_row_errors(client):
+    group_id = create_group(client, ["alice", "bob", "carol"])
+    rows = EXPENSES + [
+        {"description": "Bus", "price": 5.0, "creditors": [{"name": "zoe", "amount": 5.0}], "debtors": ["bob"]},
+        {"description": "Museum", "creditors": [], "debtors": ["bob"]},
+    ]
+
+    response = client.post(f"/groups/{group_id}/expenses/import", json=rows)
+
+    assert response.status_code == 400
+    assert [e["row"] for e in response.json["errors"]] == [3, 4]
+    assert client.get(f"/groups/{group_id}/expenses").json == []
+
+# Test 4: Uploads over MAX_CONTENT_LENGTH are refused
+def test_import_too_large(app, client):
+    group_id = create_group(client, ["alice", "bob", "carol"])
+    app.config["MAX_CONTENT_LENGTH"] = 1024
+
+    response = client.post(f"/groups/{group_id}/expenses/import", json=EXPENSES * 50)
+
+    assert response.status_code == 413
+
+# Test 5: The JSON parser handles elements split across chunks
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_iter_json_array_chunks(chunk_size):
+    data = EXPENSES + [1.25, -3e2, "text", None, []]
+    assert list(iter_json_array(io.BytesIO(json.dumps(data).encode()), chunk_size)) == data
+
+# Test 6: Malformed JSON arrays are rejected
+@pytest.mark.parametrize("raw", [b"{}", b"[1,]", b"[1 2]", b"[{\"a\": 1}"])
+def test_iter_json_array_malformed(raw):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.BytesIO(raw), 2))
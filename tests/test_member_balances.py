@@ -0,0 +1,78 @@
+import pytest
+from domain.models import Expense
+from domain.services import calculate_group_balance
+from infrastructure.db.ledger import rebuild_ledger, verify_ledger
+from infrastructure.db.models import MemberBalanceDB
+from infrastructure.db.repository import SQLAlchemyGroupRepository, SQLAlchemyExpenseRepository
+from tests.helpers import seed_group
+
+# Utils to read balances by username
+def ledger_by_name(session, group_id):
+    return {m.username: b for m, b in SQLAlchemyGroupRepository(session).get_balances(group_id).items()}
+
+def replay_by_name(session, group_id):
+    balances = calculate_group_balance(
+        SQLAlchemyExpenseRepository(session), SQLAlchemyGroupRepository(session), group_id
+    )
+    return {m.username: b for m, b in balances.items()}
+
+# Test 1: New members start with a zero balance
+def test_new_members_have_zero_balance(session, session_uow):
+    group, _ = seed_group(session_uow, ["alice", "bob"])
+    assert ledger_by_name(session, group.id) == {"alice": 0.0, "bob": 0.0}
+
+# Test 2: Adding an expense applies its delta
+def test_add_expense_updates_ledger(session, session_uow):
+    group, [alice, bob, carol] = seed_group(session_uow, ["alice", "bob", "carol"])
+    SQLAlchemyExpenseRepository(session).add(Expense(
+        id=0, description="Pizza", total_amount=90.0, group_id=group.id,
+        creditors=[(alice, 90.0)], debtors=[alice, bob, carol]
+    ))
+    assert ledger_by_name(session, group.id) == {"alice": 60.0, "bob": -30.0, "carol": -30.0}
+
+# Test 3: Updating an expense replaces its previous delta
+def test_update_expense_updates_ledger(session, session_uow):
+    group, [alice, bob, carol] = seed_group(session_uow, ["alice", "bob", "carol"])
+    expense_repo = SQLAlchemyExpenseRepository(session)
+    expense = Expense(
+        id=0, description="Pizza", total_amount=90.0, group_id=group.id,
+        creditors=[(alice, 90.0)], debtors=[alice, bob, carol]
+    )
+    expense_repo.add(expense)
+
+    expense.total_amount = 40.0
+    expense.creditors = [(bob, 40.0)]
+    expense.debtors = [alice, carol]
+    expense_repo.update(expense)
+
+    assert ledger_by_name(session, group.id) == {"alice": -20.0, "bob": 40.0, "carol": -20.0}
+    assert ledger_by_name(session, group.id) == replay_by_name(session, group.id)
+
+# Test 4: Removing an expense reverts its delta
+def test_remove_expense_updates_ledger(session, session_uow):
+    group, [alice, bob] = seed_group(session_uow, ["alice", "bob"])
+    expense_repo = SQLAlchemyExpenseRepository(session)
+    taxi = Expense(id=0, description="Taxi", total_amount=60.0, group_id=group.id, creditors=[(alice, 60.0)], debtors=[bob])
+    bus = Expense(id=0, description="Bus", total_amount=10.0, group_id=group.id, creditors=[(bob, 10.0)], debtors=[alice, bob])
+    expense_repo.add(taxi)
+    expense_repo.add(bus)
+
+    expense_repo.remove(taxi.id)
+
+    assert ledger_by_name(session, group.id) == {"alice": -5.0, "bob": 5.0}
+
+# Test 5: Verify reports drift and rebuild repairs it
+def test_verify_and_rebuild_ledger(session, session_uow):
+    group, [alice, bob] = seed_group(session_uow, ["alice", "bob"])
+    SQLAlchemyExpenseRepository(session).add(Expense(
+        id=0, description="Taxi", total_amount=60.0, group_id=group.id, creditors=[(alice, 60.0)], debtors=[bob]
+    ))
+    assert verify_ledger(session) == []
+
+    session.query(MemberBalanceDB).delete()
+    session.commit()
+    assert sorted(username for _, username, _, _ in verify_ledger(session)) == ["alice", "bob"]
+
+    assert rebuild_ledger(session) == 1
+    assert verify_ledger(session) == []
+    assert ledger_by_name(session, group.id) == {"alice": 60.0, "bob": -60.0}
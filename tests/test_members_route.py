@@ -0,0 +1,55 @@
+import pytest
+from tests.helpers import create_group, add_expense
+
+# Test 1: A member who only paid for an expense cannot be removed
+def test_delete_creditor_member(client):
+    group_id = create_group(client, ["alice", "bob", "carol"])
+    add_expense(client, group_id, 30.0, "alice", ["bob", "carol"])
+
+    response = client.delete(f"/groups/{group_id}/members/alice")
+
+    assert response.status_code == 400
+    assert "alice" in client.get(f"/groups/{group_id}/members").json
+
+# Test 2: A member who owes cannot be removed either
+def test_delete_debtor_member(client):
+    group_id = create_group(client, ["alice", "bob"])
+    add_expense(client, group_id, 30.0, "alice", ["bob"])
+
+    assert client.delete(f"/groups/{group_id}/members/bob").status_code == 400
+
+# Test 3: Removing a member costs the same queries however many expenses the group has
+@pytest.mark.parametrize("expense_count", [1, 20])
+def test_delete_member_query_budget(client, query_counter, expense_count):
+    group_id = create_group(client, ["alice", "bob", "carol"])
+    for _ in range(expense_count):
+        add_expense(client, group_id, 30.0, "alice", ["bob"])
+
+    query_counter.reset()
+    response = client.delete(f"/groups/{group_id}/members/carol")
+    queries = query_counter.count
+
+    assert response.status_code == 200
+    assert client.get(f"/groups/{group_id}/members").json == ["alice", "bob"]
+    assert queries <= 12
+
+# Test 4: Adding and renaming members costs the same queries in small and large groups
+@pytest.mark.parametrize("member_count", [3, 60])
+def test_member_writes_query_budget(client, query_counter, member_count):
+    group_id = create_group(client, [f"member{i}" for i in range(member_count)])
+
+    query_counter.reset()
+    assert client.post(f"/groups/{group_id}/members", json={"username": "zoe"}).status_code == 201
+    assert client.put(f"/groups/{group_id}/members/zoe", json={"new_name": "zara"}).status_code == 200
+    assert query_counter.count <= 11
+
+# Test 5: Renames and additions are rejected when the old name is missing or the new one is taken
+def test_rename_member_conflicts(client):
+    group_id = create_group(client, ["alice", "bob"])
+
+    taken = client.put(f"/groups/{group_id}/members/alice", json={"new_name": "bob"})
+    assert (taken.status_code, taken.json) == (400, {"error": "A member with the new name already exists in the group"})
+    missing = client.put(f"/groups/{group_id}/members/nobody", json={"new_name": "carol"})
+    assert (missing.status_code, missing.json) == (400, {"error": "Member not found"})
+    duplicate = client.post(f"/groups/{group_id}/members", json={"username": "alice"})
+    assert (duplicate.status_code, duplicate.json) == (400, {"error": "A member with the new name already exists in the group"})
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from prometheus_client import REGISTRY
+from tests.helpers import create_group
+
+# Utils to read a sample of the process registry, missing samples read as zero
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+# Test 1: Requests are counted by route template, method and status code
+def test_requests_counted_by_route(client):
+    group_id = create_group(client, ["alice", "bob"])
+    route = {"method": "GET", "route": "/groups/<group_id>/members"}
+    before_ok = sample("splitred_http_requests_total", status="200", **route)
+    before_latency = sample("splitred_http_request_duration_seconds_count", **route)
+
+    client.get(f"/groups/{group_id}/members")
+    client.get(f"/groups/{group_id}/members")
+    client.get("/no/such/route")
+
+    assert sample("splitred_http_requests_total", status="200", **route) == before_ok + 2
+    assert sample("splitred_http_request_duration_seconds_count", **route) == before_latency + 2
+    assert sample("splitred_http_requests_total", method="GET", route="unmatched", status="404") >= 1
+
+# Test 2: SQL statements and their time are attributed to the route
+def test_sql_statements_per_route(client, query_counter):
+    group_id = create_group(client, ["alice", "bob"])
+    route = {"method": "GET", "route": "/groups/<group_id>/summary"}
+    before = sample("splitred_db_statements_total", **route)
+
+    query_counter.reset()
+    client.get(f"/groups/{group_id}/summary")
+
+    assert sample("splitred_db_statements_total", **route) - before == query_counter.count
+    assert sample("splitred_db_statement_duration_seconds_total", **route) > 0
+    assert sample("splitred_db_pool_checkout_wait_seconds_count") > 0
+
+# Test 3: Requests refused by the rate limiter are counted too
+def test_rate_limited_requests_counted(client):
+    labels = {"method": "POST", "route": "/users", "status": "429"}
+    before = sample("splitred_http_requests_total", **labels)
+
+    statuses = [client.post("/users", json={}).status_code for _ in range(11)]
+
+    assert statuses[-1] == 429
+    assert sample("splitred_http_requests_total", **labels) == before + 1
+
+# Test 4: The endpoint serves the Prometheus text format
+def test_metrics_endpoint(client):
+    client.post("/users", json={})
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert "# TYPE splitred_http_request_duration_seconds histogram" in body
+    assert 'splitred_http_requests_total{method="POST",route="/users",status="201"}' in body
+
+# Test 5: Worker processes sharing a directory are added up
+def test_metrics_aggregated_across_processes(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "DATABASE_URL": "memory://"}
+    root = Path(__file__).parent.parent
+    worker = "from app import app; client = app.test_client(); print(client.{})"
+
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker.format('post("/users", json={}).status_code')], cwd=root, env=env, check=True)
+    scraped = subprocess.run(
+        [sys.executable, "-c", worker.format('get("/metrics").get_data(as_text=True)')],
+        cwd=root, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+
+    assert 'splitred_http_requests_total{method="POST",route="/users",status="201"} 2.0' in scraped
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from domain.models import Member
+from infrastructure.db.migrations import MIGRATIONS, current_version, run_migrations
+from infrastructure.db.models import Base
+from infrastructure.db.unit_of_work import SQLAlchemyUnitOfWork
+from tests.helpers import make_owner, seed_group
+
+LATEST = MIGRATIONS[-1][0]
+
+# Utils to seed a committed group in a database and return its id
+def seed_database(engine, usernames):
+    uow = SQLAlchemyUnitOfWork(sessionmaker(bind=engine))
+    try:
+        group, _ = seed_group(uow, usernames, owner=make_owner(uow), expense_count=1)
+        uow.commit()
+        return group.id
+    finally:
+        uow.close()
+
+# Utils to turn a current database into one created before the migrations existed
+def downgrade_to_legacy(engine):
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX {index.name}"))
+        conn.execute(text("DROP TABLE member_balances"))
+        conn.execute(text("DROP TABLE schema_migrations"))
+        conn.execute(text("ALTER TABLE groups DROP COLUMN version"))
+
+def index_names(engine):
+    inspector = inspect(engine)
+    return {index["name"] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/splitred.db")
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+# Test 1: A fresh database gets the whole schema and every version
+def test_fresh_database(file_engine):
+    assert run_migrations(file_engine) == []
+    assert current_version(file_engine) == LATEST
+    assert "uq_members_group_id_username" in index_names(file_engine)
+
+# Test 2: A legacy database is upgraded in place and keeps its data
+def test_upgrade_legacy_database(file_engine):
+    run_migrations(file_engine)
+    group_id = seed_database(file_engine, ["alice", "bob"])
+    downgrade_to_legacy(file_engine)
+    assert current_version(file_engine) == 0
+
+    assert run_migrations(file_engine) == [version for version, _, _ in MIGRATIONS]
+    assert current_version(file_engine) == LATEST
+    assert {index.name for table in Base.metadata.sorted_tables for index in table.indexes} <= index_names(file_engine)
+
+    uow = SQLAlchemyUnitOfWork(sessionmaker(bind=file_engine))
+    try:
+        balances = {member.username: balance for member, balance in uow.groups.get_balances(group_id).items()}
+        assert balances == {"alice": 15.0, "bob": -15.0}
+        assert uow.groups.get_version(group_id) == 0
+    finally:
+        uow.close()
+
+# Test 3: Running again applies nothing
+def test_migrations_are_idempotent(file_engine):
+    run_migrations(file_engine)
+    assert run_migrations(file_engine) == []
+
+# Test 4: Duplicate usernames stop the unique index with a clear error
+def test_duplicate_usernames_block_upgrade(file_engine):
+    run_migrations(file_engine)
+    seed_database(file_engine, ["alice", "bob"])
+    downgrade_to_legacy(file_engine)
+    with file_engine.begin() as conn:
+        conn.execute(text("INSERT INTO members (username, group_id) SELECT username, group_id FROM members WHERE username = 'alice'"))
+
+    with pytest.raises(RuntimeError, match="alice"):
+        run_migrations(file_engine)
+    assert current_version(file_engine) == 2
+
+# Test 5: The database rejects a second member with the same name
+def test_unique_username_per_group(session_uow):
+    group, _ = seed_group(session_uow, ["alice"])
+
+    with pytest.raises(ValueError):
+        session_uow.members.add(Member(id=0, username="alice", group_id=group.id), group.id)
@@ -0,0 +1,107 @@
+import pytest
+from tests.query_budget import RequestQueries
+
+# Most queries one request of each route may run. Payloads are the same whatever the
+# size of the group, so a route going over its budget on a big group scales with the data.
+QUERY_BUDGETS = {
+    "POST /users": 1,
+    "GET /users/<int:user_id>": 1,
+    "POST /groups": 15,
+    "POST /groups/<group_id>/join": 9,
+    "GET /groups": 3,
+    "GET /groups/<group_id>": 4,
+    "GET /groups/<group_id>/expenses": 4,
+    "GET /groups/<group_id>/expenses/export": 2,
+    "POST /groups/<group_id>/expenses": 7,
+    "POST /groups/<group_id>/expenses/import": 11,
+    "PUT /expenses/<expense_id>": 15,
+    "DELETE /expenses/<expense_id>": 9,
+    "POST /groups/<group_id>/members": 5,
+    "GET /groups/<group_id>/members": 1,
+    "PUT /groups/<group_id>/members/<old_name>": 6,
+    "DELETE /groups/<group_id>/members/<username>": 11,
+    "GET /groups/<group_id>/summary": 2,
+    "GET /stats/cache": 0,
+}
+
+EXPENSE = {"description": "Dinner", "price": 30.0, "creditors": [{"name": "member0", "amount": 30.0}], "debtors": ["member1", "member2"]}
+
+# Utils to seed a group through the API and call every route once on it
+def seed(client, member_count, expense_count):
+    owner_id = client.post("/users", json={}).json["id"]
+    members = [f"member{i}" for i in range(member_count)]
+    group_id = client.post("/groups", json={"name": "Trip", "owner_id": owner_id, "members": members}).json["id"]
+    assert client.post(f"/groups/{group_id}/expenses/import", json=[EXPENSE] * expense_count).status_code == 201
+    return group_id, owner_id
+
+def finished(response):
+    # Streamed bodies keep their request open until they are read
+    response.get_data()
+    assert response.status_code < 400
+    return response
+
+def call_every_route(client, group_id, owner_id):
+    new_owner = finished(client.post("/users", json={})).json["id"]
+    finished(client.get(f"/users/{owner_id}"))
+    finished(client.post("/groups", json={"name": "Other", "owner_id": owner_id, "members": ["member0", "member1"]}))
+    finished(client.post(f"/groups/{group_id}/join", json={"user_id": new_owner}))
+    finished(client.get(f"/groups?owner_id={owner_id}"))
+    finished(client.get(f"/groups/{group_id}?owner_id={owner_id}"))
+    finished(client.get(f"/groups/{group_id}/expenses"))
+    finished(client.get(f"/groups/{group_id}/expenses?limit=2&cursor=1"))
+    finished(client.get(f"/groups/{group_id}/expenses/export?format=csv"))
+    finished(client.get(f"/groups/{group_id}/expenses/export?format=ndjson"))
+    expense_id = finished(client.post(f"/groups/{group_id}/expenses", json=EXPENSE)).json["id"]
+    finished(client.put(f"/expenses/{expense_id}", json={**EXPENSE, "debtors": ["member1"]}))
+    finished(client.post(f"/groups/{group_id}/expenses/import", json=[EXPENSE] * 2))
+    finished(client.delete(f"/expenses/{expense_id}"))
+    finished(client.post(f"/groups/{group_id}/members", json={"username": "zoe"}))
+    finished(client.get(f"/groups/{group_id}/members"))
+    finished(client.put(f"/groups/{group_id}/members/zoe", json={"new_name": "zara"}))
+    finished(client.delete(f"/groups/{group_id}/members/zara"))
+    finished(client.get(f"/groups/{group_id}/summary"))
+    finished(client.get("/stats/cache"))
+
+# Test 1: Every route stays within its budget, on a small group and a big one alike
+@pytest.mark.query_budget(max_repeats=3)
+def test_route_query_budgets(client, request_queries):
+    counts = {}
+    for member_count, expense_count in [(3, 2), (40, 60)]:
+        group_id, owner_id = seed(client, member_count, expense_count)
+        request_queries.reset()
+        call_every_route(client, group_id, owner_id)
+        counts[member_count] = request_queries.by_route()
+
+    assert set(counts[3]) == set(QUERY_BUDGETS)
+    for route, budget in QUERY_BUDGETS.items():
+        assert max(counts[3][route]) <= budget, f"{route}: {counts[3][route]}"
+        assert counts[40][route] == counts[3][route], f"{route} grows with the group: {counts[3][route]} -> {counts[40][route]}"
+
+# Test 2: A statement shape repeated in one request is reported, executemany batches aside
+def test_repeated_statements_reported():
+    recorded = RequestQueries("GET /groups", [
+        ("SELECT * FROM members WHERE id = ?", False),
+        ("SELECT * FROM members\n WHERE id = ?", False),
+        ("SELECT * FROM members WHERE id = ?", False),
+        ("SELECT * FROM members WHERE id = ?", False),
+        ("SELECT * FROM groups WHERE id IN (?, ?)", False),
+        ("INSERT INTO members (username) VALUES (?)", True),
+        ("INSERT INTO members (username) VALUES (?)", True),
+        ("INSERT INTO expenses (description) VALUES (?)", False),
+        ("INSERT INTO expenses (description) VALUES (?)", False),
+    ])
+    assert recorded.count == 9
+    assert recorded.repeated(max_repeats=3) == {"SELECT * FROM members WHERE id = ?": 4}
+    assert recorded.repeated(max_repeats=1) == {
+        "SELECT * FROM members WHERE id = ?": 4,
+        "INSERT INTO expenses (description) VALUES (?)": 2,
+    }
+
+# Test 3: Requests over budget are reported with their route
+def test_budget_violations(client, request_queries):
+    client.post("/users", json={})
+    client.get("/stats/cache")
+
+    assert request_queries.violations(max_queries=1) == []
+    assert request_queries.violations(max_queries=0) == ["POST /users ran 1 queries, budget is 0"]
+    assert request_queries.last.route == "GET /stats/cache"
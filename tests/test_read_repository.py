@@ -0,0 +1,72 @@
+import pytest
+from domain.models import Expense, Member
+from infrastructure.db.repository import SQLAlchemyGroupRepository, SQLAlchemyExpenseRepository
+from tests.helpers import make_owner, seed_groups
+
+# Test 1: Groups are read with their owners and members in id order
+def test_group_reads(session, session_uow):
+    owner = make_owner(session_uow)
+    [group, other] = seed_groups(session_uow, owner, 2, 3, 2)
+    expense = SQLAlchemyExpenseRepository(session).list_by_group(group.id)[0]
+    group_repo = SQLAlchemyGroupRepository(session)
+    session.expunge_all()
+
+    read = group_repo.get_by_id(group.id)
+    assert (str(read.id), read.name, read.owners) == (group.id, "Group 0", [owner])
+    assert [m.username for m in read.members] == ["member0", "member1", "member2"]
+    assert group_repo.get_by_expense_id(str(expense.id)) == read
+    assert sorted(g.name for g in group_repo.get_groups_by_owner_id(owner.id)) == ["Group 0", "Group 1"]
+    assert sorted((s.name, s.member_count) for s in group_repo.get_group_summaries_by_owner_id(owner.id)) == [("Group 0", 3), ("Group 1", 3)]
+    assert [(m.username, str(m.group_id)) for m in group_repo.get_members(other.id)] == [(f"member{j}", other.id) for j in range(3)]
+    assert group_repo.get_member_by_username(group.id, "member1") == read.members[1]
+    assert group_repo.get_owners(group.id) == [owner]
+    assert group_repo.get_by_id("00000000-0000-0000-0000-000000000000") is None
+    assert group_repo.get_member_by_username(group.id, "nobody") is None
+
+# Test 2: Expense pages follow each other and carry their participants
+def test_expense_pages(session, session_uow):
+    [group, _] = seed_groups(session_uow, make_owner(session_uow), 2, 3, 5)
+    expense_repo = SQLAlchemyExpenseRepository(session)
+    members = SQLAlchemyGroupRepository(session).get_members(group.id)
+
+    first = expense_repo.list_by_group(group.id, limit=3)
+    rest = expense_repo.list_by_group(group.id, after_id=first[-1].id)
+
+    assert [e.description for e in first + rest] == [f"Expense {k}" for k in range(5)]
+    assert [e.creditors for e in first + rest] == [[(members[k % 3], 30.0)] for k in range(5)]
+    assert all(e.debtors == members for e in first + rest)
+    assert expense_repo.get_by_id(str(first[0].id)) == Expense(
+        id=first[0].id, description="Expense 0", total_amount=30.0, group_id=first[0].group_id
+    )
+    assert expense_repo.list_by_group(group.id, after_id=rest[-1].id) == []
+
+# Test 3: Reads load no ORM instance and take as many statements whatever the number of rows
+@pytest.mark.parametrize("group_count, expense_count", [(1, 3), (10, 30)])
+def test_reads_bypass_identity_map(session, session_uow, query_counter, group_count, expense_count):
+    owner = make_owner(session_uow)
+    groups = seed_groups(session_uow, owner, group_count, 3, expense_count)
+    session.expunge_all()
+
+    query_counter.reset()
+    assert len(SQLAlchemyGroupRepository(session).get_groups_by_owner_id(owner.id)) == group_count
+    assert len(SQLAlchemyExpenseRepository(session).list_by_group(groups[0].id)) == expense_count
+
+    assert query_counter.count == 3 + 4
+    assert len(session.identity_map) == 0
+
+# Test 4: Reads see the writes of the same unit of work
+def test_reads_after_writes(session, session_uow):
+    [group] = seed_groups(session_uow, make_owner(session_uow), 1, 2)
+    group_repo, expense_repo = SQLAlchemyGroupRepository(session), SQLAlchemyExpenseRepository(session)
+    group_repo.get_by_id(group.id)
+
+    carol = Member(id=0, username="carol", group_id=group.id)
+    group_repo.add_member(group.id, carol)
+    expense_repo.add(Expense(
+        id=0, description="Taxi", total_amount=10.0, group_id=group.id,
+        creditors=[(carol, 10.0)], debtors=[carol]
+    ))
+
+    assert carol in group_repo.get_by_id(group.id).members
+    [expense] = expense_repo.list_by_group(group.id)
+    assert expense.creditors == [(carol, 10.0)]
@@ -0,0 +1,140 @@
+import pytest
+from domain.models import User, Expense, Member
+from domain.services import calculate_group_balance, calculate_group_balance_columnar, remove_member_from_group
+from tests.helpers import make_owner, seed_group
+
+# Utils to add an expense through a unit of work
+def add_expense(uow, group, creditors, debtors, total_amount=None):
+    expense = Expense(
+        id=0, description="Expense", total_amount=total_amount or sum(a for _, a in creditors),
+        group_id=group.id, creditors=creditors, debtors=debtors
+    )
+    uow.expenses.add(expense)
+    return expense
+
+# Test 1: Groups come back with their owners and members
+def test_groups_by_id_and_owner(uow):
+    owner = make_owner(uow)
+    group, _ = seed_group(uow, ["alice", "bob"], owner=owner)
+    seed_group(uow, ["carol"], name="Other", owner=make_owner(uow))
+
+    loaded = uow.groups.get_by_id(group.id)
+    assert loaded.name == "Trip"
+    assert loaded.owners == [owner]
+    assert sorted(m.username for m in loaded.members) == ["alice", "bob"]
+
+    assert [g.name for g in uow.groups.get_groups_by_owner_id(str(owner.id))] == ["Trip"]
+    [summary] = uow.groups.get_group_summaries_by_owner_id(str(owner.id))
+    assert (summary.name, summary.member_count) == ("Trip", 2)
+    assert uow.groups.get_owners(group.id) == [owner]
+
+# Test 2: Usernames are looked up and kept unique within the group
+def test_member_usernames(uow):
+    group, [alice, bob] = seed_group(uow, ["alice", "bob"])
+
+    assert uow.groups.get_member_by_username(group.id, "alice") == alice
+    assert uow.groups.has_member_username(group.id, "bob")
+    assert not uow.groups.has_member_username(group.id, "carol")
+
+    uow.groups.update_member_name(group.id, "bob", "robert")
+    assert uow.groups.get_member_by_username(group.id, "robert") == bob
+    assert not uow.groups.has_member_username(group.id, "bob")
+
+    uow.groups.remove_member(group.id, alice)
+    assert [m.username for m in uow.groups.get_members(group.id)] == ["robert"]
+
+    # Last, a failed flush leaves the SQLAlchemy unit of work unusable
+    with pytest.raises(ValueError):
+        uow.members.add(Member(id=0, username="robert", group_id=group.id), group.id)
+
+# Test 3: Every write to the group bumps its version
+def test_version_bumps(uow):
+    group, [alice, bob] = seed_group(uow, ["alice", "bob"])
+    versions = [uow.groups.get_version(group.id)]
+
+    expense = add_expense(uow, group, [(alice, 10.0)], [bob])
+    versions.append(uow.groups.get_version(group.id))
+    uow.expenses.remove(str(expense.id))
+    versions.append(uow.groups.get_version(group.id))
+    uow.groups.add_owner(group.id, User(id=0))
+    versions.append(uow.groups.get_version(group.id))
+
+    assert versions == sorted(set(versions))
+    assert uow.groups.get_version("00000000-0000-0000-0000-000000000000") is None
+    assert uow.groups.exists(group.id)
+
+# Test 4: Stored balances, the aggregate and the replay agree
+def test_balances_agree(uow):
+    group, [alice, bob, carol] = seed_group(uow, ["alice", "bob", "carol"])
+    add_expense(uow, group, [(alice, 90.0)], [alice, bob, carol])
+    expense = add_expense(uow, group, [(bob, 20.0), (carol, 10.0)], [alice])
+    uow.expenses.update(Expense(
+        id=expense.id, description="Taxi", total_amount=40.0, group_id=group.id,
+        creditors=[(bob, 40.0)], debtors=[alice, carol]
+    ))
+
+    expected = {alice: 40.0, bob: 10.0, carol: -50.0}
+    assert uow.groups.get_balances(group.id) == pytest.approx(expected)
+    assert uow.expenses.aggregate_balances(group.id) == pytest.approx(expected)
+    assert calculate_group_balance(uow.expenses, uow.groups, group.id) == pytest.approx(expected)
+    assert calculate_group_balance_columnar(uow.expenses, group.id) == pytest.approx(expected)
+
+# Test 5: Expenses are listed in id order, by page and as a stream
+def test_expense_listing(uow):
+    group, [alice, bob] = seed_group(uow, ["alice", "bob"])
+    other, [carol] = seed_group(uow, ["carol"])
+    ids = [add_expense(uow, group, [(alice, float(i + 1))], [bob]).id for i in range(7)]
+    add_expense(uow, other, [(carol, 5.0)], [carol])
+
+    listed = uow.expenses.list_by_group(group.id)
+    assert [e.id for e in listed] == ids
+    assert listed[0].creditors == [(alice, 1.0)]
+    assert listed[0].debtors == [bob]
+
+    assert [e.id for e in uow.expenses.list_by_group(group.id, limit=3, after_id=ids[1])] == ids[2:5]
+    assert [e.id for e in uow.expenses.iter_by_group(group.id, batch_size=3)] == ids
+
+    uow.expenses.add_many([
+        Expense(id=0, description="Bulk", total_amount=2.0, group_id=group.id, creditors=[(bob, 2.0)], debtors=[alice])
+        for _ in range(2)
+    ])
+    assert len(uow.expenses.list_by_group(group.id)) == 9
+    assert uow.expenses.get_by_id(str(ids[0])).description == "Expense"
+    assert uow.groups.get_by_expense_id(str(ids[0])).name == "Trip"
+
+# Test 6: Participation is tracked for creditors and debtors
+def test_member_has_expenses(uow):
+    group, [alice, bob, carol] = seed_group(uow, ["alice", "bob", "carol"])
+    expense = add_expense(uow, group, [(alice, 10.0)], [bob])
+
+    assert uow.expenses.member_has_expenses(alice.id)
+    assert uow.expenses.member_has_expenses(bob.id)
+    assert not uow.expenses.member_has_expenses(carol.id)
+
+    uow.expenses.remove(str(expense.id))
+    assert not uow.expenses.member_has_expenses(alice.id)
+
+# Test 7: Rolling back undoes every write of the unit of work
+def test_rollback(uow):
+    group, [alice, bob] = seed_group(uow, ["alice", "bob"])
+    uow.commit()
+
+    add_expense(uow, group, [(alice, 10.0)], [bob])
+    uow.groups.update_member_name(group.id, "bob", "robert")
+    uow.groups.add_member(group.id, Member(id=0, username="carol", group_id=group.id))
+    uow.rollback()
+
+    assert sorted(m.username for m in uow.groups.get_members(group.id)) == ["alice", "bob"]
+    assert uow.expenses.list_by_group(group.id) == []
+    assert uow.groups.get_balances(group.id) == {alice: 0.0, bob: 0.0}
+    assert not uow.expenses.member_has_expenses(alice.id)
+
+# Test 8: Members of another group are not removed, whether or not their username is taken here
+def test_remove_member_from_other_group(uow):
+    group, [alice] = seed_group(uow, ["alice"])
+    _, [other_alice, bob] = seed_group(uow, ["alice", "bob"], name="Other")
+
+    for stranger in (bob, other_alice):
+        with pytest.raises(ValueError, match="Member is not in the group"):
+            remove_member_from_group(uow.groups, uow.expenses, group.id, stranger)
+    assert uow.groups.get_members(group.id) == [alice]
@@ -0,0 +1,91 @@
+import random
+import time
+import pytest
+from domain.models import Member
+from domain.services import calculate_payments, SETTLEMENT_SOLVERS
+
+# Utils to build a random zero-sum set of balances
+def random_balances(rng, size, integer=False):
+    members = [Member(id=i + 1, username=f"m{i}", group_id="g") for i in range(size)]
+    if integer:
+        # Small integers produce many ties and exact cancellations
+        amounts = [float(rng.randint(-20, 20)) for _ in range(size - 1)]
+    else:
+        amounts = [round(rng.uniform(-500, 500), 2) for _ in range(size - 1)]
+    amounts.append(-sum(amounts))
+    return dict(zip(members, amounts))
+
+# Test 1: Every solver settles a simple group
+@pytest.mark.parametrize("solver", sorted(SETTLEMENT_SOLVERS))
+def test_solver_settles_balances(solver):
+    [alice, bob, carol] = [Member(id=i + 1, username=n, group_id="g") for i, n in enumerate(["alice", "bob", "carol"])]
+    payments = calculate_payments({alice: 30.0, bob: 70.0, carol: -100.0}, solver=solver)
+    assert sorted(payments, key=lambda p: p[0].id) == [(alice, carol, 30.0), (bob, carol, 70.0)]
+
+# Test 2: Unknown solvers are rejected
+def test_unknown_solver():
+    with pytest.raises(ValueError):
+        calculate_payments({}, solver="magic")
+
+# Test 3: The heap solver produces exactly the list solver output
+@pytest.mark.parametrize("seed", range(50))
+@pytest.mark.parametrize("integer", [False, True])
+def test_heap_matches_list(seed, integer):
+    rng = random.Random(seed)
+    balances = random_balances(rng, rng.randint(2, 60), integer)
+
+    assert calculate_payments(balances, solver="heap") == calculate_payments(balances, solver="list")
+
+# Utils to check that payments settle every balance
+def net_after_payments(balances, payments):
+    net = dict(balances)
+    for creditor, debtor, amount in payments:
+        net[creditor] -= amount
+        net[debtor] += amount
+    return net
+
+# Test 4: Exactly cancelling pairs are settled directly
+def test_min_transfers_matches_cancelling_subsets():
+    [a, b, c, d, e] = [Member(id=i + 1, username=n, group_id="g") for i, n in enumerate("abcde")]
+    balances = {a: 30.0, b: 70.0, c: -100.0, d: 25.0, e: -25.0}
+
+    heap_payments = calculate_payments(balances, solver="heap")
+    payments = calculate_payments(balances, solver="min_transfers")
+
+    assert len(heap_payments) == 4
+    assert len(payments) == 3
+    assert (d, e, 25.0) in payments
+
+# Test 5: The min transfers solver settles every balance and never needs more transfers
+@pytest.mark.parametrize("seed", range(30))
+def test_min_transfers_settles_balances(seed):
+    rng = random.Random(seed)
+    balances = random_balances(rng, rng.randint(2, 40), integer=True)
+
+    payments = calculate_payments(balances, solver="min_transfers")
+
+    assert all(abs(balance) < 0.01 for balance in net_after_payments(balances, payments).values())
+    assert all(amount > 0 for _, _, amount in payments)
+    assert len(payments) <= len([p for p in calculate_payments(balances, solver="heap") if p[2]])
+
+# Test 6: With no time budget it falls back to the greedy matching
+def test_min_transfers_without_budget():
+    rng = random.Random(7)
+    balances = random_balances(rng, 30)
+
+    payments = calculate_payments(balances, solver="min_transfers", time_budget=0)
+
+    assert all(abs(balance) < 0.01 for balance in net_after_payments(balances, payments).values())
+
+# Test 7: The search keeps to its budget when one total matches many debtor pairs
+@pytest.mark.parametrize("creditor_count, debtor_count", [(100, 200), (125, 250)])
+def test_min_transfers_keeps_to_budget(creditor_count, debtor_count):
+    balances = {Member(id=i, username=f"c{i}", group_id="g"): 2.0 for i in range(creditor_count)}
+    balances.update({Member(id=1000 + i, username=f"d{i}", group_id="g"): -1.0 for i in range(debtor_count)})
+
+    start = time.thread_time()
+    payments = calculate_payments(balances, solver="min_transfers", time_budget=0.05)
+    elapsed = time.thread_time() - start
+
+    assert elapsed < 0.05 * 3
+    assert all(abs(balance) < 0.01 for balance in net_after_payments(balances, payments).values())
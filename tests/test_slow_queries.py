@@ -0,0 +1,78 @@
+import json
+import pytest
+from config import Config
+from infrastructure.db import engine
+from infrastructure.db.slow_queries import normalize_statement, record_slow_queries, summarize
+from tests.helpers import create_group
+
+# Utils to log every statement to a file for the duration of a test
+@pytest.fixture
+def slow_query_log(tmp_path):
+    path = tmp_path / "slow.log"
+    record_slow_queries(engine, 1e-6, str(path))
+    try:
+        yield path
+    finally:
+        record_slow_queries(engine, Config.SLOW_QUERY_THRESHOLD_MS, Config.SLOW_QUERY_LOG)
+
+def read_log(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+# Test 1: Slow statements are logged with their origin, route and plan
+def test_slow_statement_logged(client, slow_query_log):
+    group_id = create_group(client, ["alice", "bob"])
+    client.get(f"/groups/{group_id}/members")
+
+    entries = [e for e in read_log(slow_query_log) if e["route"] == "GET /groups/<group_id>/members"]
+    [select] = [e for e in entries if e["statement"].lstrip().startswith("SELECT")]
+    assert select["origin"] == "infrastructure.db.repository.SQLAlchemyGroupRepository.get_members"
+    assert select["duration_ms"] >= 0
+    assert group_id.replace("-", "") in select["parameters"]
+    assert any("members" in line for line in select["plan"])
+
+# Test 2: Statements under the threshold are not logged, and 0 turns the log off
+@pytest.mark.parametrize("threshold_ms", [60_000, 0])
+def test_fast_statements_not_logged(client, tmp_path, threshold_ms):
+    path = tmp_path / "slow.log"
+    record_slow_queries(engine, threshold_ms, str(path))
+    try:
+        create_group(client, ["alice", "bob"])
+    finally:
+        record_slow_queries(engine, Config.SLOW_QUERY_THRESHOLD_MS, Config.SLOW_QUERY_LOG)
+    assert not path.exists()
+
+# Test 3: The summary adds up statement shapes across the rotated files
+def test_summarize(tmp_path):
+    path = tmp_path / "slow.log"
+    def entry(statement, duration_ms, origin):
+        return json.dumps({"statement": statement, "duration_ms": duration_ms, "origin": origin, "route": "GET /x", "plan": ["SCAN t"]}) + "\n"
+
+    (tmp_path / "slow.log.1").write_text(entry("SELECT * FROM t WHERE id IN (?, ?)", 300.0, "repo.a"))
+    path.write_text(
+        entry("SELECT * FROM t WHERE id IN (?, ?, ?)", 200.0, "repo.b")
+        + entry("SELECT 1", 400.0, "repo.c")
+        + "not json\n"
+    )
+
+    first, second = summarize(str(path))
+    assert (first.statement, first.count, first.total_ms, first.max_ms) == ("SELECT * FROM t WHERE id IN (...)", 2, 500.0, 300.0)
+    assert first.origins == {"repo.a": 1, "repo.b": 1}
+    assert (second.statement, second.total_ms) == ("SELECT 1", 400.0)
+    assert [s.statement for s in summarize(str(path), top=1)] == [first.statement]
+
+# Test 4: Statements differing only in whitespace and IN list length share a shape
+def test_normalize_statement():
+    assert normalize_statement("SELECT a\n  FROM t WHERE b IN (%(b_1)s, %(b_2)s)") == "SELECT a FROM t WHERE b IN (...)"
+    assert normalize_statement("SELECT a FROM t WHERE b = (?)") == "SELECT a FROM t WHERE b = (?)"
+
+# Test 5: The command lists the top offenders
+def test_slow_queries_command(app, tmp_path):
+    path = tmp_path / "slow.log"
+    path.write_text(json.dumps({"statement": "SELECT 1", "duration_ms": 400.0, "origin": "repo.c", "route": None, "plan": ["SCAN t"]}) + "\n")
+
+    result = app.test_cli_runner().invoke(args=["db", "slow-queries", "--log", str(path)])
+
+    assert result.exit_code == 0
+    assert "1. 400.0 ms total, 1 run(s)" in result.output
+    assert "from repo.c (1)" in result.output
+    assert "plan: SCAN t" in result.output
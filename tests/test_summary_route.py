@@ -0,0 +1,49 @@
+import pytest
+from tests.helpers import create_group, add_expense
+
+# Test 1: The summary carries an ETag and answers 304 when it is unchanged
+def test_summary_not_modified(backend_client):
+    group_id = create_group(backend_client, ["alice", "bob"])
+    add_expense(backend_client, group_id, 60.0, "alice", ["bob"])
+
+    first = backend_client.get(f"/groups/{group_id}/summary")
+    assert first.status_code == 200
+    assert first.json["balances"] == {"alice": 60.0, "bob": -60.0}
+    assert first.headers["ETag"]
+
+    second = backend_client.get(f"/groups/{group_id}/summary", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+# Test 2: Writes to the group change the ETag
+@pytest.mark.parametrize("write", ["expense", "member"])
+def test_summary_changes_after_write(backend_client, write):
+    group_id = create_group(backend_client, ["alice", "bob"])
+    first = backend_client.get(f"/groups/{group_id}/summary")
+
+    if write == "expense":
+        add_expense(backend_client, group_id, 30.0, "bob", ["alice", "bob"])
+    else:
+        backend_client.post(f"/groups/{group_id}/members", json={"username": "carol"})
+
+    second = backend_client.get(f"/groups/{group_id}/summary", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+# Test 3: Repeated requests are served from the cache
+def test_summary_cache_hits(backend_client):
+    group_id = create_group(backend_client, ["alice", "bob"])
+    add_expense(backend_client, group_id, 60.0, "alice", ["bob"])
+
+    first = backend_client.get(f"/groups/{group_id}/summary")
+    second = backend_client.get(f"/groups/{group_id}/summary")
+
+    assert first.json == second.json
+    stats = backend_client.get("/stats/cache").json["summary"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+# Test 4: Unknown groups are rejected
+def test_summary_unknown_group(backend_client):
+    response = backend_client.get("/groups/00000000-0000-0000-0000-000000000000/summary")
+    assert response.status_code == 400
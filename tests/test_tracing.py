@@ -0,0 +1,90 @@
+import json
+import pytest
+from application.tracing import Tracer, configure_tracing, current_span, traced, tracer
+from tests.helpers import create_group, add_expense
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(list(spans))
+
+@pytest.fixture
+def sampled(monkeypatch):
+    exporter = ListExporter()
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    return exporter
+
+@traced()
+def child(fail=False):
+    if fail:
+        raise ValueError("boom")
+    return current_span()
+
+@traced()
+def parent():
+    return child(), child()
+
+# Test 1: Spans nest under the current span and the trace is exported once, at the root
+def test_spans_nest(sampled):
+    root = tracer.start_trace("request")
+    first, second = parent()
+    tracer.end_span(root)
+
+    [trace] = sampled.traces
+    assert [span.name for span in trace] == ["request", "test_tracing.parent", "test_tracing.child", "test_tracing.child"]
+    assert trace[1].parent_id == root.span_id
+    assert first.parent_id == second.parent_id == trace[1].span_id
+    assert {span.trace_id for span in trace} == {root.trace_id}
+    assert all(span.duration_ms >= 0 for span in trace)
+    assert current_span() is None
+
+# Test 2: Errors are recorded on the span they leave
+def test_span_error(sampled):
+    root = tracer.start_trace("request")
+    with pytest.raises(ValueError):
+        child(fail=True)
+    tracer.end_span(root)
+
+    assert sampled.traces[0][1].error == "ValueError: boom"
+    assert sampled.traces[0][0].error is None
+
+# Test 3: Unsampled requests open no spans
+def test_unsampled():
+    unsampled = Tracer(sample_rate=0.0, exporter=ListExporter())
+    assert unsampled.start_trace("request") is None
+    assert Tracer(sample_rate=1.0).start_trace("request") is None
+
+    assert parent() == (None, None)
+    with tracer.span("anything") as span:
+        assert span is None
+
+# Test 4: A sampled summary request is written to the file with its service and repository spans
+def test_request_trace_file(client, tmp_path):
+    group_id = create_group(client, ["alice", "bob"])
+    add_expense(client, group_id, 30.0, "alice", ["alice", "bob"])
+
+    path = tmp_path / "traces.jsonl"
+    configure_tracing(1.0, str(path))
+    try:
+        response = client.get(f"/groups/{group_id}/summary")
+    finally:
+        configure_tracing(0.0, None)
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    by_id = {span["span_id"]: span for span in spans}
+    root = next(span for span in spans if span["parent_id"] is None)
+    assert root["name"] == "GET /groups/<group_id>/summary"
+    assert root["attributes"]["status"] == 200
+    assert response.headers["X-Trace-Id"] == root["trace_id"]
+
+    def parent_name(name):
+        span = next(span for span in spans if span["name"] == name)
+        return by_id[span["parent_id"]]["name"]
+
+    assert parent_name("routes.get_group_summary") == root["name"]
+    assert parent_name("services.get_group_balances") == "routes.get_group_summary"
+    assert parent_name("SQLAlchemyGroupRepository.get_balances") == "services.get_group_balances"
+    assert parent_name("services.calculate_payments") == "routes.get_group_summary"
@@ -0,0 +1,66 @@
+import pytest
+from flask import g
+from sqlalchemy import event
+from domain.services import create_member, get_group_by_id, get_members_by_group_id
+from infrastructure.db import engine
+from infrastructure.db.models import GroupDB, MemberDB
+from tests.helpers import create_group
+
+# Utils to count the transactions committed on the engine
+@pytest.fixture
+def commits():
+    counter = []
+    listener = lambda conn: counter.append(conn)
+    event.listen(engine, "commit", listener)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "commit", listener)
+
+# Test 1: Creating a group with its members commits once
+def test_create_group_commits_once(client, commits):
+    user_id = client.post("/users", json={}).json["id"]
+    commits.clear()
+
+    response = client.post("/groups", json={
+        "name": "Trip",
+        "owner_id": user_id,
+        "members": [f"member{i}" for i in range(10)],
+    })
+
+    assert response.status_code == 201
+    assert len(commits) == 1
+
+# Test 2: A failed request leaves nothing behind
+def test_failed_request_rolls_back(client, session, commits):
+    user_id = client.post("/users", json={}).json["id"]
+    commits.clear()
+
+    response = client.post("/groups", json={"name": "Trip", "owner_id": user_id, "members": ["alice", "alice"]})
+
+    assert response.status_code == 400
+    assert commits == []
+    assert session.query(GroupDB).count() == 0
+    assert session.query(MemberDB).count() == 0
+
+# Test 3: Members added earlier in a request are seen by later reads of the same unit of work
+def test_reads_see_pending_members(app, client, commits):
+    group_id = create_group(client, ["alice", "bob"])
+    commits.clear()
+
+    with app.test_request_context(f"/groups/{group_id}/members", method="POST"):
+        app.preprocess_request()
+        get_group_by_id(g.uow.groups, group_id)  # cached before the write
+        create_member(g.uow.members, g.uow.groups, "carol", group_id)
+
+        assert commits == []
+        assert sorted(m.username for m in get_members_by_group_id(g.uow.groups, group_id)) == ["alice", "bob", "carol"]
+        assert sorted(m.username for m in get_group_by_id(g.uow.groups, group_id).members) == ["alice", "bob", "carol"]
+
+# Test 4: Reads do not commit
+def test_reads_do_not_commit(client, commits):
+    group_id = create_group(client, ["alice", "bob"])
+    commits.clear()
+
+    assert client.get(f"/groups/{group_id}/summary").status_code == 200
+    assert commits == []